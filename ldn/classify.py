@@ -38,7 +38,10 @@ from shapely.geometry import box
 from odc.geo.geom import box as odc_box
 
 
-from ldn.grids import get_gadm, get_gridspec
+from ldn.focal import majority_filter
+from ldn.grids import get_gadm, get_gadm_store, get_tile_geobox
+from ldn.landmask import LAND_MASK_CACHE_DIR, tile_land_mask
+from ldn.typology import classes
 from ldn.utils import GEOMAD_VERSION, LdnError, get_analysis_epsg
 
 logger = logging.getLogger(__name__)
@@ -410,30 +413,29 @@ def load_dem_terrain(geobox: GeoBox) -> xr.Dataset:
     return _compute_terrain(dem["elevation"])
 
 
-def search_and_load_geomad_indices_dem(
+def find_geomad_item(
     tile_id: str,
     year: str,
-    analysis_crs: Literal["EPSG:3832", "EPSG:6933"],
-    geopolygon: GeoDataFrame,
-) -> xr.Dataset:
-    """Search, load, scale, and merge GeoMAD bands, spectral indices, and DEM terrain for a tile.
-        Supports antimeridian-crossing tiles.
+    stac_geoparquet_url: str = GEOMAD_STAC_GEOPARQUET_URL,
+) -> Item:
+    """Find the GeoMAD STAC item for a tile and year.
 
     Args:
         tile_id: Grid tile identifier (e.g. "058_043").
-        year: Year string for the GeoMAD item search (e.g. "2020").
-        analysis_crs: The expected CRS of the GeoMAD data (either "EPSG:3832" or "EPSG:6933").
-        geopolygon: GeoDataFrame used to constrain the stac_load extent (the country geom).
+        year: Year string (e.g. "2020").
+        stac_geoparquet_url: STAC geoparquet index of the GeoMAD version to use.
 
     Returns:
-        Merged dataset with GeoMAD bands, spectral indices, elevation,
-        slope, and aspect, clipped to the tile proj:bbox.
+        The GeoMAD item.
+
+    Raises:
+        LdnError: If there isn't exactly one item.
     """
     logging.info(
-        f"Searching for GeoMAD item for tile {tile_id} and year {year}, using latest version {GEOMAD_VERSION}"
+        f"Searching for GeoMAD item for tile {tile_id} and year {year} in {stac_geoparquet_url}"
     )
     geomad_items = search_sync(
-        GEOMAD_STAC_GEOPARQUET_URL,
+        stac_geoparquet_url,
         ids=f"ausp_ls_geomad_{tile_id}_{year}",
     )
     geomad_items = [Item.from_dict(doc) for doc in geomad_items]
@@ -447,6 +449,29 @@ def search_and_load_geomad_indices_dem(
             f"Must find exactly 1 GeoMAD item for this tile and year, "
             f"found {geomad_items_n} instead."
         )
+    return geomad_items[0]
+
+
+def search_and_load_geomad_indices_dem(
+    tile_id: str,
+    year: str,
+    analysis_crs: Literal["EPSG:3832", "EPSG:6933"],
+    geopolygon: GeoDataFrame,
+) -> xr.Dataset:
+    """Search, load, scale, and merge GeoMAD bands, spectral indices, and DEM terrain for a tile.
+        Supports antimeridian-crossing tiles.
+
+    Args:
+        tile_id: Grid tile identifier (e.g. "058_043").
+        year: Year string for the GeoMAD item search (e.g. "2020").
+        analysis_crs: The expected CRS of the GeoMAD data (either "EPSG:3832" or "EPSG:6933").
+        geopolygon: GeoDataFrame used to constrain the stac_load extent (the country geom).
+
+    Returns:
+        Merged dataset with GeoMAD bands, spectral indices, elevation,
+        slope, and aspect, clipped to the tile proj:bbox.
+    """
+    geomad_items = [find_geomad_item(tile_id, year)]
 
     proj_bbox = geomad_items[0].properties.get("proj:bbox")
     logger.info(f"proj:bbox = {proj_bbox}")
@@ -561,17 +586,23 @@ def do_prediction(
     model: RandomForestClassifier,
     probability_threshold: float,
     nodata_value: int,
+    land_mask: np.ndarray | None = None,
+    outside_land_value: int | None = None,
 ) -> tuple[xr.DataArray, xr.DataArray, xr.DataArray]:
     """Run random forest prediction and extract target class probability.
 
-    Converts the dataset to a flat observation table, runs the model,
-    and reshapes results back to 2D.
+    Converts the valid pixels of the dataset to a flat observation table, runs
+    the model, and reshapes results back to 2D.
 
     Args:
         ds: Feature dataset with y/x spatial dimensions.
         model: Fitted scikit-learn classifier with predict/predict_proba.
         probability_threshold: Confidence threshold (0-100) for the binary mask.
         nodata_value: Integer nodata value for output bands.
+        land_mask: Optional (y, x) boolean array, True for pixels to classify.
+            Other pixels are left out of the observation table.
+        outside_land_value: Class written to both classifications for pixels
+            outside land_mask, e.g. water. Defaults to nodata_value.
 
     Returns:
         A (classification, probability, probability_mask) tuple of uint8
@@ -579,11 +610,16 @@ def do_prediction(
     """
     stacked = ds.to_array().stack(dims=["y", "x"])
 
-    # Nodata mask: True for pixels where ANY band is NaN.
+    # Nodata mask: True for pixels where ANY band is NaN, or that are off land.
     nodata_mask = stacked.isnull().any(dim="variable")
+    if land_mask is not None:
+        nodata_mask = nodata_mask | ~np.asarray(land_mask, dtype=bool).ravel()
+
+    # Flatten the spatial nodata mask to match the observation index.
+    valid = ~nodata_mask.values
 
-    # Build observation table: fill NaN with nodata_value (masked pixels are excluded below).
-    obs = stacked.squeeze().fillna(nodata_value).transpose().to_pandas()
+    # Build the observation table from valid pixels only.
+    obs = stacked.isel(dims=valid).transpose("dims", "variable").to_pandas()
 
     # Validate that all model features are present before reindexing.
     missing = set(model.feature_names_in_) - set(obs.columns)
@@ -592,27 +628,24 @@ def do_prediction(
             f"Dataset is missing features required by the model: {sorted(missing)}"
         )
     obs = obs.reindex(columns=model.feature_names_in_)
+    logger.info(f"Predicting {valid.sum()} of {valid.size} pixels")
 
-    # Flatten the spatial nodata mask to match the observation index.
-    valid = ~nodata_mask.values
-
-    full_predictions = pd.Series(nodata_value, index=obs.index, dtype=np.float32)
-    full_probabilities = pd.Series(nodata_value, index=obs.index, dtype=np.float32)
+    full_predictions = np.full(valid.size, nodata_value, dtype=np.float32)
+    full_probabilities = np.full(valid.size, nodata_value, dtype=np.float32)
 
     if valid.any():
-        valid_df = obs.loc[valid]
-        full_predictions.loc[valid] = model.predict(valid_df).astype(np.float32)
-        full_probabilities.loc[valid] = (
-            model.predict_proba(valid_df).max(axis=1) * 100
-        ).astype(np.float32)
+        full_predictions[valid] = model.predict(obs).astype(np.float32)
+        full_probabilities[valid] = (model.predict_proba(obs).max(axis=1) * 100).astype(
+            np.float32
+        )
 
     # Reshape back to 2D; nodata_mask stamps nodata_value over masked pixels.
     nodata_mask_2d = nodata_mask.unstack("dims")
     classification_unfiltered = reshape_array_to_2d(
-        full_predictions, ds, nodata_mask_2d, nodata_value=nodata_value
+        pd.Series(full_predictions), ds, nodata_mask_2d, nodata_value=nodata_value
     )
     probability = reshape_array_to_2d(
-        full_probabilities, ds, nodata_mask_2d, nodata_value=nodata_value
+        pd.Series(full_probabilities), ds, nodata_mask_2d, nodata_value=nodata_value
     )
     probability_mask = probability_binary(
         probability, probability_threshold, nodata_value=nodata_value
@@ -621,6 +654,19 @@ def do_prediction(
     classification = classification_unfiltered.where(
         probability_mask == 1, nodata_value
     ).astype("uint8")
+
+    if land_mask is not None and outside_land_value is not None:
+        on_land = xr.DataArray(
+            np.asarray(land_mask, dtype=bool),
+            coords={"y": ds.y, "x": ds.x},
+            dims=["y", "x"],
+        )
+        classification = classification.where(on_land, outside_land_value).astype(
+            "uint8"
+        )
+        classification_unfiltered = classification_unfiltered.where(
+            on_land, outside_land_value
+        ).astype("uint8")
     return classification, classification_unfiltered, probability
 
 
@@ -633,6 +679,10 @@ class LulcProcessor(Processor):
         logger: logging.Logger,
         probability_threshold: float,
         nodata_value: int,
+        majority_window: int | None = None,
+        land_buffer_m: float | None = None,
+        land_mask_cache_dir: Path | None = LAND_MASK_CACHE_DIR,
+        outside_land_value: int | None = None,
         **kwargs,
     ):
         """Create a LULC prediction processor.
@@ -642,11 +692,22 @@ class LulcProcessor(Processor):
             nodata_value: Integer nodata value for output bands.
             probability_threshold: Probability threshold for classification.
             logger: Logger instance.
+            majority_window: Optional odd window size, in pixels, of a majority
+                filter applied to the thresholded classification.
+            land_buffer_m: If set, only pixels within this many metres of GADM
+                land are classified, and the rest are never sent to the model.
+            land_mask_cache_dir: Directory to cache each tile's land mask in.
+            outside_land_value: Class for pixels away from land, e.g. water.
+                Defaults to nodata_value.
         """
         super().__init__(**kwargs)
         self._model = model
         self._probability_threshold = probability_threshold
         self._nodata_value = nodata_value
+        self._majority_window = majority_window
+        self._land_buffer_m = land_buffer_m
+        self._land_mask_cache_dir = land_mask_cache_dir
+        self._outside_land_value = outside_land_value
         self._logger = logger
 
     def process(self, input_data: xr.Dataset) -> xr.Dataset:
@@ -681,11 +742,33 @@ class LulcProcessor(Processor):
         self._logger.info("Computing merged dataset")
         merged = merged.compute()
 
+        land_mask = None
+        if self._land_buffer_m is not None:
+            self._logger.info(
+                f"Masking pixels more than {self._land_buffer_m} m from land"
+            )
+            land_mask = tile_land_mask(
+                merged.odc.geobox, self._land_buffer_m, self._land_mask_cache_dir
+            )
+
         self._logger.info("Running prediction")
         classification, classification_unfiltered, probability = do_prediction(
-            merged, self._model, self._probability_threshold, self._nodata_value
+            merged,
+            self._model,
+            self._probability_threshold,
+            self._nodata_value,
+            land_mask=land_mask,
+            outside_land_value=self._outside_land_value,
         )
 
+        if self._majority_window:
+            self._logger.info(
+                f"Applying a {self._majority_window} pixel majority filter"
+            )
+            classification = majority_filter(
+                classification, self._majority_window, self._nodata_value
+            )
+
         output = xr.Dataset(
             {
                 "classification": classification,
@@ -758,6 +841,9 @@ def run_classify_task(
     overwrite: Annotated[bool, typer.Option()],
     probability_threshold: float,
     nodata_value: int,
+    majority_window: int | None = None,
+    land_buffer: float | None = None,
+    ocean_as_water: bool = False,
 ) -> None:
     """Run LULC prediction for a single tile and year, writing results to S3.
 
@@ -778,6 +864,11 @@ def run_classify_task(
         overwrite: If True, overwrite existing output.
         probability_threshold: Confidence threshold (0-100) for the binary mask.
         nodata_value: Integer nodata value for output bands.
+        majority_window: Optional odd window size, in pixels, of a majority filter
+            applied to the classification.
+        land_buffer: If set, only classify pixels within this many metres of
+            GADM land.
+        ocean_as_water: Write pixels away from land as water rather than nodata.
     """
     logger.info(
         f"Starting processing. Tile ID: {tile_id}, Year: {datetime}, "
@@ -806,8 +897,7 @@ def run_classify_task(
     analysis_crs = get_analysis_epsg(region)
 
     logger.info("Getting gridspec and geobox for tile")
-    grid = get_gridspec(region)
-    geobox = grid.tile_geobox(tile_id_tuple)
+    geobox = get_tile_geobox(region, tile_id_tuple)
 
     if decimated:
         logger.warning("Decimating geobox by 10x")
@@ -872,6 +962,9 @@ def run_classify_task(
         nodata_value=nodata_value,
         logger=logger,
         probability_threshold=probability_threshold,
+        majority_window=majority_window,
+        land_buffer_m=land_buffer,
+        outside_land_value=classes["Water"] if ocean_as_water else None,
     )
 
     stac_creator = StacCreator(itempath=itempath, with_raster=True)
@@ -972,16 +1065,16 @@ def get_buffered_country(
     """
     buffer_m = 100
 
-    country_gadm = get_gadm(countries=country_of_interest)
+    # Make sure the country is downloaded, then use the memoised geometry store.
+    get_gadm(countries=country_of_interest)
+    store = get_gadm_store()
 
-    country_gadm = GeoDataFrame(
-        geometry=country_gadm.to_crs(analysis_crs).buffer(buffer_m).to_crs(wgs84),
-        crs=wgs84,
-    )
-    # Do antimeridian fix. Needed for Fiji.
+    # Buffer in the analysis CRS, then do antimeridian fix. Needed for Fiji.
     rows = []
-    for geom in country_gadm.geometry:
-        fixed = _fix_geometry(geom)
+    for country_code in country_of_interest.values():
+        fixed = store.country_geometry(
+            country_code, buffer_m, crs=analysis_crs, fix_antimeridian=True
+        )
         if fixed.geom_type == "MultiPolygon":
             rows.extend(fixed.geoms)  # one row per polygon (east/west of AM)
         else:
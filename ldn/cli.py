@@ -1,8 +1,13 @@
 import logging
 import sys
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
 
 import boto3
+import requests
 from dep_tools.namers import S3ItemPath
 from dep_tools.aws import object_exists
 from dep_tools.searchers import PystacSearcher
@@ -20,8 +25,8 @@ from dep_tools.exceptions import EmptyCollectionError
 from dask.distributed import Client as DaskClient
 
 from cogeo_mosaic.backends import MosaicBackend
+from cogeo_mosaic.errors import MosaicNotFoundError
 from cogeo_mosaic.mosaic import MosaicJSON
-from pystac import ItemCollection
 from rustac import search_sync
 from shapely.geometry import mapping, shape
 
@@ -32,15 +37,43 @@ from ldn.geomad import (
     USGS_CATALOG,
     USGS_COLLECTION,
     LANDSAT_BANDS,
+    LandMaskOdcLoader,
+    checkpoint_path,
+    delete_checkpoint,
 )
 from ldn.grids import get_grid_tiles
+from ldn.tile_registry import load_tile_registry
 import typer
 
 from ldn import get_version
 from ldn.cli_grid import cli_grid_app
 from ldn.cli_classify import classify_app
-from ldn.grids import get_gridspec
-from ldn.utils import GEOMAD_VERSION, LdnError, PREDICTION_VERSION
+from ldn.grids import get_gadm, get_gridspec, get_tile_geobox
+from ldn.overviews import (
+    OVERVIEW_MAX_ZOOM,
+    OVERVIEW_RESOLUTION,
+    build_overview_cog,
+    cog_assets,
+    feature_crs,
+    overview_item,
+    overview_resampling,
+    product_year,
+    write_json,
+)
+from ldn.tasks import (
+    estimate_task_cost,
+    load_scene_counts,
+    pack_tasks,
+    tile_land_fractions,
+)
+from ldn.timeseries import DEFAULT_TIMESERIES_ASSETS, query_timeseries
+from ldn.utils import ALL_COUNTRIES, GEOMAD_VERSION, LdnError, PREDICTION_VERSION
+from ldn.zonal import (
+    merge_zonal_stats,
+    tile_jobs,
+    tile_zonal_stats,
+    zonal_stats_tables,
+)
 
 app = typer.Typer()
 logger = logging.getLogger(__name__)
@@ -84,8 +117,34 @@ if __name__ == "__main__":
 def print_tasks(
     years: Annotated[str, typer.Option()],
     grids: Annotated[Literal["all", "pacific", "non-pacific"], typer.Option()] = "all",
+    estimate_cost: Annotated[
+        bool,
+        typer.Option(
+            help="Attach a cost estimate (land fraction x expected scene count) to each task."
+        ),
+    ] = False,
+    scene_counts: Annotated[
+        Path | None,
+        typer.Option(
+            help="CSV of expected scene counts with 'id', 'scene_count' and optional 'year' columns."
+        ),
+    ] = None,
+    batch_cost: Annotated[
+        float | None,
+        typer.Option(
+            help="If set, bin-pack tasks into batches of at most this total cost. Implies --estimate-cost."
+        ),
+    ] = None,
+    large_cost: Annotated[
+        float,
+        typer.Option(help="Tasks at or above this cost get their own 'large' batch."),
+    ] = 150.0,
 ) -> None:
-    """Print all tasks for given years for either all grids, or just the Pacific or non-Pacific grid."""
+    """Print all tasks for given years for either all grids, or just the Pacific or non-Pacific grid.
+
+    Optionally estimates a cost per task and bin-packs tasks into batches,
+    where each batch has an id, a size ('small' or 'large'), a total cost and a list of tasks.
+    """
     logger.info(f"Generating tasks for years: {years} and grids: {grids}")
 
     years_list = []
@@ -102,7 +161,29 @@ def print_tasks(
     if not all(y.isdigit() for y in years_list):
         raise LdnError("Years must be integers")
 
-    tiles = get_grid_tiles(format="list", grids=grids, overwrite=False)
+    estimate_cost = estimate_cost or batch_cost is not None
+
+    land_fractions: dict[str, float] = {}
+    counts = load_scene_counts(scene_counts) if scene_counts is not None else {}
+    registry = load_tile_registry(grids)
+    if registry is not None:
+        logger.info(f"Reading {len(registry)} tiles from the tile registry")
+        tiles = registry.tiles()
+        if estimate_cost:
+            land_fractions = registry.land_fractions()
+            counts = counts or registry.scene_counts()
+    elif estimate_cost:
+        tiles_gdf = get_grid_tiles(format="gdf", grids=grids, overwrite=False)
+        tiles = [
+            ((int(x), int(y)), str(region))
+            for x, y, region in zip(
+                tiles_gdf["x_index"], tiles_gdf["y_index"], tiles_gdf["region"]
+            )
+        ]
+        logger.info("Estimating land fraction per tile from GADM")
+        land_fractions = tile_land_fractions(tiles_gdf)
+    else:
+        tiles = get_grid_tiles(format="list", grids=grids, overwrite=False)
 
     logger.info(
         f"Number of tasks: {len(years_list) * len(tiles)} (years: {len(years_list)}, tiles: {len(tiles)})"
@@ -112,15 +193,20 @@ def print_tasks(
     for year in years_list:
         # get_grid_tiles handles all (Pacific and non-Pacific grids) or just one.
         for tile in tiles:
-            tasks.append(
-                {
-                    "id": "_".join(str(i) for i in tile[0]),
-                    "year": year,
-                    "region": tile[1],
-                }
-            )
-
-    tasks_json_str = json.dumps(tasks, indent=2)
+            task = {
+                "id": "_".join(str(i) for i in tile[0]),
+                "year": year,
+                "region": tile[1],
+            }
+            if estimate_cost:
+                task["cost"] = estimate_task_cost(task, land_fractions, counts)
+            tasks.append(task)
+
+    output = tasks
+    if batch_cost is not None:
+        output = pack_tasks(tasks, batch_cost=batch_cost, large_cost=large_cost)
+
+    tasks_json_str = json.dumps(output, indent=2)
     with open("tasks.json", "w") as f:
         f.write(tasks_json_str)
 
@@ -131,9 +217,116 @@ def print_tasks(
     return
 
 
+# Matches how dep_tools' S3ItemPath lays out a STAC item for a tile and year:
+# {prefix}_{sensor}_{dataset_id}/{version}/{x:03d}/{y:03d}/{year}/{prefix}_{sensor}_{dataset_id}_{x:03d}_{y:03d}_{year}.stac-item.json
+STAC_KEY_TEMPLATE = (
+    "{prefix}_{sensor}_{dataset_id}/{version}/{x:03d}/{y:03d}/{year}/"
+    "{prefix}_{sensor}_{dataset_id}_{x:03d}_{y:03d}_{year}.stac-item.json"
+)
+
+
+def _product_prefix(
+    region: Literal["pacific", "non-pacific"], product_owner: str | None
+) -> str:
+    """Return the S3 path prefix (product owner) a region's outputs are written under."""
+    if product_owner is not None:
+        return product_owner
+    return "ci" if region == "non-pacific" else "dep"
+
+
+# TODO: Handle different bucket formats more robustly. For now we support:
+# "data.ldn.auspatious.com" to "https://data.ldn.auspatious.com"
+# "dep-public-staging" to "https://dep-public-staging.s3.us-west-2.amazonaws.com"
+def _full_path_prefix(bucket: str) -> str:
+    """Return the public URL prefix for a bucket."""
+    if bucket.startswith("https://"):
+        return bucket
+    elif "." in bucket:
+        return f"https://{bucket}"
+    else:
+        return f"https://{bucket}.s3.us-west-2.amazonaws.com"  # TODO: can the region be dynamic?
+
+
+def _list_stac_keys_for_prefix(client, bucket: str, s3_prefix: str) -> list[str]:
+    """List all STAC item keys under a single S3 prefix."""
+    keys = []
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=s3_prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(".stac-item.json"):
+                keys.append(key)
+    return keys
+
+
+def _list_stac_keys_sharded(
+    client, bucket: str, s3_prefixes: list[str], max_workers: int
+) -> dict[str, list[str]]:
+    """List STAC item keys under many S3 prefixes concurrently.
+
+    Args:
+        client: boto3 S3 client (boto3 clients are thread safe).
+        bucket: S3 bucket name.
+        s3_prefixes: Prefixes to list, e.g. one per tile-x sub-prefix.
+        max_workers: Maximum number of concurrent listing threads.
+
+    Returns:
+        Mapping of each prefix to the STAC item keys found under it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda s3_prefix: _list_stac_keys_for_prefix(client, bucket, s3_prefix),
+            s3_prefixes,
+        )
+        return dict(zip(s3_prefixes, results))
+
+
+def _read_listing_cache(
+    cache_path: Path, bucket: str, ttl_seconds: int
+) -> dict[str, dict]:
+    """Read the shard listings of a snapshot that are younger than the TTL.
+
+    Returns:
+        Mapping of shard prefix to {"created": listing time, "keys": [...]}, or an
+        empty dict if the snapshot is missing, unreadable or for another bucket.
+    """
+    if not cache_path.exists():
+        return {}
+    try:
+        snapshot = json.loads(cache_path.read_text())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable listing cache {cache_path}: {e}")
+        return {}
+
+    if snapshot.get("bucket") != bucket:
+        logger.info(f"Listing cache {cache_path} is for another bucket, relisting.")
+        return {}
+
+    now = time.time()
+    shards = snapshot.get("shards", {})
+    fresh = {
+        prefix: shard
+        for prefix, shard in shards.items()
+        if now - shard.get("created", 0) <= ttl_seconds
+    }
+    logger.info(
+        f"Using {len(fresh)} of {len(shards)} shard listings from {cache_path}, the rest are stale."
+    )
+    return fresh
+
+
+def _write_listing_cache(
+    cache_path: Path, bucket: str, shards: dict[str, dict]
+) -> None:
+    """Persist shard listings, each with its own listing time, so repeated submissions don't relist S3."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"bucket": bucket, "shards": shards}))
+
+
 # This command is helpful for developing.
 # It is basically a performance optimization to prevent a lot of pods spinning up to discover that their output exists and shouldn't be overwritten.
-# It duplicates a lot of code and isn't very clean. If something was changed in geomad, this would be out of sync and cause issues.
+# The expected keys are built from STAC_KEY_TEMPLATE rather than an S3ItemPath per task, and the template
+# is checked against S3ItemPath once per run so that a change in dep_tools' layout fails loudly instead of silently.
 @app.command()
 def filter_tasks(
     tasks_json: Annotated[str, typer.Option(help="JSON string of tasks to filter.")],
@@ -143,11 +336,27 @@ def filter_tasks(
     overwrite: Annotated[
         bool, typer.Option(help="If true, skip filtering and pass all tasks through.")
     ] = False,
+    max_workers: Annotated[
+        int,
+        typer.Option(help="Number of concurrent S3 listing requests."),
+    ] = 32,
+    listing_cache: Annotated[
+        Path | None,
+        typer.Option(
+            help="Optional local JSON file to snapshot the S3 listing to, so repeated runs don't relist."
+        ),
+    ] = None,
+    listing_cache_ttl: Annotated[
+        int,
+        typer.Option(help="Maximum age in seconds of a reusable listing snapshot."),
+    ] = 3600,
 ) -> None:
     """Filter tasks by checking if the output STAC item already exists in S3.
 
     Takes a JSON array of tasks (with id, year, region fields) and outputs
     only those tasks whose output STAC items do not yet exist.
+
+    Listing is sharded by tile-x sub-prefix and run concurrently.
     """
     tasks = json.loads(tasks_json)
 
@@ -161,61 +370,83 @@ def filter_tasks(
     # Normalize version the same way S3ItemPath does internally
     version = version.replace(".", "-")
 
-    client = boto3.client("s3")
     sensor = "ls"
     dataset_id = "geomad"
 
-    if bucket.startswith("https://"):
-        full_path_prefix = bucket
-    elif "." in bucket:
-        full_path_prefix = f"https://{bucket}"
-    else:
-        full_path_prefix = f"https://{bucket}.s3.us-west-2.amazonaws.com"
+    full_path_prefix = _full_path_prefix(bucket)
 
-    # Collect all unique prefixes we need to list
-    prefix_set: set[str] = set()
+    # Compute each task's expected key, and the tile-x sub-prefix it lives under.
+    expected_keys = []
+    shard_prefixes: set[str] = set()
     for task in tasks:
-        if product_owner is not None:
-            p = product_owner
-        else:
-            p = "ci" if task["region"] == "non-pacific" else "dep"
-        prefix_set.add(p)
-
-    # List all STAC items under each prefix in one paginated call
-    existing_keys: set[str] = set()
-    for p in prefix_set:
-        s3_prefix = f"{p}_{sensor}_{dataset_id}/{version}/"
-        paginator = client.get_paginator("list_objects_v2")
-        for page in paginator.paginate(Bucket=bucket, Prefix=s3_prefix):
-            for obj in page.get("Contents", []):
-                key = obj["Key"]
-                if key.endswith(".stac-item.json"):
-                    existing_keys.add(key)
-
-    logger.info(f"Found {len(existing_keys)} existing STAC items in S3.")
-
-    # Check each task against the set
-    remaining = []
-    for task in tasks:
-        tile_index = tuple(map(int, task["id"].split("_")))
-        if product_owner is not None:
-            prefix = product_owner
-        else:
-            prefix = "ci" if task["region"] == "non-pacific" else "dep"
+        x, y = map(int, task["id"].split("_"))
+        prefix = _product_prefix(task["region"], product_owner)
+        expected_keys.append(
+            STAC_KEY_TEMPLATE.format(
+                prefix=prefix,
+                sensor=sensor,
+                dataset_id=dataset_id,
+                version=version,
+                x=x,
+                y=y,
+                year=task["year"],
+            )
+        )
+        shard_prefixes.add(f"{prefix}_{sensor}_{dataset_id}/{version}/{x:03d}/")
 
+    if len(tasks) > 0:
+        # Guard against drift between the template and dep_tools' S3ItemPath.
         itempath = S3ItemPath(
-            prefix=prefix,
+            prefix=_product_prefix(tasks[0]["region"], product_owner),
             bucket=bucket,
             sensor=sensor,
             dataset_id=dataset_id,
             version=version,
-            time=task["year"],
+            time=tasks[0]["year"],
             full_path_prefix=full_path_prefix,
         )
-        stac_key = itempath.stac_path(tile_index, absolute=False)
+        tile_index = tuple(map(int, tasks[0]["id"].split("_")))
+        if itempath.stac_path(tile_index, absolute=False) != expected_keys[0]:
+            raise LdnError(
+                f"STAC key template is out of sync with S3ItemPath: "
+                f"{expected_keys[0]} != {itempath.stac_path(tile_index, absolute=False)}"
+            )
+
+    shards: dict[str, dict] = {}
+    if listing_cache is not None:
+        shards = _read_listing_cache(listing_cache, bucket, listing_cache_ttl)
+
+    missing_prefixes = sorted(shard_prefixes - set(shards))
+    if missing_prefixes:
+        logger.info(
+            f"Listing {len(missing_prefixes)} prefixes with {max_workers} workers."
+        )
+        client = boto3.client("s3")
+        listed_at = time.time()
+        listings = _list_stac_keys_sharded(
+            client, bucket, missing_prefixes, max_workers
+        )
+        # Only the shards listed now get a new timestamp; reused ones keep theirs.
+        shards.update(
+            {
+                s3_prefix: {"created": listed_at, "keys": keys}
+                for s3_prefix, keys in listings.items()
+            }
+        )
+        if listing_cache is not None:
+            _write_listing_cache(listing_cache, bucket, shards)
+
+    existing_keys: set[str] = set()
+    for s3_prefix in shard_prefixes:
+        existing_keys.update(shards[s3_prefix]["keys"])
+
+    logger.info(f"Found {len(existing_keys)} existing STAC items in S3.")
 
-        if stac_key not in existing_keys:
-            remaining.append(task)
+    remaining = [
+        task
+        for task, stac_key in zip(tasks, expected_keys)
+        if stac_key not in existing_keys
+    ]
 
     logger.info(
         f"Filtered: {len(tasks) - len(remaining)} already exist, {len(remaining)} remaining."
@@ -223,51 +454,66 @@ def filter_tasks(
     typer.echo(json.dumps(remaining))
 
 
-@app.command()
-def geomad(
-    tile_id: Annotated[str, typer.Option()],
-    year: Annotated[str, typer.Option()],
-    version: Annotated[str, typer.Option()],
-    region: Annotated[Literal["pacific", "non-pacific"], typer.Option()],
-    product_owner: Annotated[str | None, typer.Option()] = None,
-    bucket: Annotated[str, typer.Option()] = "data.ldn.auspatious.com",
-    overwrite: Annotated[bool, typer.Option()] = False,
-    decimated: Annotated[bool, typer.Option()] = False,
-    include_shadow: Annotated[
-        bool,
-        typer.Option(
-            help="True to mask cloud shadows, false to not mask them (leave them in). Defaults to True."
-        ),
-    ] = True,
-    ls7_buffer_years: Annotated[
-        int,
-        typer.Option(
-            help="Half-width of the temporal buffer for LS7 era (<=2012). E.g. 1 searches year-1 to year+1."
-        ),
-    ] = 1,
-    all_bands: Annotated[bool, typer.Option()] = True,
-    memory_limit: Annotated[str, typer.Option()] = "10GB",
-    n_workers: Annotated[int, typer.Option()] = 2,
-    threads_per_worker: Annotated[int, typer.Option()] = 16,
-    xy_chunk_size: Annotated[int, typer.Option()] = 2048,
-    geomad_threads: Annotated[int, typer.Option()] = 10,
-) -> None:
-    """Run GeoMAD processing on a single tile for a year.
+def _geomad_itempath(
+    region: Literal["pacific", "non-pacific"],
+    year: str,
+    version: str,
+    bucket: str,
+    product_owner: str | None,
+) -> S3ItemPath:
+    """Return the S3ItemPath that a GeoMAD tile-year is written to."""
+    return S3ItemPath(
+        prefix=_product_prefix(region, product_owner),
+        bucket=bucket,
+        sensor="ls",
+        dataset_id="geomad",
+        version=version,
+        time=year,
+        full_path_prefix=_full_path_prefix(bucket),
+    )
+
+
+def _check_subtile_size(subtile_size: int | None, xy_chunk_size: int) -> None:
+    """Raise if windows would split load chunks, which then get read more than once."""
+    if subtile_size is not None and subtile_size % xy_chunk_size != 0:
+        raise LdnError(
+            f"--subtile-size {subtile_size} must be a multiple of --xy-chunk-size {xy_chunk_size}"
+        )
 
-    Searches USGS STAC for Landsat scenes covering the given tile and year,
-    applies cloud masking, computes the geometric median and median absolute
-    deviations (GeoMAD), and writes COG outputs to S3.
+
+def _build_geomad_task(
+    tile_index: tuple[int, int],
+    year: str,
+    region: Literal["pacific", "non-pacific"],
+    geobox,
+    itempath: S3ItemPath,
+    collection_url_root: str,
+    include_shadow: bool,
+    ls7_buffer_years: int,
+    all_bands: bool,
+    xy_chunk_size: int,
+    geomad_threads: int,
+    checkpoint_store: str | None = None,
+    subtile_size: int | None = None,
+    land_buffer: float | None = None,
+) -> Task:
+    """Build the search, load, process and write task for one GeoMAD tile-year.
 
     For years in the Landsat 7 era (<=2012), a buffered temporal window
-    controlled by --ls7-buffer-years is used to gather enough clear
+    controlled by ls7_buffer_years is used to gather enough clear
     observations. Pacific tiles may additionally include Tier 2 data.
-    """
-    logger.info(
-        f"tile={tile_id} year={year} version={version} region={region} overwrite={overwrite} decimated={decimated} "
-        f"all_bands={all_bands} include_shadow={include_shadow} memory={memory_limit} workers={n_workers} threads={threads_per_worker} "
-        f"chunk={xy_chunk_size} geomad_threads={geomad_threads}",
-    )
 
+    If checkpoint_store is set, the GeoMAD is computed in blocks of
+    xy_chunk_size pixels that are saved to that zarr store as they finish,
+    so a rerun after preemption only computes the missing blocks.
+
+    If subtile_size is set, the tile is split into windows of that many pixels
+    that are loaded, masked and reduced one after another, which bounds memory
+    for tiles with very many scenes. Checkpoints are then saved per window.
+
+    If land_buffer is set, only the load chunks within that many metres of GADM
+    land are read, which skips most of the data for island and coastal tiles.
+    """
     year_int = int(year)
     search_year = year
     # If we're in the LS7 era, use a buffered window of data
@@ -275,7 +521,8 @@ def geomad(
         year_start = year_int - ls7_buffer_years
         year_end = year_int + ls7_buffer_years
         search_year = f"{year_start}/{year_end}"
-        typer.echo(
+        # Logged rather than echoed, as geomad-batch prints its results as JSON to stdout.
+        logger.info(
             f"Using {ls7_buffer_years}-year buffered window for LS7 era: {search_year}"
         )
 
@@ -285,65 +532,15 @@ def geomad(
     if region == "pacific":
         if year_int <= 2012:
             # Searching for nothing gives us everything
-            typer.echo("Using both T1 and T2 data for Pacific for LS7 era")
+            logger.info("Using both T1 and T2 data for Pacific for LS7 era")
             search_kwargs = {}
 
-    # Fixed variables
-    sensor = "ls"
-    dataset_id = "geomad"
-
-    # Set up variables and check
-    tile_index = tuple(map(int, tile_id.split("_")))
-
-    grid = get_gridspec(region=region)
-    geobox = grid.tile_geobox(tile_index)
-
-    # TODO: Handle different bucket formats more robustly. For now we support:
-    # "data.ldn.auspatious.com" to "https://data.ldn.auspatious.com"
-    # "dep-public-staging" to "https://dep-public-staging.s3.us-west-2.amazonaws.com"
-    if bucket.startswith("https://"):
-        full_path_prefix = bucket
-    elif "." in bucket:
-        full_path_prefix = f"https://{bucket}"
-    else:
-        full_path_prefix = f"https://{bucket}.s3.us-west-2.amazonaws.com"  # TODO: can the region be dynamic?
-
-    if decimated:
-        typer.echo("Warning, using decimated (low resolution) for testing purposes.")
-        geobox = geobox.zoom_out(10)
-
-    # Configure for dask and reading data
-    _ = configure_s3_access(requester_pays=True)
-    # Configure for checking item existence
-    client = boto3.client("s3")
-
-    if product_owner is not None:
-        prefix = product_owner
-    else:
-        prefix = "ci" if region == "non-pacific" else "dep"
-
-    # Check if we've done this tile before
-    itempath = S3ItemPath(
-        prefix=prefix,
-        bucket=bucket,
-        sensor=sensor,
-        dataset_id=dataset_id,
-        version=version,
-        time=year,
-        full_path_prefix=full_path_prefix,
-    )
-    stac_document = itempath.stac_path(tile_index, absolute=True)
-    stac_key = itempath.stac_path(tile_index, absolute=False)
-
-    # If we don't want to overwrite, and the destination file already exists, skip it
-    if not overwrite and object_exists(bucket, stac_key, client=client):
-        typer.echo(f"Item already exists at {stac_document}, skipping.")
-        return
-    else:
-        if not overwrite:
-            typer.echo(f"Item does not exist at {stac_document}, processing tile.")
-
     load_kwargs = {}
+    loader_class = OdcLoader
+    if land_buffer is not None:
+        # Only read the chunks on or near land, leaving open ocean as nodata.
+        loader_class = LandMaskOdcLoader
+        load_kwargs["land_buffer_m"] = land_buffer
 
     # Searcher finds STAC Items
     searcher = PystacSearcher(
@@ -353,9 +550,8 @@ def geomad(
         **search_kwargs,
     )
 
-    # Loader loads the data from STAC Items.
-    loader = OdcLoader(
-        bands=LANDSAT_BANDS
+    bands = (
+        LANDSAT_BANDS
         if all_bands
         else [
             "red",
@@ -363,7 +559,12 @@ def geomad(
             "blue",
             "qa_pixel",
             "qa_radsat",
-        ],  # Exclude NIR and 2 SWIR bands.
+        ]  # Exclude NIR and 2 SWIR bands.
+    )
+
+    # Loader loads the data from STAC Items.
+    loader = loader_class(
+        bands=bands,
         chunks={"x": xy_chunk_size, "y": xy_chunk_size, "time": 1},
         groupby="solar_day",
         fuse_func={
@@ -378,7 +579,7 @@ def geomad(
 
     # Metadata creator
     stac_creator = StacCreator(
-        collection_url_root=f"{full_path_prefix}/#{prefix}_{sensor}_{dataset_id}/",
+        collection_url_root=collection_url_root,
         itempath=itempath,
         with_raster=True,
     )
@@ -400,6 +601,143 @@ def geomad(
             "filters": [("opening", 3), ("dilation", 5), ("erosion", 2)],
             "include_shadow": include_shadow,
         },
+        checkpoint_store=checkpoint_store,
+        checkpoint_block_size=xy_chunk_size,
+        subtile_size=subtile_size,
+        # Checkpointed blocks are only reused if these match the earlier run.
+        checkpoint_options={
+            "bands": bands,
+            "resolution": geobox.resolution.x,  # Differs when decimated.
+            "search_year": search_year,
+            "search_kwargs": search_kwargs,
+            "land_buffer": land_buffer,
+        },
+    )
+
+    return Task(
+        itempath=itempath,
+        id=tile_index,  # TODO: Check this type
+        area=geobox,
+        searcher=searcher,
+        loader=loader,
+        processor=processor,
+        writer=writer,
+        stac_creator=stac_creator,
+    )
+
+
+@app.command()
+def geomad(
+    tile_id: Annotated[str, typer.Option()],
+    year: Annotated[str, typer.Option()],
+    version: Annotated[str, typer.Option()],
+    region: Annotated[Literal["pacific", "non-pacific"], typer.Option()],
+    product_owner: Annotated[str | None, typer.Option()] = None,
+    bucket: Annotated[str, typer.Option()] = "data.ldn.auspatious.com",
+    overwrite: Annotated[bool, typer.Option()] = False,
+    decimated: Annotated[bool, typer.Option()] = False,
+    include_shadow: Annotated[
+        bool,
+        typer.Option(
+            help="True to mask cloud shadows, false to not mask them (leave them in). Defaults to True."
+        ),
+    ] = True,
+    ls7_buffer_years: Annotated[
+        int,
+        typer.Option(
+            help="Half-width of the temporal buffer for LS7 era (<=2012). E.g. 1 searches year-1 to year+1."
+        ),
+    ] = 1,
+    all_bands: Annotated[bool, typer.Option()] = True,
+    memory_limit: Annotated[str, typer.Option()] = "10GB",
+    n_workers: Annotated[int, typer.Option()] = 2,
+    threads_per_worker: Annotated[int, typer.Option()] = 16,
+    xy_chunk_size: Annotated[int, typer.Option()] = 2048,
+    geomad_threads: Annotated[int, typer.Option()] = 10,
+    checkpoint_root: Annotated[
+        str | None,
+        typer.Option(
+            help="Local directory or s3:// prefix for scratch zarr checkpoints of finished blocks. A rerun of the same tile, year and version resumes from them."
+        ),
+    ] = None,
+    subtile_size: Annotated[
+        int | None,
+        typer.Option(
+            help="Process the tile as independent windows of this many pixels (a multiple of --xy-chunk-size), to bound memory for tiles with very many scenes."
+        ),
+    ] = None,
+    land_buffer: Annotated[
+        float | None,
+        typer.Option(
+            help="Only read load chunks within this many metres of GADM land, e.g. 2000. Reads everything if not set."
+        ),
+    ] = None,
+) -> None:
+    """Run GeoMAD processing on a single tile for a year.
+
+    Searches USGS STAC for Landsat scenes covering the given tile and year,
+    applies cloud masking, computes the geometric median and median absolute
+    deviations (GeoMAD), and writes COG outputs to S3.
+
+    For years in the Landsat 7 era (<=2012), a buffered temporal window
+    controlled by --ls7-buffer-years is used to gather enough clear
+    observations. Pacific tiles may additionally include Tier 2 data.
+    """
+    logger.info(
+        f"tile={tile_id} year={year} version={version} region={region} overwrite={overwrite} decimated={decimated} "
+        f"all_bands={all_bands} include_shadow={include_shadow} memory={memory_limit} workers={n_workers} threads={threads_per_worker} "
+        f"chunk={xy_chunk_size} geomad_threads={geomad_threads} subtile={subtile_size} land_buffer={land_buffer}",
+    )
+
+    # Set up variables and check
+    _check_subtile_size(subtile_size, xy_chunk_size)
+    tile_index = tuple(map(int, tile_id.split("_")))
+
+    geobox = get_tile_geobox(region, tile_index)
+
+    if decimated:
+        typer.echo("Warning, using decimated (low resolution) for testing purposes.")
+        geobox = geobox.zoom_out(10)
+
+    # Configure for dask and reading data
+    _ = configure_s3_access(requester_pays=True)
+    # Configure for checking item existence
+    client = boto3.client("s3")
+
+    # Check if we've done this tile before
+    itempath = _geomad_itempath(region, year, version, bucket, product_owner)
+    stac_document = itempath.stac_path(tile_index, absolute=True)
+    stac_key = itempath.stac_path(tile_index, absolute=False)
+
+    # If we don't want to overwrite, and the destination file already exists, skip it
+    if not overwrite and object_exists(bucket, stac_key, client=client):
+        typer.echo(f"Item already exists at {stac_document}, skipping.")
+        return
+    else:
+        if not overwrite:
+            typer.echo(f"Item does not exist at {stac_document}, processing tile.")
+
+    checkpoint_store = (
+        checkpoint_path(checkpoint_root, region, version, tile_id, year)
+        if checkpoint_root
+        else None
+    )
+
+    task = _build_geomad_task(
+        tile_index=tile_index,
+        year=year,
+        region=region,
+        geobox=geobox,
+        itempath=itempath,
+        collection_url_root=f"{_full_path_prefix(bucket)}/#{_product_prefix(region, product_owner)}_ls_geomad/",
+        include_shadow=include_shadow,
+        ls7_buffer_years=ls7_buffer_years,
+        all_bands=all_bands,
+        xy_chunk_size=xy_chunk_size,
+        geomad_threads=geomad_threads,
+        checkpoint_store=checkpoint_store,
+        subtile_size=subtile_size,
+        land_buffer=land_buffer,
     )
 
     try:
@@ -408,16 +746,7 @@ def geomad(
             threads_per_worker=threads_per_worker,
             memory_limit=memory_limit,
         ):
-            paths = Task(
-                itempath=itempath,
-                id=tile_index,  # TODO: Check this type
-                area=geobox,
-                searcher=searcher,
-                loader=loader,
-                processor=processor,
-                writer=writer,
-                stac_creator=stac_creator,
-            ).run()
+            paths = task.run()
             typer.echo(f"Wrote {len(paths)} files...")
     except EmptyCollectionError:
         typer.echo("No items found for this tile")
@@ -426,11 +755,157 @@ def geomad(
         typer.echo(f"Failed to process with error: {e}")
         raise LdnError("Failed to process tile") from e
 
+    if checkpoint_store is not None:
+        delete_checkpoint(checkpoint_store)
+
     typer.echo(f"Finished writing to {stac_document}")
 
     return
 
 
+def _flatten_tasks(tasks: list[dict]) -> list[dict]:
+    """Flatten print-tasks output, which may be a list of tasks or a list of batches of tasks."""
+    flat = []
+    for task in tasks:
+        if "tasks" in task:
+            flat.extend(task["tasks"])
+        else:
+            flat.append(task)
+    return flat
+
+
+@app.command()
+def geomad_batch(
+    tasks_json: Annotated[
+        str,
+        typer.Option(
+            help="JSON string of tasks (or batches of tasks) as emitted by print-tasks."
+        ),
+    ],
+    version: Annotated[str, typer.Option()],
+    product_owner: Annotated[str | None, typer.Option()] = None,
+    bucket: Annotated[str, typer.Option()] = "data.ldn.auspatious.com",
+    overwrite: Annotated[bool, typer.Option()] = False,
+    decimated: Annotated[bool, typer.Option()] = False,
+    include_shadow: Annotated[bool, typer.Option()] = True,
+    ls7_buffer_years: Annotated[int, typer.Option()] = 1,
+    all_bands: Annotated[bool, typer.Option()] = True,
+    memory_limit: Annotated[str, typer.Option()] = "10GB",
+    n_workers: Annotated[int, typer.Option()] = 2,
+    threads_per_worker: Annotated[int, typer.Option()] = 16,
+    xy_chunk_size: Annotated[int, typer.Option()] = 2048,
+    geomad_threads: Annotated[int, typer.Option()] = 10,
+    max_concurrent_tiles: Annotated[
+        int,
+        typer.Option(help="Maximum number of tile-years processed at the same time."),
+    ] = 2,
+    checkpoint_root: Annotated[
+        str | None,
+        typer.Option(
+            help="Local directory or s3:// prefix for scratch zarr checkpoints of finished blocks."
+        ),
+    ] = None,
+    subtile_size: Annotated[
+        int | None,
+        typer.Option(
+            help="Process each tile as independent windows of this many pixels."
+        ),
+    ] = None,
+    land_buffer: Annotated[
+        float | None,
+        typer.Option(help="Only read load chunks within this many metres of land."),
+    ] = None,
+) -> None:
+    """Run GeoMAD processing for many tile-years in one process.
+
+    Takes the same task list that print-tasks emits and reuses the Dask
+    cluster, S3 configuration, S3 client and grids across all tasks,
+    which avoids per-task setup for small tiles. Each task is isolated:
+    a failure is recorded in the per-task results (printed as JSON) and
+    the remaining tasks still run. Exits with an error if any task failed.
+    """
+    _check_subtile_size(subtile_size, xy_chunk_size)
+    tasks = _flatten_tasks(json.loads(tasks_json))
+    logger.info(
+        f"Running {len(tasks)} GeoMAD tasks with up to {max_concurrent_tiles} at a time."
+    )
+
+    # Shared across every task
+    _ = configure_s3_access(requester_pays=True)
+    client = boto3.client("s3")
+    grids = {
+        region: get_gridspec(region=region) for region in {t["region"] for t in tasks}
+    }
+
+    def run_one(task: dict) -> dict:
+        result = {"id": task["id"], "year": task["year"], "region": task["region"]}
+        try:
+            tile_index = tuple(map(int, task["id"].split("_")))
+            geobox = grids[task["region"]].tile_geobox(tile_index)
+            if decimated:
+                geobox = geobox.zoom_out(10)
+
+            itempath = _geomad_itempath(
+                task["region"], task["year"], version, bucket, product_owner
+            )
+            stac_key = itempath.stac_path(tile_index, absolute=False)
+            if not overwrite and object_exists(bucket, stac_key, client=client):
+                return {**result, "status": "skipped"}
+
+            checkpoint_store = (
+                checkpoint_path(
+                    checkpoint_root, task["region"], version, task["id"], task["year"]
+                )
+                if checkpoint_root
+                else None
+            )
+            paths = _build_geomad_task(
+                tile_index=tile_index,
+                year=task["year"],
+                region=task["region"],
+                geobox=geobox,
+                itempath=itempath,
+                collection_url_root=f"{_full_path_prefix(bucket)}/#{_product_prefix(task['region'], product_owner)}_ls_geomad/",
+                include_shadow=include_shadow,
+                ls7_buffer_years=ls7_buffer_years,
+                all_bands=all_bands,
+                xy_chunk_size=xy_chunk_size,
+                geomad_threads=geomad_threads,
+                checkpoint_store=checkpoint_store,
+                subtile_size=subtile_size,
+                land_buffer=land_buffer,
+            ).run()
+            if checkpoint_store is not None:
+                delete_checkpoint(checkpoint_store)
+            return {**result, "status": "succeeded", "n_files": len(paths)}
+        except EmptyCollectionError:
+            return {
+                **result,
+                "status": "failed",
+                "error": "No items found for this tile",
+            }
+        except Exception as e:
+            logger.exception(f"Task {task['id']} {task['year']} failed: {e}")
+            return {**result, "status": "failed", "error": str(e)}
+
+    with DaskClient(
+        n_workers=n_workers,
+        threads_per_worker=threads_per_worker,
+        memory_limit=memory_limit,
+    ):
+        with ThreadPoolExecutor(max_workers=max_concurrent_tiles) as executor:
+            results = list(executor.map(run_one, tasks))
+
+    typer.echo(json.dumps(results, indent=2))
+
+    failed = [r for r in results if r["status"] == "failed"]
+    logger.info(
+        f"Finished {len(results)} tasks: {len(results) - len(failed)} succeeded or skipped, {len(failed)} failed."
+    )
+    if failed:
+        raise LdnError(f"{len(failed)} of {len(results)} tasks failed.")
+
+
 def _find_stac_items_s3(
     bucket: str,
     prefix: str,
@@ -543,44 +1018,175 @@ def _stac_self_link(feature: dict) -> str:
     return self_link
 
 
-def _build_mosaic_for_year(year: str, stac_geoparquet_url: str) -> MosaicJSON:
-    """Read STAC-Geoparquet, filter by year, build mosaic.json."""
-
-    logger.info(f"Building mosaic for year {year}")
-    search_year = year
+def _search_year_range(year: str) -> tuple[int, int]:
+    """Return the (start, end) years to search the index for a given mosaic year."""
     int_year = int(year)
     # If we're in the LS7 era, use a buffered window of data
     if int_year <= 2012:
-        logging.info(
-            "GeoMAD used a year of data on either side to create the annual product so we need to search for +- 1 year."
-        )
-        search_year = f"{int_year - 1}/{int_year + 1}"
+        return int_year - 1, int_year + 1
+    return int_year, int_year
 
-    item_collection = search_sync(stac_geoparquet_url, datetime=search_year)
 
-    items = ItemCollection(item_collection)
-    features = [f.to_dict() for f in items]
+def _feature_overlaps_years(feature: dict, start_year: int, end_year: int) -> bool:
+    """Check if a STAC item's temporal extent overlaps whole years start_year to end_year.
 
-    if not features:
-        raise LdnError(f"No STAC items found for year {year}")
+    Mirrors the datetime filter of a STAC search, so partitioning items in
+    memory gives the same result as searching the index once per year.
+    """
+    props = feature.get("properties", {})
+    item_start = props.get("start_datetime") or props.get("datetime")
+    item_end = props.get("end_datetime") or props.get("datetime")
+    if item_start is None or item_end is None:
+        return False
+    return int(item_start[:4]) <= end_year and int(item_end[:4]) >= start_year
 
-    logger.info(f"  {len(features)} features found")
 
+def _polygon_features(features: list[dict]) -> list[dict]:
+    """Return features with non-Polygon geometries replaced by their convex hull."""
     # cogeo-mosaic requires Polygon geometries
+    polygon_features = []
     for feat in features:
         geom = shape(feat["geometry"])
         if geom.geom_type != "Polygon":
-            geom = geom.convex_hull
-        feat["geometry"] = mapping(geom)
-
-    mosaic = MosaicJSON.from_features(
-        features,
-        minzoom=5,
-        maxzoom=14,
+            feat = {**feat, "geometry": mapping(geom.convex_hull)}
+        polygon_features.append(feat)
+    return polygon_features
+
+
+def _mosaic_from_features(
+    features: list[dict], minzoom: int = 5, maxzoom: int = 14
+) -> MosaicJSON:
+    """Build a mosaic.json from STAC item dicts."""
+    return MosaicJSON.from_features(
+        _polygon_features(features),
+        minzoom=minzoom,
+        maxzoom=maxzoom,
         accessor=_stac_self_link,
     )
 
-    return mosaic
+
+def _load_features_by_year(
+    years: list[str], stac_geoparquet_url: str
+) -> dict[str, list[dict]]:
+    """Read the STAC-Geoparquet index once and partition its items by mosaic year.
+
+    Args:
+        years: Mosaic years to partition items into.
+        stac_geoparquet_url: URL of the STAC-Geoparquet index.
+
+    Returns:
+        Mapping of each year to the STAC item dicts for its mosaic.
+    """
+    ranges = {year: _search_year_range(year) for year in years}
+    search_start = min(start for start, _ in ranges.values())
+    search_end = max(end for _, end in ranges.values())
+
+    logger.info(f"Reading index {stac_geoparquet_url} for {search_start}-{search_end}")
+    features = search_sync(stac_geoparquet_url, datetime=f"{search_start}/{search_end}")
+    logger.info(f"  {len(features)} features read")
+
+    features_by_year = {}
+    for year, (start_year, end_year) in ranges.items():
+        year_features = [
+            f for f in features if _feature_overlaps_years(f, start_year, end_year)
+        ]
+        if not year_features:
+            raise LdnError(f"No STAC items found for year {year}")
+        features_by_year[year] = year_features
+
+    return features_by_year
+
+
+def _update_mosaic(features: list[dict], out_path: str) -> bool:
+    """Insert only the items that an existing mosaic.json doesn't reference yet.
+
+    Reprocessed tiles keep the same STAC item href, and the viewer reads
+    the item at request time, so they are picked up without touching the
+    mosaic. Only tiles that are new to the index need inserting.
+
+    Args:
+        features: STAC item dicts for the mosaic year, from the index.
+        out_path: Path of the existing mosaic.json.
+
+    Returns:
+        True if the mosaic was updated in place (or is already up to date),
+        False if it must be rebuilt (it is missing, or items were removed from the index).
+    """
+    try:
+        mosaic = MosaicBackend(out_path)
+    except MosaicNotFoundError:
+        logger.info(f"  No existing mosaic at {out_path}, building from scratch.")
+        return False
+
+    with mosaic as m:
+        referenced = {href for hrefs in m.mosaic_def.tiles.values() for href in hrefs}
+        indexed = {_stac_self_link(f): f for f in features}
+
+        removed = referenced - set(indexed)
+        if removed:
+            logger.info(
+                f"  {len(removed)} items in {out_path} are no longer indexed, rebuilding."
+            )
+            return False
+
+        new_features = [f for href, f in indexed.items() if href not in referenced]
+        if not new_features:
+            logger.info(f"  {out_path} is up to date.")
+            return True
+
+        logger.info(f"  Inserting {len(new_features)} new items into {out_path}")
+        # update() also writes the mosaic.
+        m.update(
+            _polygon_features(new_features),
+            add_first=True,
+            quiet=True,
+            accessor=_stac_self_link,
+        )
+    return True
+
+
+def _write_mosaic(features: list[dict], out_path: str, update: bool = False) -> str:
+    """Build a mosaic.json from STAC item dicts and write it. Runs in a worker process.
+
+    If update is True, an existing mosaic is updated with new items instead of rebuilt.
+    """
+    if update and _update_mosaic(features, out_path):
+        return out_path
+
+    mosaic = _mosaic_from_features(features)
+    with MosaicBackend(out_path, mosaic_def=mosaic) as m:
+        m.write(overwrite=True)
+    return out_path
+
+
+def _parse_mosaic_years(years: str) -> list[str]:
+    """Parse a comma-separated list (e.g. '2020,2021') or range (e.g. '2020-2025') of years."""
+    if "-" in years:
+        start_year, end_year = map(int, years.split("-"))
+        years_list = [str(y) for y in range(start_year, end_year + 1)]
+    else:
+        years_list = [y.strip() for y in years.split(",")]
+
+    if any(int(y) < 2000 for y in years_list) or any(int(y) > 2025 for y in years_list):
+        raise LdnError("Years must be between 2000 and 2025 inclusive.")
+    return years_list
+
+
+def _mosaic_dir(dataset: str, version: str) -> str:
+    """S3 directory holding a dataset's per-year mosaics. MosaicBackend needs s3:// style paths."""
+    product = "ausp_ls_geomad" if dataset == "geomad" else "ausp_ls_lulc_prediction"
+    return f"s3://data.ldn.auspatious.com/{product}/{version}/mosaics/"
+
+
+def _overview_dir(dataset: str, version: str) -> str:
+    """S3 directory holding a dataset's per-year overview COGs, items and mosaics."""
+    return _mosaic_dir(dataset, version).replace("/mosaics/", "/overviews/")
+
+
+def _stac_geoparquet_url(dataset: str, version: str) -> str:
+    """Public URL of a dataset's STAC-Geoparquet index."""
+    product = "ausp_ls_geomad" if dataset == "geomad" else "ausp_ls_lulc_prediction"
+    return f"https://s3.us-west-2.amazonaws.com/data.ldn.auspatious.com/{product}/{version}/{product}.parquet"
 
 
 # TODO: Make bucket and prefix variables.
@@ -610,31 +1216,33 @@ def make_mosaics(
             help=f"Version string to use for the Prediction mosaic files, e.g. '{PREDICTION_VERSION}'."
         ),
     ] = PREDICTION_VERSION,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            help="Number of processes building and writing mosaics concurrently. 1 builds them in this process."
+        ),
+    ] = 4,
+    update: Annotated[
+        bool,
+        typer.Option(
+            help="Insert only new tiles into existing mosaics instead of rebuilding them."
+        ),
+    ] = False,
 ) -> None:
     """Make mosaic.jsons per year for GeoMedian and Prediction results from their respective STAC-Geoparquet files."""
 
     logger.info(f"Making mosaics for dataset '{dataset}' and years: {years}")
-    if "-" in years:
-        start_year, end_year = map(int, years.split("-"))
-        years_list = [str(y) for y in range(start_year, end_year + 1)]
-    else:
-        years_list = [y.strip() for y in years.split(",")]
+    years_list = _parse_mosaic_years(years)
 
-    if any(int(y) < 2000 for y in years_list) or any(int(y) > 2025 for y in years_list):
-        raise LdnError("Years must be between 2000 and 2025 inclusive.")
-
-    # MosaicBackend needs s3:// style paths.
-    output_path_geomad = (
-        f"s3://data.ldn.auspatious.com/ausp_ls_geomad/{version_geomad}/mosaics/"
-    )
-    output_path_prediction = f"s3://data.ldn.auspatious.com/ausp_ls_lulc_prediction/{version_prediction}/mosaics/"
+    output_path_geomad = _mosaic_dir("geomad", version_geomad)
+    output_path_prediction = _mosaic_dir("prediction", version_prediction)
 
     datasets = []
     if dataset in ["prediction", "all"]:
         datasets.append(
             (
                 "prediction",
-                f"https://s3.us-west-2.amazonaws.com/data.ldn.auspatious.com/ausp_ls_lulc_prediction/{version_prediction}/ausp_ls_lulc_prediction.parquet",
+                _stac_geoparquet_url("prediction", version_prediction),
                 output_path_prediction,
             )
         )
@@ -642,23 +1250,398 @@ def make_mosaics(
         datasets.append(
             (
                 "geomad",
-                f"https://s3.us-west-2.amazonaws.com/data.ldn.auspatious.com/ausp_ls_geomad/{version_geomad}/ausp_ls_geomad.parquet",
+                _stac_geoparquet_url("geomad", version_geomad),
                 output_path_geomad,
             )
         )
 
-    # Build mosaics for all years in the dataset
+    # Read each index once, then build and write every year's mosaic concurrently.
+    jobs = []
     for dataset_name, stac_geoparquet_url, output_path in datasets:
-        logger.info(f"Building mosaics for '{dataset_name}' dataset.")
+        logger.info(f"Reading index for '{dataset_name}' dataset.")
+        features_by_year = _load_features_by_year(years_list, stac_geoparquet_url)
+        for _year, features in features_by_year.items():
+            logger.info(f"  {_year}: {len(features)} features")
+            jobs.append((features, f"{output_path}{dataset_name}_{_year}_mosaic.json"))
+
+    write = partial(_write_mosaic, update=update)
+    if max_workers == 1:
+        written = [write(features, out_path) for features, out_path in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            written = list(executor.map(write, *zip(*jobs)))
+
+    for out_path in written:
+        logger.info(f"  Written to {out_path}")
+
+    logger.info("Finished writing mosaics.")
+
+
+@app.command()
+def make_overviews(
+    years: Annotated[
+        str,
+        typer.Option(
+            help="Either a comma-separated list of years (e.g. '2020,2021') or a range of years (e.g. '2020-2025') to build overviews for."
+        ),
+    ],
+    dataset: Annotated[
+        Literal["all", "geomad", "prediction"],
+        typer.Option(
+            help="Which dataset to build overviews for, either 'all', 'geomad' or 'prediction'."
+        ),
+    ],
+    version_geomad: Annotated[
+        str,
+        typer.Option(help=f"Version of the GeoMAD product, e.g. '{GEOMAD_VERSION}'."),
+    ] = GEOMAD_VERSION,
+    version_prediction: Annotated[
+        str,
+        typer.Option(
+            help=f"Version of the Prediction product, e.g. '{PREDICTION_VERSION}'."
+        ),
+    ] = PREDICTION_VERSION,
+    resolution: Annotated[
+        float,
+        typer.Option(
+            help="Overview pixel size in metres. Must divide the 96 km tile size."
+        ),
+    ] = OVERVIEW_RESOLUTION,
+    max_workers: Annotated[
+        int,
+        typer.Option(help="Number of processes building overview COGs concurrently."),
+    ] = 4,
+) -> None:
+    """Build low resolution, per-year, per-region overview COGs and mosaics from the tile outputs.
+
+    Class maps are resampled with mode and everything else with average. The
+    viewer reads these overview mosaics at low zoom levels instead of opening
+    every tile COG. Run after the tiles are indexed with index-to-stac-geoparquet.
+    """
+    years_list = _parse_mosaic_years(years)
+    versions = {"geomad": version_geomad, "prediction": version_prediction}
+    dataset_names = ["prediction", "geomad"] if dataset == "all" else [dataset]
+    url_prefix = _full_path_prefix("data.ldn.auspatious.com")
+
+    # One job per dataset, year, region (grid CRS) and asset.
+    jobs = []
+    for dataset_name in dataset_names:
+        version = versions[dataset_name]
+        out_dir = _overview_dir(dataset_name, version)
+        features_by_year = _load_features_by_year(
+            years_list, _stac_geoparquet_url(dataset_name, version)
+        )
+        for _year, features in features_by_year.items():
+            # Mosaics of the LS7 era include neighbouring years' items, overviews only the year's own.
+            features = [f for f in features if product_year(f) == int(_year)]
+            by_crs: dict[str, list[dict]] = {}
+            for feature in features:
+                by_crs.setdefault(feature_crs(feature), []).append(feature)
+            for crs, crs_features in by_crs.items():
+                epsg = crs.split(":")[-1]
+                for asset in cog_assets(crs_features):
+                    hrefs = [
+                        f["assets"][asset]["href"]
+                        for f in crs_features
+                        if asset in f["assets"]
+                    ]
+                    out_path = f"{out_dir}{_year}/{dataset_name}_overview_{_year}_{epsg}_{asset}.tif"
+                    jobs.append((dataset_name, _year, epsg, asset, hrefs, out_path))
+
+    logger.info(f"Building {len(jobs)} overview COGs.")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        footprints = list(
+            executor.map(
+                build_overview_cog,
+                [hrefs for *_, hrefs, _ in jobs],
+                [out_path for *_, out_path in jobs],
+                [overview_resampling(asset) for _, _, _, asset, _, _ in jobs],
+                [resolution] * len(jobs),
+            )
+        )
+
+    # One STAC item per dataset, year and region, and one overview mosaic per dataset and year.
+    regions: dict[tuple[str, str, str], tuple[dict, dict[str, str]]] = {}
+    for (dataset_name, _year, epsg, asset, _, out_path), footprint in zip(
+        jobs, footprints
+    ):
+        _, assets = regions.setdefault((dataset_name, _year, epsg), (footprint, {}))
+        assets[asset] = out_path.replace("s3://data.ldn.auspatious.com", url_prefix)
+
+    mosaic_items: dict[tuple[str, str], list[dict]] = {}
+    for (dataset_name, _year, epsg), (footprint, assets) in regions.items():
+        item_id = f"{dataset_name}_overview_{_year}_{epsg}"
+        item_path = f"{_overview_dir(dataset_name, versions[dataset_name])}{_year}/{item_id}.stac-item.json"
+        item = overview_item(
+            item_id,
+            _year,
+            assets,
+            footprint,
+            item_path.replace("s3://data.ldn.auspatious.com", url_prefix),
+        )
+        write_json(item, item_path)
+        mosaic_items.setdefault((dataset_name, _year), []).append(item)
+
+    for (dataset_name, _year), year_items in mosaic_items.items():
+        out_path = f"{_overview_dir(dataset_name, versions[dataset_name])}{dataset_name}_{_year}_overview_mosaic.json"
+        mosaic = _mosaic_from_features(year_items, minzoom=0, maxzoom=OVERVIEW_MAX_ZOOM)
+        with MosaicBackend(out_path, mosaic_def=mosaic) as m:
+            m.write(overwrite=True)
+        logger.info(f"  Written to {out_path}")
+
+    logger.info("Finished writing overviews.")
+
+
+# Default viewer layers for each dataset, matching LAYERS in visualisation/static/index.html.
+SEED_TILE_QUERIES = {
+    "prediction": ["assets=classification&colormap_name=lulc"],
+    "geomad": [
+        "assets=red&assets=green&assets=blue"
+        "&rescale=7200,12000&rescale=7200,12000&rescale=7200,12000"
+    ],
+}
+
+
+def _seed_tiles_for_mosaic(
+    mosaic_path: str, min_zoom: int, max_zoom: int
+) -> list[tuple[int, int, int]]:
+    """List the web mercator tiles in a zoom range that contain at least one mosaic asset."""
+    with MosaicBackend(mosaic_path) as mosaic:
+        return [
+            (tile.x, tile.y, tile.z)
+            for tile in mosaic.tms.tiles(
+                *mosaic.bounds, zooms=range(min_zoom, max_zoom + 1)
+            )
+            if mosaic.assets_for_tile(tile.x, tile.y, tile.z)
+        ]
+
+
+@app.command()
+def seed_tile_cache(
+    viewer_url: Annotated[
+        str,
+        typer.Option(
+            help="Base URL of the deployed viewer, e.g. 'https://viewer.example.com'."
+        ),
+    ],
+    years: Annotated[
+        str,
+        typer.Option(
+            help="Either a comma-separated list of years (e.g. '2020,2021') or a range of years (e.g. '2020-2025') to seed."
+        ),
+    ],
+    dataset: Annotated[
+        Literal["all", "geomad", "prediction"],
+        typer.Option(
+            help="Which dataset to seed, either 'all', 'geomad' or 'prediction'."
+        ),
+    ],
+    min_zoom: Annotated[int, typer.Option(help="Lowest zoom level to seed.")] = 5,
+    max_zoom: Annotated[int, typer.Option(help="Highest zoom level to seed.")] = 9,
+    query: Annotated[
+        list[str] | None,
+        typer.Option(
+            help="Tile query string(s) to seed, e.g. 'assets=classification&colormap_name=lulc'. "
+            "Defaults to the viewer's default layer for each dataset."
+        ),
+    ] = None,
+    version_geomad: Annotated[
+        str,
+        typer.Option(
+            help="Version of the GeoMAD mosaics, which must match the viewer's."
+        ),
+    ] = GEOMAD_VERSION,
+    version_prediction: Annotated[
+        str,
+        typer.Option(
+            help="Version of the Prediction mosaics, which must match the viewer's."
+        ),
+    ] = PREDICTION_VERSION,
+    max_workers: Annotated[
+        int, typer.Option(help="Number of concurrent tile requests.")
+    ] = 16,
+) -> None:
+    """Pre-render low zoom tiles through the viewer so they are in its tile cache.
+
+    Run after make-mosaics. Only tiles that contain mosaic assets are requested.
+    """
+    if min_zoom > max_zoom:
+        raise LdnError("min-zoom must not be greater than max-zoom.")
+    years_list = _parse_mosaic_years(years)
+    versions = {"geomad": version_geomad, "prediction": version_prediction}
+    dataset_names = ["prediction", "geomad"] if dataset == "all" else [dataset]
+    tiles_url = f"{viewer_url.rstrip('/')}/mosaic/tiles/WebMercatorQuad"
+
+    urls = []
+    for dataset_name in dataset_names:
+        queries = query or SEED_TILE_QUERIES[dataset_name]
         for _year in years_list:
-            mosaic = _build_mosaic_for_year(_year, stac_geoparquet_url)
-            logger.info(f"  {_year} built successfully.")
-            # Write to S3.
-            out_path = f"{output_path}{dataset_name}_{_year}_mosaic.json"
+            mosaic_path = f"{_mosaic_dir(dataset_name, versions[dataset_name])}{dataset_name}_{_year}_mosaic.json"
+            tiles = _seed_tiles_for_mosaic(mosaic_path, min_zoom, max_zoom)
+            logger.info(f"Seeding {len(tiles)} tiles for '{dataset_name}' {_year}.")
+            urls.extend(
+                f"{tiles_url}/{z}/{x}/{y}.png?dataset={dataset_name}&year={_year}&{q}"
+                for x, y, z in tiles
+                for q in queries
+            )
 
-            with MosaicBackend(out_path, mosaic_def=mosaic) as m:
-                m.write(overwrite=True)
+    def fetch_tile(url: str) -> int | str:
+        try:
+            return requests.get(url, timeout=120).status_code
+        except requests.RequestException as e:
+            return str(e)
 
-            logger.info(f"  {_year} written to {out_path}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        statuses = list(executor.map(fetch_tile, urls))
 
-    logger.info("Finished writing mosaics.")
+    # 404s are tiles with assets but no valid pixels, which the viewer never caches.
+    failed = [(url, s) for url, s in zip(urls, statuses) if s not in (200, 404)]
+    for url, status in failed[:10]:
+        logger.warning(f"Failed to seed {url}: {status}")
+    logger.info(f"Seeded {len(urls) - len(failed)} of {len(urls)} tiles.")
+    if failed:
+        raise LdnError(f"{len(failed)} of {len(urls)} tiles failed to seed.")
+
+
+@app.command()
+def timeseries(
+    dataset: Annotated[
+        Literal["geomad", "prediction"],
+        typer.Option(help="Which dataset to query, either 'geomad' or 'prediction'."),
+    ],
+    lon: Annotated[
+        float | None, typer.Option(help="Longitude of a point to query.")
+    ] = None,
+    lat: Annotated[
+        float | None, typer.Option(help="Latitude of a point to query.")
+    ] = None,
+    geojson: Annotated[
+        Path | None,
+        typer.Option(
+            help="GeoJSON file with a Polygon (or a Feature of one) to summarise, instead of a point."
+        ),
+    ] = None,
+    assets: Annotated[
+        str | None,
+        typer.Option(
+            help="Comma-separated assets to read, e.g. 'classification'. Defaults to the dataset's main assets."
+        ),
+    ] = None,
+    years: Annotated[
+        str,
+        typer.Option(
+            help="Either a comma-separated list of years (e.g. '2020,2021') or a range of years (e.g. '2020-2025')."
+        ),
+    ] = "2000-2025",
+    version: Annotated[
+        str | None,
+        typer.Option(
+            help=f"Product version. Defaults to '{GEOMAD_VERSION}' for GeoMAD and '{PREDICTION_VERSION}' for Prediction."
+        ),
+    ] = None,
+    max_workers: Annotated[
+        int, typer.Option(help="Number of years read concurrently.")
+    ] = 16,
+) -> None:
+    """Print the per-year values of a point, or summaries of an area, as JSON.
+
+    For a point, each year has the pixel value of each asset. For an area, each year
+    has pixel counts per class for class maps, and the mean for other assets.
+    """
+    if geojson is not None:
+        geometry = json.loads(geojson.read_text())
+        geometry = geometry.get("geometry", geometry)
+    elif lon is not None and lat is not None:
+        geometry = {"type": "Point", "coordinates": [lon, lat]}
+    else:
+        raise LdnError("Either --lon and --lat, or --geojson, must be given.")
+
+    if version is None:
+        version = GEOMAD_VERSION if dataset == "geomad" else PREDICTION_VERSION
+    asset_list = (
+        [a.strip() for a in assets.split(",")]
+        if assets
+        else DEFAULT_TIMESERIES_ASSETS[dataset]
+    )
+
+    series = query_timeseries(
+        geometry,
+        _stac_geoparquet_url(dataset, version),
+        _parse_mosaic_years(years),
+        asset_list,
+        max_workers=max_workers,
+    )
+    typer.echo(json.dumps(series))
+
+
+@app.command()
+def zonal_stats(
+    output_dir: Annotated[
+        Path,
+        typer.Option(help="Directory to write class_areas.csv and transitions.csv to."),
+    ],
+    years: Annotated[
+        str,
+        typer.Option(
+            help="Either a comma-separated list of years (e.g. '2020,2021') or a range of years (e.g. '2020-2025')."
+        ),
+    ] = "2000-2025",
+    countries: Annotated[
+        str | None,
+        typer.Option(
+            help="Comma-separated ISO3 country codes (e.g. 'FJI,TON'). Defaults to all countries."
+        ),
+    ] = None,
+    version: Annotated[
+        str,
+        typer.Option(help=f"Prediction version, e.g. '{PREDICTION_VERSION}'."),
+    ] = PREDICTION_VERSION,
+    max_workers: Annotated[
+        int, typer.Option(help="Number of tiles processed concurrently.")
+    ] = 4,
+    zone_cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            help="Directory to cache each tile's rasterised countries in, for reruns."
+        ),
+    ] = None,
+) -> None:
+    """Compute class areas and year-to-year transition areas per country from the predictions.
+
+    Tiles are processed independently in a process pool and their counts merged,
+    so memory stays at a few tiles regardless of the number of countries or years.
+    """
+    years_list = _parse_mosaic_years(years)
+    if countries is None:
+        country_codes = ALL_COUNTRIES
+    else:
+        codes = {c.strip() for c in countries.split(",")}
+        country_codes = {n: c for n, c in ALL_COUNTRIES.items() if c in codes}
+        unknown = codes - set(country_codes.values())
+        if unknown:
+            raise LdnError(f"Unknown country codes: {sorted(unknown)}")
+
+    gadm = get_gadm(countries=country_codes).to_crs("EPSG:4326")
+    features_by_year = _load_features_by_year(
+        years_list, _stac_geoparquet_url("prediction", version)
+    )
+    jobs = tile_jobs(features_by_year, gadm)
+    if not jobs:
+        raise LdnError("No prediction tiles overlap the requested countries.")
+    logger.info(f"Computing zonal stats for {len(jobs)} tiles.")
+
+    total = {"classes": {}, "transitions": {}}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            partial(tile_zonal_stats, cache_dir=zone_cache_dir), *zip(*jobs)
+        )
+        for i, result in enumerate(results, start=1):
+            merge_zonal_stats(total, result)
+            if i % 50 == 0:
+                logger.info(f"  {i} of {len(jobs)} tiles done")
+
+    class_areas, transitions = zonal_stats_tables(total)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    class_areas.to_csv(output_dir / "class_areas.csv", index=False)
+    transitions.to_csv(output_dir / "transitions.csv", index=False)
+    logger.info(f"Wrote zonal stats to {output_dir}")
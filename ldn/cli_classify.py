@@ -1,26 +1,138 @@
 import logging
+from pathlib import Path
 from typing import Literal
 
+import geopandas as gpd
 import typer
 
-from ldn.classify import run_classify_task
-from ldn.utils import GEOMAD_VERSION, LdnError, PREDICTION_VERSION
+from ldn.classify import GEOMAD_STAC_GEOPARQUET_URL, run_classify_task
+from ldn.training import TERRAIN_CACHE_DIR, extract_training_data, train_model
+from ldn.utils import (
+    GEOMAD_VERSION,
+    LdnError,
+    PREDICTION_VERSION,
+    class_attr,
+    training_data_year,
+)
 
 classify_app = typer.Typer()
 logger = logging.getLogger(__name__)
 
 
+@classify_app.command("extract-training")
+def _extract_training(
+    points: str = typer.Option(
+        ...,
+        help="Training points file (any format GeoPandas reads) with a class column.",
+    ),
+    output: str = typer.Option(
+        ...,
+        help="Directory or S3 URI to write Parquet to, partitioned by year and tile_id.",
+    ),
+    region: Literal["pacific", "non-pacific"] = typer.Option(
+        ..., help="Region of the points. Can be 'pacific' or 'non-pacific'."
+    ),
+    years: str = typer.Option(
+        training_data_year,
+        help="Comma-separated years of GeoMAD to sample, e.g. '2019,2020'.",
+    ),
+    class_column: str = typer.Option(
+        class_attr, help="Name of the class column in the points file."
+    ),
+    version_geomad: str = typer.Option(
+        GEOMAD_VERSION,
+        help=f"Version of the GeoMAD data to use e.g. '{GEOMAD_VERSION}'.",
+    ),
+    max_workers: int = typer.Option(
+        4,
+        help="Number of processes sampling tiles concurrently. 1 samples them in this process.",
+    ),
+    terrain_cache_dir: Path = typer.Option(
+        TERRAIN_CACHE_DIR,
+        help="Directory to cache each tile's elevation, slope and aspect in.",
+    ),
+) -> None:
+    """Sample GeoMAD, index and terrain features under training points, tile by tile."""
+    years_list = [year.strip() for year in years.split(",") if year.strip()]
+    if not years_list:
+        raise LdnError("Must give at least one year.")
+
+    extract_training_data(
+        gpd.read_file(points),
+        region=region,
+        years=years_list,
+        output=output,
+        class_column=class_column,
+        max_workers=max_workers,
+        stac_geoparquet_url=GEOMAD_STAC_GEOPARQUET_URL.replace(
+            GEOMAD_VERSION, version_geomad
+        ),
+        terrain_cache_dir=terrain_cache_dir,
+    )
+
+
 @classify_app.command("train-model")
-def _train_model() -> None:
-    # year = 2020
-    # Steps:
-    # 1. Gather all training data CSVs. Later do this per region/time range.
-    # 2. Again filter by outliers per class.
-    # 3. Train a random forest model.
-    # 4. Write model to S3.
+def _train_model(
+    training_data: str = typer.Option(
+        ..., help="Directory or S3 URI of training Parquet from extract-training."
+    ),
+    output: str = typer.Option(
+        f"classification/models/{PREDICTION_VERSION}",
+        help="Directory or S3 URI to write the model, feature manifest and benchmark report to.",
+    ),
+    class_column: str = typer.Option(class_attr, help="Name of the class column."),
+    features: str | None = typer.Option(
+        None,
+        help="Comma-separated feature columns, in order. Defaults to all feature columns.",
+    ),
+    years: str | None = typer.Option(
+        None, help="Comma-separated years of training data to use. Defaults to all."
+    ),
+    n_estimators: int = typer.Option(500, help="Number of trees in the forest."),
+    n_jobs: int = typer.Option(
+        -1,
+        help="Number of parallel jobs building trees and predicting. -1 uses all CPUs.",
+    ),
+    random_state: int = typer.Option(
+        42, help="Seed for the train/test split and the forest."
+    ),
+    test_size: float = typer.Option(
+        0.3,
+        help="Fraction of training points (rows if the data has no point_id) held out to evaluate and benchmark the model. 0 trains on all rows.",
+    ),
+    remove_outliers: bool = typer.Option(
+        False, help="Whether to drop outliers of each class before training."
+    ),
+    outlier_threshold: float = typer.Option(
+        3.5, help="Robust z-score distance beyond which a row is an outlier."
+    ),
+    max_outlier_fraction: float = typer.Option(
+        0.05, help="Largest fraction of each class dropped as outliers."
+    ),
+) -> None:
+    """Train the LULC random forest from extracted training data."""
+    if not 0 <= test_size < 1:
+        raise LdnError("Test size must be at least 0 and less than 1.")
 
-    # TODO: Adapt from notebooks/training_data/1_Train_Predict.ipynb.
-    raise LdnError("This command is not implemented yet.")
+    def split(value: str | None) -> list[str] | None:
+        if value is None:
+            return None
+        return [part.strip() for part in value.split(",") if part.strip()]
+
+    train_model(
+        training_data,
+        output,
+        class_column=class_column,
+        features=split(features),
+        years=split(years),
+        n_estimators=n_estimators,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        test_size=test_size,
+        remove_outliers=remove_outliers,
+        outlier_threshold=outlier_threshold,
+        max_outlier_fraction=max_outlier_fraction,
+    )
 
 
 @classify_app.command("classify")
@@ -65,9 +177,27 @@ def _classify(
         255,
         help="Value to use for NoData pixels in the output. Must be an integer between 0 and 255.",
     ),
+    majority_window: int | None = typer.Option(
+        None,
+        help="Odd window size in pixels of a majority filter applied to the classification, e.g. 3. No filter if not set.",
+    ),
+    land_buffer: float | None = typer.Option(
+        None,
+        help="Only classify pixels within this many metres of GADM land, e.g. 2000. Open-ocean pixels are never sent to the model. All pixels are classified if not set.",
+    ),
+    ocean_as_water: bool = typer.Option(
+        False,
+        help="Write pixels outside the land buffer as water rather than nodata.",
+    ),
 ) -> None:
     if int(year) < 2000 or int(year) > 2025:
         raise LdnError("Year must be between 2000 and 2025.")
+    if majority_window is not None and (
+        majority_window < 1 or majority_window % 2 == 0
+    ):
+        raise LdnError("Majority window must be a positive odd number.")
+    if ocean_as_water and land_buffer is None:
+        raise LdnError("--ocean-as-water needs a --land-buffer.")
 
     run_classify_task(
         tile_id,
@@ -83,4 +213,7 @@ def _classify(
         overwrite=overwrite,
         probability_threshold=probability_threshold,
         nodata_value=nodata_value,
+        majority_window=majority_window,
+        land_buffer=land_buffer,
+        ocean_as_water=ocean_as_water,
     )
@@ -1,10 +1,14 @@
 import logging
+from pathlib import Path
+
 import geopandas as gpd
 from typing import Annotated, Literal
 
 import typer
 from ldn.utils import ALL_COUNTRIES, LdnError, NON_DEP_COUNTRIES
-from ldn.grids import get_grid_tiles
+from ldn.grids import get_grid_tiles, write_simplified_gadm
+from ldn.tasks import DEFAULT_SCENE_COUNT, load_scene_counts, tile_land_fractions
+from ldn.tile_registry import TILE_REGISTRY_FILE, TileRegistry, source_hashes
 from dep_tools.grids import COUNTRIES_AND_CODES as DEP_COUNTRIES_AND_CODES
 
 cli_grid_app = typer.Typer()
@@ -20,6 +24,51 @@ def _get_grid_tiles(
     return get_grid_tiles(format, grids, overwrite)
 
 
+@cli_grid_app.command("build-registry")
+def _build_registry(
+    overwrite: Annotated[
+        bool,
+        typer.Option(help="Recalculate the tiles rather than reading the GeoJSONs."),
+    ] = False,
+    scene_counts: Annotated[
+        Path | None,
+        typer.Option(
+            help="CSV of expected scene counts with 'id' and 'scene_count' columns, stored per tile."
+        ),
+    ] = None,
+    path: Annotated[
+        Path, typer.Option(help="Where to write the registry.")
+    ] = TILE_REGISTRY_FILE,
+) -> None:
+    """Write the tile registry, with each tile's land fraction, that print-tasks reads instead of the GeoJSONs.
+
+    Rebuild it whenever the tiles are regenerated with get-grid-tiles --overwrite.
+    """
+    tiles = get_grid_tiles(format="gdf", grids="all", overwrite=overwrite)
+    logger.info("Estimating land fraction per tile from GADM")
+    registry = TileRegistry.from_tiles(
+        tiles, tile_land_fractions(tiles), sources=source_hashes()
+    )
+    if scene_counts is not None:
+        registry = registry.with_scene_counts(
+            load_scene_counts(scene_counts), DEFAULT_SCENE_COUNT
+        )
+    registry.save(path)
+
+
+@cli_grid_app.command("simplify-gadm")
+def _simplify_gadm(
+    tolerance: Annotated[
+        float,
+        typer.Option(
+            help="Simplification tolerance in degrees (0.0005 is about 50 m)."
+        ),
+    ] = 0.0005,
+) -> None:
+    """Write a simplified GeoParquet copy of the GADM countries, for fast startup."""
+    write_simplified_gadm(tolerance)
+
+
 @cli_grid_app.command("list-countries")
 def list_countries(grids: Literal["all", "pacific", "non-pacific"] = "all") -> dict:
     """List all unique SIDS and DEP countries as a dict of name: code. Depends on the grid(s) specified."""
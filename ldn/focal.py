@@ -0,0 +1,186 @@
+import logging
+from typing import Callable
+
+import dask.array as da
+import numpy as np
+import xarray as xr
+
+from ldn.typology import CLASS_LUT, N_CLASSES, remap_classes
+from ldn.utils import LdnError
+
+logger = logging.getLogger(__name__)
+
+# Sliding window class statistics for classification rasters.
+#
+# Each class is counted in every window with a running box sum (an integral
+# image) of its one-hot plane, so the cost is O(pixels x classes) whatever the
+# window size, rather than a Python call per pixel as with generic_filter.
+# Values that aren't a class (e.g. nodata 255) are never counted. Dask arrays
+# are processed chunk by chunk with a halo of half a window.
+
+
+def _box_sum(plane: np.ndarray, radius: int) -> np.ndarray:
+    """Sum a 2D array over a (2 * radius + 1) square window, treating outside as 0."""
+    window = 2 * radius + 1
+    height, width = plane.shape
+    integral = np.zeros((height + window, width + window), dtype=np.int32)
+    integral[1:, 1:] = (
+        np.pad(plane, radius).astype(np.int32).cumsum(axis=0).cumsum(axis=1)
+    )
+    return (
+        integral[window:, window:]
+        - integral[:-window, window:]
+        - integral[window:, :-window]
+        + integral[:-window, :-window]
+    )
+
+
+def _class_counts(packed: np.ndarray, radius: int):
+    """Yield (class, count of the class in each pixel's window) for every class."""
+    for value in range(1, N_CLASSES):
+        if CLASS_LUT[value] == value:
+            yield value, _box_sum(packed == value, radius)
+
+
+def _heterogeneity(packed: np.ndarray, radius: int) -> np.ndarray:
+    result = np.zeros(packed.shape, dtype=np.uint8)
+    for _, count in _class_counts(packed, radius):
+        result += count > 0
+    return result
+
+
+def _majority(packed: np.ndarray, radius: int, nodata: int) -> np.ndarray:
+    best_class = np.zeros(packed.shape, dtype=np.uint8)
+    best_count = np.zeros(packed.shape, dtype=np.int32)
+    centre_count = np.zeros(packed.shape, dtype=np.int32)
+    for value, count in _class_counts(packed, radius):
+        better = count > best_count
+        best_class[better] = value
+        best_count[better] = count[better]
+        centre = packed == value
+        centre_count[centre] = count[centre]
+
+    # Ties keep the pixel's own class, and nodata pixels stay nodata.
+    result = np.where(centre_count == best_count, packed, best_class)
+    return np.where(packed == 0, nodata, result).astype(np.uint8)
+
+
+def _fractions(packed: np.ndarray, radius: int) -> np.ndarray:
+    counts = np.zeros((N_CLASSES,) + packed.shape, dtype=np.float32)
+    for value, count in _class_counts(packed, radius):
+        counts[value] = count
+    total = counts.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return counts / total
+
+
+def _apply_focal(
+    classes,
+    window: int,
+    func: Callable[[np.ndarray, int], np.ndarray],
+    dtype,
+    n_layers: int | None = None,
+):
+    """Apply a focal function to a numpy, dask or xarray class raster.
+
+    Args:
+        classes: 2D class raster.
+        window: Odd window size in pixels.
+        func: Function of (packed classes, radius) returning a 2D array, or a
+            (n_layers, y, x) array if n_layers is set.
+        dtype: Output dtype.
+        n_layers: Number of layers func adds in front of the spatial dimensions.
+    """
+    if window < 1 or window % 2 == 0:
+        raise LdnError(f"Window size must be a positive odd number, not {window}.")
+    radius = window // 2
+
+    if isinstance(classes, xr.DataArray):
+        result = _apply_focal(classes.data, window, func, dtype, n_layers)
+        if n_layers is None:
+            return classes.copy(data=result)
+        return xr.DataArray(
+            result,
+            dims=("class",) + classes.dims,
+            coords={"class": np.arange(n_layers), **classes.coords},
+            attrs=classes.attrs,
+        )
+
+    if not isinstance(classes, da.Array):
+        return func(remap_classes(classes, CLASS_LUT, fill_value=0), radius)
+
+    packed = remap_classes(classes, CLASS_LUT, fill_value=0)
+    if radius == 0:
+        padded = packed
+    else:
+        # Pad each chunk with its neighbours' edges, and the array with 0 (not a class).
+        padded = da.overlap.overlap(
+            packed, depth={0: radius, 1: radius}, boundary={0: 0, 1: 0}
+        )
+
+    def run_block(block: np.ndarray) -> np.ndarray:
+        result = func(block, radius)
+        if radius:
+            result = result[..., radius:-radius, radius:-radius]
+        return result
+
+    if n_layers is None:
+        return padded.map_blocks(run_block, dtype=dtype, chunks=packed.chunks)
+    return padded.map_blocks(
+        run_block,
+        dtype=dtype,
+        chunks=((n_layers,),) + packed.chunks,
+        new_axis=0,
+    )
+
+
+def heterogeneity(classes, window: int = 3):
+    """Count the distinct classes in the window around each pixel.
+
+    Vectorised replacement for scipy.ndimage.generic_filter with a unique
+    class counting callback.
+
+    Args:
+        classes: 2D class raster as a numpy array, dask array or DataArray.
+        window: Odd window size in pixels.
+
+    Returns:
+        uint8 number of classes in each window, 0 where the window has no valid pixels.
+    """
+    return _apply_focal(classes, window, _heterogeneity, np.uint8)
+
+
+def majority_filter(classes, window: int = 3, nodata: int = 255):
+    """Replace each pixel with the most common class in the window around it.
+
+    Ties keep the pixel's own class if it is among the most common, and otherwise
+    take the lowest class. Nodata pixels are left as nodata.
+
+    Args:
+        classes: 2D class raster as a numpy array, dask array or DataArray.
+        window: Odd window size in pixels.
+        nodata: Value of nodata pixels in the output.
+
+    Returns:
+        uint8 filtered classes.
+    """
+    return _apply_focal(
+        classes,
+        window,
+        lambda packed, radius: _majority(packed, radius, nodata),
+        np.uint8,
+    )
+
+
+def class_fractions(classes, window: int = 3):
+    """Calculate the fraction of the valid pixels in each window belonging to each class.
+
+    Args:
+        classes: 2D class raster as a numpy array, dask array or DataArray.
+        window: Odd window size in pixels.
+
+    Returns:
+        float32 fractions with a leading class dimension of length N_CLASSES
+        (index 0 is unused), NaN where the window has no valid pixels.
+    """
+    return _apply_focal(classes, window, _fractions, np.float32, n_layers=N_CLASSES)
@@ -1,9 +1,14 @@
 from datetime import datetime
+import hashlib
+import json
 import logging
-from typing import Iterable, Tuple
+import shutil
+from itertools import product
+from pathlib import Path
+from typing import Callable, Iterable, Tuple
 
 from datacube_compute import geomedian_with_mads
-from dep_tools.loaders import StacLoader
+from dep_tools.loaders import OdcLoader, StacLoader
 from dep_tools.namers import S3ItemPath
 from dep_tools.processors import Processor
 from dep_tools.searchers import Searcher
@@ -12,8 +17,19 @@ from dep_tools.task import AreaTask
 from dep_tools.writers import AwsDsCogWriter, AwsStacWriter
 from odc.geo import GeoBox
 import numpy as np
+import obstore
+import xarray as xr
+import zarr
+from obstore.store import from_url
 from odc.algo import mask_cleanup
 from xarray import Dataset
+from zarr.storage import ObjectStore
+from ldn.landmask import (
+    DEFAULT_LAND_BUFFER_M,
+    LAND_MASK_CACHE_DIR,
+    skip_chunks_outside,
+    tile_land_geometry,
+)
 from ldn.utils import LdnError
 
 logger = logging.getLogger(__name__)
@@ -227,6 +243,141 @@ def mask_nodata_clouds_saturated(
     return ds
 
 
+def checkpoint_path(
+    root: str, region: str, version: str, tile_id: str, year: str
+) -> str:
+    """Return the scratch zarr store that checkpoints one GeoMAD tile-year."""
+    return f"{root.rstrip('/')}/{region}/{version}/{tile_id}/{year}.zarr"
+
+
+def options_hash(options: dict) -> str:
+    """Return a stable hash of the options a checkpoint's blocks were computed with."""
+    text = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _zarr_store(path: str):
+    """Return a zarr store for a local path or an s3:// URL."""
+    if path.startswith("s3://"):
+        return ObjectStore(from_url(path))
+    return path
+
+
+def _spatial_vars(ds: Dataset) -> Dataset:
+    """Drop the variables that have neither a y nor an x dimension, e.g. spatial_ref."""
+    return ds.drop_vars(
+        [name for name, var in ds.variables.items() if not {"y", "x"} & set(var.dims)]
+    )
+
+
+def compute_in_blocks(
+    geomad: Dataset,
+    block_size: int,
+    store_path: str | None = None,
+    compute_block: Callable[[dict[str, slice]], Dataset] | None = None,
+    options: dict | None = None,
+) -> Dataset:
+    """Compute a lazy GeoMAD block by block, optionally saving each block to a zarr store.
+
+    With a store, blocks already saved by an earlier (e.g. preempted) run are
+    skipped, so a restarted task only computes the blocks that are missing. The
+    store records its block grid and a hash of the options, and is started
+    again if either no longer matches.
+
+    Args:
+        geomad: Lazy GeoMAD dataset with y and x dimensions. It sets the shape,
+            dtypes, coordinates and attributes of the output.
+        block_size: Block size in pixels. Use a multiple of the load chunk size,
+            so each block only needs its own input chunks.
+        store_path: Optional local path or s3:// URL of a scratch zarr store.
+        compute_block: Optional function returning the computed GeoMAD for a
+            {"y": slice, "x": slice} region. Defaults to computing that region
+            of geomad.
+        options: Optional processing and load options that the blocks depend
+            on, e.g. bands and cloud filters. Saved blocks are only reused if
+            they were computed with the same options.
+
+    Returns:
+        The computed GeoMAD, with the coordinates and attributes of the input.
+    """
+    ny, nx = geomad.sizes["y"], geomad.sizes["x"]
+    grid = [ny, nx, block_size]
+    digest = options_hash(options or {})
+    blocks = list(product(range(0, ny, block_size), range(0, nx, block_size)))
+    spatial = _spatial_vars(geomad)
+    if compute_block is None:
+
+        def compute_block(region: dict[str, slice]) -> Dataset:
+            return spatial.isel(region).compute()
+
+    completed: list = []
+    if store_path is not None:
+        store = _zarr_store(store_path)
+        try:
+            group = zarr.open_group(store, mode="r+")
+            completed = group.attrs.get("completed_blocks", [])
+            if group.attrs.get("block_grid") != grid:
+                raise ValueError("Block grid has changed")
+            if group.attrs.get("options_hash") != digest:
+                raise ValueError("Options have changed")
+            logger.info(
+                f"Resuming from {store_path} with {len(completed)} of {len(blocks)} blocks done"
+            )
+        except (FileNotFoundError, ValueError, zarr.errors.GroupNotFoundError):
+            template = geomad.chunk({"y": block_size, "x": block_size})
+            template.to_zarr(store, mode="w", compute=False, consolidated=False)
+            group = zarr.open_group(store, mode="r+")
+            group.attrs.update(
+                {"block_grid": grid, "options_hash": digest, "completed_blocks": []}
+            )
+            completed = []
+    else:
+        output = {
+            name: np.empty(var.shape, dtype=var.dtype)
+            for name, var in geomad.data_vars.items()
+        }
+
+    done = {tuple(block) for block in completed}
+    for y0, x0 in blocks:
+        if (y0, x0) in done:
+            continue
+        region = {
+            "y": slice(y0, min(y0 + block_size, ny)),
+            "x": slice(x0, min(x0 + block_size, nx)),
+        }
+        block = _spatial_vars(compute_block(region))
+        if store_path is None:
+            for name in output:
+                output[name][region["y"], region["x"]] = block[name].values
+            logger.info(f"Computed block {len(done) + 1} of {len(blocks)}")
+            done.add((y0, x0))
+            continue
+
+        # Variables without y or x (e.g. spatial_ref) were written with the template.
+        block.to_zarr(store, region=region, consolidated=False)
+        # Only mark the block done after its data is written.
+        completed.append([y0, x0])
+        group.attrs.update({"completed_blocks": completed})
+        logger.info(f"Checkpointed block {len(completed)} of {len(blocks)}")
+
+    if store_path is not None:
+        # mask_and_scale=False keeps integer bands and their nodata values as written.
+        saved = xr.open_zarr(store, mask_and_scale=False, consolidated=False)
+        output = {name: saved[name].values for name in geomad.data_vars}
+    return geomad.copy(data=output)
+
+
+def delete_checkpoint(store_path: str) -> None:
+    """Delete a scratch zarr store once its tile has been written."""
+    if store_path.startswith("s3://"):
+        store = from_url(store_path)
+        for batch in obstore.list(store):
+            obstore.delete(store, [meta["path"] for meta in batch])
+    else:
+        shutil.rmtree(store_path, ignore_errors=True)
+    logger.info(f"Deleted checkpoint {store_path}")
+
+
 class GeoMADProcessor(Processor):
     def __init__(
         self,
@@ -244,6 +395,10 @@ class GeoMADProcessor(Processor):
             "filters": [("opening", 3), ("dilation", 5), ("erosion", 2)],
             "include_shadow": True,
         },
+        checkpoint_store: str | None = None,
+        checkpoint_block_size: int = 1000,
+        subtile_size: int | None = None,
+        checkpoint_options: dict | None = None,
         **kwargs,
     ) -> None:
         super().__init__(send_area_to_processor, **kwargs)
@@ -253,6 +408,58 @@ class GeoMADProcessor(Processor):
         self.drop_vars = drop_vars
         self.preprocessor = preprocessor
         self.mask_kwargs = mask_clouds_kwargs
+        # If set, completed blocks are saved to this zarr store so a rerun can resume.
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_block_size = checkpoint_block_size
+        # If set, the tile is processed as independent windows of this many pixels.
+        self.subtile_size = subtile_size
+        # Load options (e.g. bands and resolution) that checkpointed blocks depend on.
+        self.checkpoint_options = checkpoint_options or {}
+
+    def _mask_and_geomad(self, ds: Dataset) -> tuple[Dataset, Dataset]:
+        """Return the masked input and its lazy GeoMAD."""
+        ds = mask_nodata_clouds_saturated(ds, **self.mask_kwargs)
+        data = ds.drop_vars(self.drop_vars) if len(self.drop_vars) > 0 else ds
+        return data, geomedian_with_mads(data, **self.geomad_options)
+
+    def _subtile_halo(self) -> int:
+        """Pixels of context each window needs so the cloud mask filters match the full tile."""
+        filters = self.mask_kwargs.get("filters") or []
+        # Opening and closing apply their radius twice.
+        return sum(
+            2 * size if name in ("opening", "closing") else size
+            for name, size in filters
+        )
+
+    def _checkpoint_options(self) -> dict:
+        """Return the options that a checkpoint's blocks must have been computed with."""
+        # The number of threads doesn't change the result, so resuming with more is fine.
+        geomad_options = {
+            k: v for k, v in self.geomad_options.items() if k != "num_threads"
+        }
+        return {
+            "geomad_options": geomad_options,
+            "mask_clouds_kwargs": self.mask_kwargs,
+            "drop_vars": self.drop_vars,
+            "subtile_size": self.subtile_size,
+            **self.checkpoint_options,
+        }
+
+    def _compute_subtile(self, ds: Dataset, region: dict[str, slice]) -> Dataset:
+        """Load, mask and compute the GeoMAD of one window of the tile, end to end."""
+        halo = self._subtile_halo()
+        padded = {
+            dim: slice(max(r.start - halo, 0), min(r.stop + halo, ds.sizes[dim]))
+            for dim, r in region.items()
+        }
+        # One spatial chunk per window, so there are no chunks smaller than the filters.
+        window = ds.isel(padded).chunk({"y": -1, "x": -1})
+        _, geomad = self._mask_and_geomad(window)
+        interior = {
+            dim: slice(r.start - padded[dim].start, r.stop - padded[dim].start)
+            for dim, r in region.items()
+        }
+        return geomad.isel(interior).compute()
 
     def process(self, ds: Dataset) -> Dataset:
         if ds.time.size < self.min_timesteps:
@@ -260,12 +467,26 @@ class GeoMADProcessor(Processor):
                 f"{ds.time.size} is less than {self.min_timesteps} timesteps"
             )
 
-        ds = mask_nodata_clouds_saturated(ds, **self.mask_kwargs)
-        data = ds.drop_vars(self.drop_vars) if len(self.drop_vars) > 0 else ds
-
-        geomad = geomedian_with_mads(data, **self.geomad_options)
-
-        if self.load_data_before_writing:
+        data, geomad = self._mask_and_geomad(ds)
+
+        if self.subtile_size is not None:
+            # Each window's graph covers only its own pixels, so peak memory is
+            # bounded by the window size rather than the whole tile.
+            geomad = compute_in_blocks(
+                geomad,
+                self.subtile_size,
+                store_path=self.checkpoint_store,
+                compute_block=lambda region: self._compute_subtile(ds, region),
+                options=self._checkpoint_options(),
+            )
+        elif self.checkpoint_store is not None:
+            geomad = compute_in_blocks(
+                geomad,
+                self.checkpoint_block_size,
+                store_path=self.checkpoint_store,
+                options=self._checkpoint_options(),
+            )
+        elif self.load_data_before_writing:
             geomad = geomad.compute()
 
         geomad[
@@ -277,6 +498,38 @@ class GeoMADProcessor(Processor):
         return set_stac_properties(data, geomad)
 
 
+class LandMaskOdcLoader(OdcLoader):
+    """OdcLoader that only reads the chunks of a tile that are on or near land.
+
+    Chunks that don't touch the buffered GADM land of the tile are replaced with
+    nodata before anything is computed, so their COG blocks are never read.
+    """
+
+    def __init__(
+        self,
+        land_buffer_m: float = DEFAULT_LAND_BUFFER_M,
+        land_mask_cache_dir: Path | None = LAND_MASK_CACHE_DIR,
+        **kwargs,
+    ):
+        """Create a LandMaskOdcLoader.
+
+        Args:
+            land_buffer_m: Distance in metres from land to still load.
+            land_mask_cache_dir: Directory to cache each tile's land geometry in.
+            **kwargs: Additional arguments passed to OdcLoader.
+        """
+        super().__init__(**kwargs)
+        self._land_buffer_m = land_buffer_m
+        self._land_mask_cache_dir = land_mask_cache_dir
+
+    def load(self, items, areas):
+        result = super().load(items, areas)
+        land = tile_land_geometry(
+            result.odc.geobox, self._land_buffer_m, self._land_mask_cache_dir
+        )
+        return skip_chunks_outside(result, land)
+
+
 class AwsStacTask(AreaTask):
     """Area task with search + STAC creation/writing for AWS workflows."""
 
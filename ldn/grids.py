@@ -1,17 +1,26 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
+from pyproj import Transformer
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
 from ldn.utils import ALL_COUNTRIES, LdnError
 
-from odc.geo.geom import Geometry
+from odc.geo.geom import BoundingBox
 
 from odc.geo.gridspec import GridSpec
 from odc.geo import XY
+from odc.geo.geobox import GeoBox
 
 from antimeridian import fix_polygon
+from dep_tools.utils import _fix_geometry
 
 from dep_tools.grids import (
     PACIFIC_EPSG,
@@ -25,24 +34,186 @@ logger = logging.getLogger(__name__)
 
 GADM_FILE = Path(__file__).parent / "gadm_sids.gpkg"
 
+# Optional simplified copy of GADM_FILE, written by write_simplified_gadm, for fast startup.
+GADM_SIMPLIFIED_FILE = Path(__file__).parent / "gadm_sids_simplified.parquet"
+
+# Tile GeoJSONs written by get_grid_tiles.
+PACIFIC_TILES_FILE = Path(__file__).parent / "sids_pacific_tiles.geojson"
+NON_PACIFIC_TILES_FILE = Path(__file__).parent / "sids_non_pacific_tiles.geojson"
+ALL_TILES_FILE = Path(__file__).parent / "sids_all_tiles.geojson"
+
+# Number of GADM country packages downloaded at once.
+GADM_DOWNLOAD_WORKERS = 8
+
+# Number of tile geoboxes kept by get_tile_geobox.
+TILE_CACHE_SIZE = 4096
+
+
+def _read_gadm_country(country_code: str) -> gpd.GeoDataFrame:
+    url = f"https://geodata.ucdavis.edu/gadm/gadm4.1/gpkg/gadm41_{country_code}.gpkg"
+    return gpd.read_file(url, layer="ADM_ADM_0")
+
 
 def do_get_gadm(countries: dict) -> gpd.GeoDataFrame:
-    all_polys = []
-    for _, country_code in countries.items():
-        url = (
-            f"https://geodata.ucdavis.edu/gadm/gadm4.1/gpkg/gadm41_{country_code}.gpkg"
-        )
-        country_gdf = gpd.read_file(url, layer="ADM_ADM_0")
-        all_polys.append(country_gdf)
+    with ThreadPoolExecutor(max_workers=GADM_DOWNLOAD_WORKERS) as executor:
+        all_polys = list(executor.map(_read_gadm_country, countries.values()))
     return gpd.GeoDataFrame(pd.concat(all_polys, ignore_index=True))
 
 
+class GadmStore:
+    """In-memory GADM country geometries, read from disk once per process.
+
+    Country lookups, including buffered and antimeridian-fixed variants, are
+    memoised by their arguments, and an STRtree per CRS answers intersection
+    queries. Use get_gadm_store() rather than creating one directly.
+    """
+
+    def __init__(self, gadm: gpd.GeoDataFrame):
+        """Create a GadmStore.
+
+        Args:
+            gadm: GADM countries with 'GID_0' and 'geometry' columns.
+        """
+        # One row per country, in WGS84.
+        self.countries = (
+            gadm.to_crs("EPSG:4326")
+            .dissolve(by="GID_0")
+            .reset_index()[["GID_0", "geometry"]]
+        )
+        self._index = {code: i for i, code in enumerate(self.countries["GID_0"])}
+        self._geometries: dict[tuple, BaseGeometry] = {}
+        self._projections: dict[str | None, gpd.GeoSeries] = {}
+        self._trees: dict[str | None, STRtree] = {}
+
+    def _projected(self, crs: str | None) -> gpd.GeoSeries:
+        if crs not in self._projections:
+            self._projections[crs] = (
+                self.countries.geometry
+                if crs is None
+                else self.countries.to_crs(crs).geometry
+            )
+        return self._projections[crs]
+
+    def country_geometry(
+        self,
+        country_code: str,
+        buffer_m: float = 0,
+        crs: str | None = None,
+        fix_antimeridian: bool = False,
+    ) -> BaseGeometry:
+        """Return a country's geometry, computing each variant only once.
+
+        Args:
+            country_code: GADM country code, e.g. "FJI".
+            buffer_m: Distance to buffer by, in the units of crs.
+            crs: CRS to buffer in. The result is returned in this CRS, unless
+                fix_antimeridian is set. Defaults to WGS84.
+            fix_antimeridian: Return the geometry in WGS84, split at the antimeridian.
+
+        Returns:
+            A shapely geometry.
+        """
+        key = (country_code, buffer_m, crs, fix_antimeridian)
+        if key in self._geometries:
+            return self._geometries[key]
+
+        if country_code not in self._index:
+            raise LdnError(
+                f"No geometry found for country code {country_code}. Check get_gadm has been run for all countries with overwrite on."
+            )
+        geometry = self._projected(crs).iloc[self._index[country_code]]
+        if buffer_m:
+            geometry = geometry.buffer(buffer_m)
+        if fix_antimeridian:
+            if crs is not None:
+                geometry = (
+                    gpd.GeoSeries([geometry], crs=crs).to_crs("EPSG:4326").iloc[0]
+                )
+            geometry = _fix_geometry(geometry)
+
+        self._geometries[key] = geometry
+        return geometry
+
+    def tree(self, crs: str | None = None) -> STRtree:
+        """Return an STRtree of the country geometries in a CRS (WGS84 by default)."""
+        if crs not in self._trees:
+            self._trees[crs] = STRtree(self._projected(crs).values)
+        return self._trees[crs]
+
+    def query(self, geometry: BaseGeometry, crs: str | None = None) -> gpd.GeoDataFrame:
+        """Return the countries intersecting a geometry.
+
+        Args:
+            geometry: Shapely geometry to query with.
+            crs: CRS of geometry, and of the returned countries. Defaults to WGS84.
+
+        Returns:
+            GeoDataFrame with 'GID_0' and 'geometry' columns.
+        """
+        indices = sorted(self.tree(crs).query(geometry, predicate="intersects"))
+        return gpd.GeoDataFrame(
+            {"GID_0": self.countries["GID_0"].iloc[indices].to_list()},
+            geometry=self._projected(crs).iloc[indices].to_list(),
+            crs=crs or "EPSG:4326",
+        )
+
+
+@cache
+def get_gadm_store(simplified: bool = False) -> GadmStore:
+    """Return the process-wide GadmStore, reading GADM from disk on first use.
+
+    Args:
+        simplified: Read GADM_SIMPLIFIED_FILE if it exists, which is much faster
+            but less precise. Falls back to the full GeoPackage.
+    """
+    if simplified and GADM_SIMPLIFIED_FILE.exists():
+        logger.info(f"Reading simplified GADM geometries from {GADM_SIMPLIFIED_FILE}")
+        return GadmStore(gpd.read_parquet(GADM_SIMPLIFIED_FILE))
+    if not GADM_FILE.exists():
+        get_gadm()
+    return GadmStore(_read_gadm_file())
+
+
+@cache
+def _read_gadm_file() -> gpd.GeoDataFrame:
+    logger.info(f"Reading GADM geometries from {GADM_FILE}")
+    return gpd.read_file(GADM_FILE)
+
+
+def _clear_gadm_caches() -> None:
+    _read_gadm_file.cache_clear()
+    get_gadm_store.cache_clear()
+
+
+def write_simplified_gadm(
+    tolerance: float = 0.0005, path: Path = GADM_SIMPLIFIED_FILE
+) -> Path:
+    """Write a simplified, one row per country, GeoParquet copy of the GADM file.
+
+    Args:
+        tolerance: Simplification tolerance in degrees (0.0005 is about 50 m).
+        path: Where to write the GeoParquet file.
+
+    Returns:
+        The path written to.
+    """
+    countries = get_gadm_store().countries.copy()
+    countries["geometry"] = countries.geometry.simplify(
+        tolerance, preserve_topology=True
+    )
+    countries.to_parquet(path)
+    get_gadm_store.cache_clear()
+    logger.info(f"Wrote {len(countries)} simplified countries to {path}")
+    return path
+
+
 def get_gadm(
     countries: dict = ALL_COUNTRIES, overwrite: bool = False
 ) -> gpd.GeoDataFrame:
     """
     Downloads the GADM data for the specified countries if not already cached locally.
     Combines the country geometries into a single GeoDataFrame and saves to a local GeoPackage file.
+    The GeoPackage is only read once per process. See get_gadm_store for memoised geometry lookups.
     """
     requested_countries = set(countries.values())
 
@@ -53,13 +224,14 @@ def get_gadm(
         )
         all_gadm = do_get_gadm(countries)
         all_gadm.to_file(GADM_FILE, driver="GPKG")
+        _clear_gadm_caches()
         return all_gadm[all_gadm["GID_0"].isin(requested_countries)]
 
     # Local file exists — check which requested countries are already present.
     logger.info(
         "GADM file exists and overwrite is False — checking for missing countries."
     )
-    existing_gdf = gpd.read_file(GADM_FILE)
+    existing_gdf = _read_gadm_file()
     existing_countries = set(existing_gdf["GID_0"].unique())
     missing_countries = requested_countries - existing_countries
 
@@ -76,6 +248,7 @@ def get_gadm(
             pd.concat([existing_gdf, missing_gadm], ignore_index=True)
         )
         combined_gdf.to_file(GADM_FILE, driver="GPKG")
+        _clear_gadm_caches()
     else:
         logger.info(
             "All requested countries already present in local GADM file — no download needed."
@@ -87,6 +260,8 @@ def get_gadm(
 
 # This is for the non-pacific countries. All pacific countries are covered by the DEP grid (EPSG:3832).
 # Pacific data is seperate because of the antimeridian crossing, and consistency with existing DEP work.
+# GridSpecs are immutable, so one is built per (region, resolution, crs) and reused.
+@cache
 def get_gridspec(
     region: Literal["pacific", "non-pacific"],
     resolution: int = 30,
@@ -130,6 +305,110 @@ def get_gridspec(
     )
 
 
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def get_tile_geobox(
+    region: Literal["pacific", "non-pacific"],
+    tile_index: tuple[int, int],
+    resolution: int = 30,
+    crs: int = EPSG_CODE,
+) -> GeoBox:
+    """Return a tile's GeoBox, reusing recently built ones.
+
+    Args:
+        region: Grid region, "pacific" or "non-pacific".
+        tile_index: (x, y) tile index, as a tuple.
+        resolution: Pixel size, see get_gridspec.
+        crs: CRS of the non-Pacific grid, see get_gridspec.
+    """
+    return get_gridspec(region, resolution, crs).tile_geobox(tile_index)
+
+
+def _tile_boxes(grid: GridSpec, indices: np.ndarray) -> np.ndarray:
+    (ox, oy), (size_x, size_y) = grid.origin.xy, grid.tile_size.xy
+    return shapely.box(
+        ox + indices[:, 0] * size_x,
+        oy + indices[:, 1] * size_y,
+        ox + (indices[:, 0] + 1) * size_x,
+        oy + (indices[:, 1] + 1) * size_y,
+    )
+
+
+def tile_extents(grid: GridSpec, indices: np.ndarray) -> np.ndarray:
+    """Return the WGS84 extents of many tiles at once, split at the antimeridian.
+
+    Args:
+        grid: GridSpec of the tiles.
+        indices: (n, 2) array of (x, y) tile indices.
+
+    Returns:
+        Array of shapely polygons (or multipolygons for antimeridian-crossing tiles).
+    """
+    # Project the tile corners to WGS84, then split tiles crossing the antimeridian.
+    to_wgs84 = Transformer.from_crs(grid.crs, "EPSG:4326", always_xy=True)
+    extents = shapely.transform(
+        _tile_boxes(grid, np.asarray(indices).reshape(-1, 2)),
+        lambda xy: np.column_stack(to_wgs84.transform(xy[:, 0], xy[:, 1])),
+    )
+    extents = shapely.orient_polygons(extents)
+    bounds = shapely.bounds(extents)
+    for i in np.flatnonzero(bounds[:, 2] - bounds[:, 0] > 180):
+        extents[i] = fix_polygon(extents[i])
+    return extents
+
+
+def tiles_from_geometries(
+    grid: GridSpec, geometries: gpd.GeoSeries, region: str
+) -> gpd.GeoDataFrame:
+    """Find the tiles of a grid that intersect any of a set of geometries.
+
+    A vectorised equivalent of calling grid.tiles_from_geopolygon per geometry.
+    Candidate tile indices come from each geometry's bounds and the grid's
+    origin and tile size. They are filtered with a single STRtree query, and
+    the tile extents are built and projected to WGS84 in bulk.
+
+    Args:
+        grid: GridSpec to find tiles in.
+        geometries: Geometries in any CRS.
+        region: Value of the 'region' column.
+
+    Returns:
+        GeoDataFrame with 'x_index', 'y_index', 'label', 'region' and
+        antimeridian-fixed WGS84 'geometry' columns, sorted by tile index.
+    """
+    projected = geometries.to_crs(grid.crs)
+    projected = projected[~projected.is_empty]
+    projected = projected.where(projected.is_valid, projected.buffer(0))
+
+    # Every tile within each geometry's bounds, like GridSpec.tiles.
+    candidates = []
+    for minx, miny, maxx, maxy in projected.bounds.itertuples(index=False):
+        ix1, iy1, ix2, iy2 = grid.idx_bounds(
+            BoundingBox(minx, miny, maxx, maxy, crs=grid.crs)
+        )
+        ix, iy = np.meshgrid(np.arange(ix1, ix2), np.arange(iy1, iy2))
+        candidates.append(np.column_stack([ix.ravel(), iy.ravel()]))
+    if not candidates:
+        candidates.append(np.empty((0, 2), dtype=int))
+    indices = np.unique(np.concatenate(candidates), axis=0)
+
+    boxes = _tile_boxes(grid, indices)
+    hits = STRtree(projected.values).query(boxes, predicate="intersects")
+    indices = indices[np.unique(hits[0])]
+    extents = tile_extents(grid, indices)
+
+    x_index, y_index = indices[:, 0], indices[:, 1]
+    return gpd.GeoDataFrame(
+        {
+            "x_index": x_index,
+            "y_index": y_index,
+            "label": [f"{x}_{y}" for x, y in zip(x_index, y_index)],
+            "region": region,
+        },
+        geometry=extents,
+        crs="epsg:4326",
+    )
+
+
 def get_grid_tiles(
     format: Literal["list", "gdf"] = "list",
     grids: Literal["all", "pacific", "non-pacific"] = "all",
@@ -155,9 +434,9 @@ def get_grid_tiles(
         f"Getting all tiles for grids: {grids} with format: {format} and overwrite: {overwrite}"
     )
 
-    geojson_path_non_pacific = Path(__file__).parent / "sids_non_pacific_tiles.geojson"
-    geojson_path_pacific = Path(__file__).parent / "sids_pacific_tiles.geojson"
-    geojson_path_all = Path(__file__).parent / "sids_all_tiles.geojson"
+    geojson_path_non_pacific = NON_PACIFIC_TILES_FILE
+    geojson_path_pacific = PACIFIC_TILES_FILE
+    geojson_path_all = ALL_TILES_FILE
 
     def process_grid(region, grid_obj, gadm, countries, geojson_file):
         logger.info(f"Processing grid {region} for countries: {list(countries.keys())}")
@@ -170,35 +449,12 @@ def get_grid_tiles(
             logger.info(
                 "Calculating tiles because overwrite is True or file does not exist."
             )
-            all_polys = []
-            for country, code in countries.items():
-                selection = gadm[gadm["GID_0"] == code]
-                if selection.empty:
-                    raise LdnError(
-                        f"No geometry found for country: {country} with code {code}. Check get_gadm has been run for all countries with overwrite on."
-                    )
-                polygon = Geometry(selection.geometry.union_all(), crs=gadm.crs)
-                tiles = list(grid_obj.tiles_from_geopolygon(polygon))
-                geoboxes = [tile[1] for tile in tiles]
-                geobox_labels = [
-                    list(tile[0]) + [f"{tile[0][0]}_{tile[0][1]}"] for tile in tiles
-                ]
-                geobox_extents = [
-                    fix_polygon(gb.extent.to_crs("epsg:4326")) for gb in geoboxes
-                ]  # Fix antimeridian crossing geoms.
-                labels_df = pd.DataFrame(
-                    geobox_labels, columns=["x_index", "y_index", "label"]
-                )
-                extents_gdf = gpd.GeoDataFrame(
-                    labels_df, geometry=geobox_extents, crs="epsg:4326"
-                )
-                extents_gdf["region"] = region
-                all_polys.append(extents_gdf)
-            extents_gdf = (
-                pd.concat(all_polys)
-                .drop_duplicates(subset=["label"])
-                .reset_index(drop=True)
+            store = get_gadm_store()
+            country_geoms = gpd.GeoSeries(
+                [store.country_geometry(code) for code in countries.values()],
+                crs="EPSG:4326",
             )
+            extents_gdf = tiles_from_geometries(grid_obj, country_geoms, region)
 
             logger.info(
                 f"Writing geojson for grid {region} with {len(extents_gdf)} tiles."
@@ -251,8 +507,12 @@ def get_grid_tiles(
 
     if format == "list":
         return [
-            ((int(row["x_index"]), int(row["y_index"])), str(row["region"]))
-            for _, row in all_tiles_gdf.iterrows()
+            ((int(x), int(y)), str(region))
+            for x, y, region in zip(
+                all_tiles_gdf["x_index"].to_numpy(),
+                all_tiles_gdf["y_index"].to_numpy(),
+                all_tiles_gdf["region"].to_numpy(),
+            )
         ]
     else:
         return all_tiles_gdf.reset_index(drop=True)
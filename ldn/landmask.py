@@ -0,0 +1,192 @@
+import logging
+from pathlib import Path
+
+import dask.array as da
+import geopandas as gpd
+import numpy as np
+from antimeridian import fix_polygon
+from odc.geo.geobox import GeoBox
+from odc.geo.geom import Geometry, box
+from rasterio.features import geometry_mask
+from shapely.geometry import Polygon
+from xarray import Dataset
+
+from ldn.grids import get_gadm_store
+
+logger = logging.getLogger(__name__)
+
+# Land geometries clipped to each tile are cached here, like the GADM file.
+LAND_MASK_CACHE_DIR = Path(__file__).parent / "land_masks"
+
+# Default distance from the GADM coastline that is still treated as land, to keep
+# beaches, mangroves, reefs and shallow lagoons.
+DEFAULT_LAND_BUFFER_M = 2000
+
+
+def _cache_path(
+    geobox: GeoBox, buffer_m: float, cache_dir: Path, suffix: str = ".geojson"
+) -> Path:
+    affine = geobox.affine
+    key = (
+        f"{geobox.crs.epsg}_{affine.c:.0f}_{affine.f:.0f}_{affine.a:.0f}"
+        f"_{geobox.width}x{geobox.height}_{buffer_m:.0f}m"
+    )
+    return Path(cache_dir) / f"{key}{suffix}"
+
+
+def tile_land_geometry(
+    geobox: GeoBox,
+    buffer_m: float = DEFAULT_LAND_BUFFER_M,
+    cache_dir: Path | None = LAND_MASK_CACHE_DIR,
+) -> Geometry:
+    """Return the buffered GADM land within a tile, in the tile's CRS.
+
+    The result is cached per tile (and buffer) so repeat runs for other years
+    don't read and reproject GADM again.
+
+    Args:
+        geobox: The tile's GeoBox.
+        buffer_m: Distance in metres to grow the land by.
+        cache_dir: Directory to cache the geometry in, or None to not cache.
+
+    Returns:
+        The land geometry, which is empty if the tile has no land.
+    """
+    cache_path = _cache_path(geobox, buffer_m, cache_dir) if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        cached = gpd.read_file(cache_path)
+        return Geometry(
+            cached.geometry.iloc[0] if len(cached) else Polygon(), geobox.crs
+        )
+
+    # Land just outside the tile still reaches into it once buffered.
+    left, bottom, right, top = geobox.extent.boundingbox
+    expanded = (left - buffer_m, bottom - buffer_m, right + buffer_m, top + buffer_m)
+
+    # Select candidate countries in WGS84 first, with the footprint split at the antimeridian.
+    footprint = fix_polygon(
+        box(*expanded, crs=geobox.crs).to_crs("epsg:4326").geom, fix_winding=True
+    )
+    candidates = get_gadm_store().query(footprint)
+
+    land = Polygon()
+    if len(candidates):
+        # Clip before buffering, so only the coastline near the tile is buffered.
+        land = (
+            candidates.to_crs(geobox.crs)
+            .clip_by_rect(*expanded)
+            .buffer(buffer_m)
+            .union_all()
+            .intersection(geobox.extent.geom)
+        )
+    logger.info(f"Land covers {land.area / geobox.extent.area:.1%} of the tile")
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        gpd.GeoDataFrame(
+            geometry=[] if land.is_empty else [land], crs=geobox.crs
+        ).to_file(cache_path, driver="GeoJSON")
+    return Geometry(land, geobox.crs)
+
+
+def tile_land_mask(
+    geobox: GeoBox,
+    buffer_m: float = DEFAULT_LAND_BUFFER_M,
+    cache_dir: Path | None = LAND_MASK_CACHE_DIR,
+) -> np.ndarray:
+    """Rasterise the buffered GADM land of a tile onto its pixel grid.
+
+    Pixels touching the land geometry count as land. The raster is cached
+    next to the geometry, so each tile is only rasterised once.
+
+    Args:
+        geobox: The tile's GeoBox.
+        buffer_m: Distance in metres to grow the land by.
+        cache_dir: Directory to cache the mask in, or None to not cache.
+
+    Returns:
+        (y, x) boolean array, True on or near land.
+    """
+    cache_path = (
+        _cache_path(geobox, buffer_m, cache_dir, suffix=".npy") if cache_dir else None
+    )
+    if cache_path is not None and cache_path.exists():
+        return np.load(cache_path)
+
+    land = tile_land_geometry(geobox, buffer_m, cache_dir)
+    if land.is_empty:
+        mask = np.zeros(tuple(geobox.shape), dtype=bool)
+    else:
+        mask = geometry_mask(
+            [land.geom],
+            out_shape=tuple(geobox.shape),
+            transform=geobox.affine,
+            all_touched=True,
+            invert=True,
+        )
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(cache_path, mask)
+    return mask
+
+
+def chunks_intersecting(
+    geobox: GeoBox, chunks: tuple[tuple[int, ...], tuple[int, ...]], geometry: Geometry
+) -> np.ndarray:
+    """Return a (y chunks, x chunks) boolean array of the chunks that intersect a geometry."""
+    y_edges = np.cumsum((0,) + tuple(chunks[0]))
+    x_edges = np.cumsum((0,) + tuple(chunks[1]))
+    result = np.zeros((len(chunks[0]), len(chunks[1])), dtype=bool)
+    if geometry.is_empty:
+        return result
+    for i in range(len(chunks[0])):
+        for j in range(len(chunks[1])):
+            chunk_box = geobox[y_edges[i] : y_edges[i + 1], x_edges[j] : x_edges[j + 1]]
+            result[i, j] = chunk_box.extent.intersects(geometry)
+    return result
+
+
+def skip_chunks_outside(ds: Dataset, geometry: Geometry) -> Dataset:
+    """Replace the lazy chunks of a dataset that don't touch a geometry with nodata.
+
+    The replaced chunks are constant arrays, so their COG reads drop out of the
+    dask graph and are never made. Each variable's nodata attribute (or 0, or NaN
+    for floats, if it has none) is used as the fill value.
+
+    Args:
+        ds: Lazily loaded dataset with dask arrays and trailing y and x dimensions.
+        geometry: Geometry of the pixels to keep, in any CRS.
+
+    Returns:
+        The dataset, with the same shape, chunks and attributes.
+    """
+    geobox = ds.odc.geobox
+    if not geometry.is_empty:
+        geometry = geometry.to_crs(geobox.crs)
+    first = next(iter(ds.data_vars.values()))
+    keep = chunks_intersecting(geobox, first.data.chunks[-2:], geometry)
+    logger.info(f"Loading {keep.sum()} of {keep.size} chunks that intersect the mask")
+    if keep.all():
+        return ds
+
+    ds = ds.copy()
+    for name, var in ds.data_vars.items():
+        data = var.data
+        nodata = var.attrs.get("nodata")
+        if nodata is None:
+            nodata = np.nan if data.dtype.kind == "f" else 0
+        leading = (slice(None),) * (data.ndim - 2)
+        rows = []
+        for i in range(keep.shape[0]):
+            row = []
+            for j in range(keep.shape[1]):
+                block = data.blocks[leading + (i, j)]
+                if not keep[i, j]:
+                    block = da.full(
+                        block.shape, nodata, dtype=data.dtype, chunks=block.chunks
+                    )
+                row.append(block)
+            rows.append(row)
+        ds[name] = var.copy(data=da.block(rows))
+    return ds
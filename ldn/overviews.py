@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import tempfile
+from urllib.parse import urlparse
+
+import boto3
+import rasterio
+from antimeridian import fix_polygon
+from odc.geo.geom import box
+from rasterio.enums import Resampling
+from rasterio.shutil import copy as rio_copy
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from shapely.geometry import mapping, shape
+
+from ldn.grids import EPSG_CODE
+from ldn.utils import LdnError
+
+logger = logging.getLogger(__name__)
+
+# 32 x 30 m, so each 96 km grid tile is exactly 100 x 100 overview pixels.
+OVERVIEW_RESOLUTION = 960
+
+# The viewer reads overviews up to and including this web mercator zoom
+# (~1.2 km pixels at the equator), and full resolution tiles above it.
+OVERVIEW_MAX_ZOOM = 7
+
+# Class maps are resampled with mode, everything else (reflectance, MADs, probability) with average.
+CATEGORICAL_ASSETS = {"classification", "classification_unfiltered"}
+
+COG_MEDIA_TYPE = "image/tiff; application=geotiff; profile=cloud-optimized"
+
+
+def overview_resampling(asset: str) -> Resampling:
+    """Return the resampling method used to build the overview of an asset."""
+    return Resampling.mode if asset in CATEGORICAL_ASSETS else Resampling.average
+
+
+def product_year(feature: dict) -> int:
+    """Return the year of an annual product from its STAC item.
+
+    GeoMADs for the LS7 era use a year of data either side of the product year,
+    so the product year is the middle of the item's temporal extent.
+    """
+    props = feature["properties"]
+    start = props.get("start_datetime") or props["datetime"]
+    end = props.get("end_datetime") or props["datetime"]
+    return (int(start[:4]) + int(end[:4])) // 2
+
+
+def feature_crs(feature: dict) -> str:
+    """Return the CRS of a STAC item's grid, e.g. 'EPSG:6933'."""
+    props = feature["properties"]
+    if props.get("proj:code"):
+        return props["proj:code"]
+    if props.get("proj:epsg"):
+        return f"EPSG:{props['proj:epsg']}"
+    return f"EPSG:{EPSG_CODE}"
+
+
+def cog_assets(features: list[dict]) -> list[str]:
+    """Return the names of the GeoTIFF assets of a set of STAC items."""
+    names = {
+        name
+        for feature in features
+        for name, asset in feature.get("assets", {}).items()
+        if "image/tiff" in asset.get("type", "")
+        or asset.get("href", "").endswith(".tif")
+    }
+    return sorted(names)
+
+
+def build_overview_cog(
+    hrefs: list[str],
+    out_path: str,
+    resampling: Resampling,
+    resolution: float = OVERVIEW_RESOLUTION,
+) -> dict:
+    """Downsample aligned, single band tile COGs into one overview COG.
+
+    Each tile is read at full resolution and resampled by GDAL to the overview
+    resolution, so overview pixels are the true mode or average of the tile
+    pixels rather than of the tiles' own (nearest neighbour) overviews. Tiles
+    are written one at a time into a sparse GeoTIFF, so memory stays at about
+    one tile regardless of the extent of the region.
+
+    Args:
+        hrefs: Paths or URLs of the tile COGs. They must share a CRS and a grid
+            that is aligned to the overview resolution.
+        out_path: Local path or s3:// URL to write the overview COG to.
+        resampling: Resampling method.
+        resolution: Overview pixel size, in units of the tiles' CRS.
+
+    Returns:
+        The WGS84 GeoJSON footprint of the overview.
+    """
+    if not hrefs:
+        raise LdnError(f"No tiles to build overview {out_path} from.")
+
+    sources = []
+    for href in hrefs:
+        with rasterio.open(href) as src:
+            sources.append((href, src.bounds, src.crs, src.nodata, src.dtypes[0]))
+
+    crs = sources[0][2]
+    if any(src_crs != crs for _, _, src_crs, _, _ in sources):
+        raise LdnError(f"Tiles for overview {out_path} do not share a CRS.")
+
+    left = min(b.left for _, b, _, _, _ in sources)
+    bottom = min(b.bottom for _, b, _, _, _ in sources)
+    right = max(b.right for _, b, _, _, _ in sources)
+    top = max(b.top for _, b, _, _, _ in sources)
+
+    profile = {
+        "driver": "GTiff",
+        "width": round((right - left) / resolution),
+        "height": round((top - bottom) / resolution),
+        "count": 1,
+        "dtype": sources[0][4],
+        "nodata": sources[0][3],
+        "crs": crs,
+        "transform": from_origin(left, top, resolution, resolution),
+        "tiled": True,
+        "blockxsize": 512,
+        "blockysize": 512,
+        "sparse_ok": True,
+        "compress": "deflate",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "overview.tif")
+        with rasterio.open(tmp_path, "w", **profile) as dst:
+            for href, bounds, _, _, _ in sources:
+                # OVERVIEW_LEVEL=NONE stops GDAL from resampling the tile's own overviews.
+                with rasterio.open(href, OVERVIEW_LEVEL="NONE") as src:
+                    window = Window(
+                        col_off=round((bounds.left - left) / resolution),
+                        row_off=round((top - bounds.top) / resolution),
+                        width=round((bounds.right - bounds.left) / resolution),
+                        height=round((bounds.top - bounds.bottom) / resolution),
+                    )
+                    data = src.read(
+                        1,
+                        out_shape=(window.height, window.width),
+                        resampling=resampling,
+                    )
+                dst.write(data, 1, window=window)
+
+        parsed = urlparse(out_path)
+        cog_path = (
+            os.path.join(tmp_dir, "overview_cog.tif")
+            if parsed.scheme == "s3"
+            else out_path
+        )
+        rio_copy(
+            tmp_path,
+            cog_path,
+            driver="COG",
+            compress="deflate",
+            overview_resampling=resampling.name.upper(),
+            sparse_ok=True,
+        )
+        if parsed.scheme == "s3":
+            boto3.client("s3").upload_file(
+                cog_path,
+                parsed.netloc,
+                parsed.path.lstrip("/"),
+                ExtraArgs={"ContentType": COG_MEDIA_TYPE},
+            )
+
+    logger.info(f"Wrote overview {out_path} from {len(hrefs)} tiles.")
+    footprint = box(left, bottom, right, top, crs=str(crs)).to_crs("epsg:4326")
+    return mapping(fix_polygon(footprint.geom, fix_winding=True))
+
+
+def overview_item(
+    item_id: str, year: str, assets: dict[str, str], geometry: dict, self_href: str
+) -> dict:
+    """Create a minimal STAC item for a set of overview COGs, readable by the viewer.
+
+    Args:
+        item_id: STAC item id.
+        year: Product year.
+        assets: Mapping of asset name to overview COG href.
+        geometry: WGS84 GeoJSON footprint.
+        self_href: URL the item will be published at.
+
+    Returns:
+        The STAC item dict.
+    """
+    return {
+        "type": "Feature",
+        "stac_version": "1.0.0",
+        "id": item_id,
+        "geometry": geometry,
+        "bbox": list(shape(geometry).bounds),
+        "properties": {
+            "datetime": None,
+            "start_datetime": f"{year}-01-01T00:00:00Z",
+            "end_datetime": f"{year}-12-31T23:59:59Z",
+        },
+        "links": [{"rel": "self", "href": self_href, "type": "application/json"}],
+        "assets": {
+            name: {"href": href, "type": COG_MEDIA_TYPE, "roles": ["data"]}
+            for name, href in assets.items()
+        },
+    }
+
+
+def write_json(obj: dict, out_path: str) -> None:
+    """Write a JSON document to a local path or s3:// URL."""
+    body = json.dumps(obj)
+    parsed = urlparse(out_path)
+    if parsed.scheme == "s3":
+        boto3.client("s3").put_object(
+            Bucket=parsed.netloc,
+            Key=parsed.path.lstrip("/"),
+            Body=body,
+            ContentType="application/json",
+        )
+    else:
+        with open(out_path, "w") as f:
+            f.write(body)
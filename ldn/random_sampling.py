@@ -1,270 +1,331 @@
-# Forked from https://github.com/frontiersi/FAO_LC_workshop_Rwanda/blob/main/random_sampling.py
-import logging
-import geopandas as gpd
-import numpy as np
-import pandas as pd
-
-from ldn.utils import LdnError
-
-logger = logging.getLogger(__name__)
-
-
-def random_sampling(
-    da,
-    n,
-    min_sample_n=5,
-    sampling="stratified_random",
-    manual_class_ratios=None,
-    out_fname=None,
-    class_attr="class",
-    drop_value=0,
-):
-    """
-    Creates randomly sampled points for post-classification
-    accuracy assessment.
-
-    Params:
-    -------
-    da: xarray.DataArray
-        A classified 2-dimensional xarray.DataArray
-    n: int
-        Total number of points to sample. Ignored if providing
-        a dictionary of {class:numofpoints} to 'manual_class_ratios'
-    min_sample_n: int
-        Minimum number of samples to generate per class
-    sampling: str
-        'stratified_random' = Create points that are randomly
-        distributed within each class, where each class has a
-        number of points proportional to its relative area.
-        'equal_stratified_random' = Create points that are randomly
-        distributed within each class, where each class has the
-        same number of points.
-        'random' = Create points that are randomly distributed
-        throughout the image.
-        'manual' = user definined, each class is allocated a
-        specified number of points, supply a manual_class_ratio
-        dictionary mapping number of points to each class
-    manual_class_ratios: dict
-        If setting sampling to 'manual', the provide a dictionary
-        of type {'class': numofpoints} mapping the number of points
-        to generate for each class.
-    out_fname: str
-        If providing a filepath name, e.g 'sample_points.shp', the
-        function will export a shapefile/geojson of the sampling
-        points to file.
-    class_attr: str
-        Column name of output dataframe that contains the integer
-        class values on the classification map.
-    drop_value: integer
-        Pixel value on the classification map to be excluded from sampling.
-
-    Output
-    ------
-    GeoPandas.Dataframe
-
-    """
-
-    if sampling not in [
-        "stratified_random",
-        "equal_stratified_random",
-        "random",
-        "manual",
-    ]:
-        raise LdnError(
-            "Sampling strategy must be one of 'stratified_random', "
-            + "'equal_stratified_random', 'random', or 'manual'"
-        )
-
-    # Open the dataset as a pandas dataframe
-    da = da.squeeze()
-    df = da.to_dataframe(name=class_attr)
-
-    # Change made here: drop invalid class value
-    df = df[df[class_attr] != drop_value]
-
-    # List to store points
-    samples = []
-
-    # Determine class ratios in image
-    class_ratio = pd.DataFrame(
-        {
-            "proportion": df[class_attr].value_counts(normalize=True),
-            "n_available": df[class_attr].value_counts(normalize=False),
-            "class": df[class_attr].value_counts(normalize=True).keys(),
-        }
-    )
-    logger.info(class_ratio)
-    if sampling == "stratified_random":
-        for _class in class_ratio["class"]:
-            # Use relative proportions of classes to sample df
-            no_of_points = (
-                n * class_ratio[class_ratio["class"] == _class]["proportion"].values[0]
-            )
-            n_available = class_ratio[class_ratio["class"] == _class][
-                "n_available"
-            ].values[0]
-            if n_available >= max([min_sample_n, no_of_points]):
-                no_of_points = max([min_sample_n, no_of_points])
-                # Random sample each class
-                logger.info(
-                    "Class "
-                    + str(_class)
-                    + ": sampling at "
-                    + str(round(no_of_points))
-                    + "locations"
-                )
-            else:
-                no_of_points = n_available
-                logger.info(
-                    "Class "
-                    + str(_class)
-                    + ": not enough pixels as requested, sampling at all "
-                    + str(int(no_of_points))
-                    + " locations"
-                )
-            sample_loc = df[df[class_attr] == _class].sample(n=int(round(no_of_points)))
-            samples.append(sample_loc)
-
-    if sampling == "equal_stratified_random":
-        classes = np.unique(df[class_attr])
-
-        for _class in classes:
-            # Use relative proportions of classes to sample df
-            no_of_points = n / len(classes)
-            n_available = class_ratio[class_ratio["class"] == _class][
-                "n_available"
-            ].values[0]
-            if n_available >= no_of_points:
-                sample_loc = df[df[class_attr] == _class].sample(
-                    n=int(round(no_of_points))
-                )
-                logger.info(
-                    "Class "
-                    + str(_class)
-                    + ": sampling at "
-                    + str(round(no_of_points))
-                    + " locations"
-                )
-            else:
-                no_of_points = n_available
-                logger.info(
-                    "Class "
-                    + str(_class)
-                    + ": not enough pixels as requested, sampling at all "
-                    + str(int(no_of_points))
-                    + " locations"
-                )
-            sample_loc = df[df[class_attr] == _class].sample(n=int(round(no_of_points)))
-            samples.append(sample_loc)
-
-    #             # Random sample each classes
-    #             try:
-    #                 sample_loc = df[df[class_attr] == _class].sample(n=int(round(no_of_points)))
-    #                 logger.info('Class '+ str(_class)+ ': sampling at '+ str(round(no_of_points)) + ' locations')
-    #                 samples.append(sample_loc)
-
-    #             except ValueError:
-    #                         logger.info('Requested more sample points than population of pixels for class '+ str(_class)+', skipping')
-    #                         pass
-
-    if sampling == "random":
-        no_of_points = n
-        # Random sample entire df
-        logger.info(
-            "Randomly sampling dataArray at " + str(round(no_of_points)) + " locations"
-        )
-        sample_loc = df.dropna().sample(n=int(round(no_of_points)))
-        samples.append(sample_loc)
-
-    if sampling == "manual":
-        if isinstance(manual_class_ratios, dict):
-            # Check classes in dict match classes in data
-            classes = np.unique(df[class_attr])
-            dict_classes = list(manual_class_ratios.keys())
-
-            if set(dict_classes).issubset([str(i) for i in classes]):
-                # Mask for just those classes in the provided dictionary
-                mask = np.isin(classes, np.array(dict_classes).astype(type(classes[0])))
-                classes = classes[mask]
-                # Run sampling
-                for _class in classes:
-                    no_of_points = manual_class_ratios.get(str(_class))
-                    n_available = class_ratio[class_ratio["class"] == _class][
-                        "n_available"
-                    ].values[0]
-                    if n_available >= no_of_points:
-                        logger.info(
-                            "Class "
-                            + str(_class)
-                            + ": sampling at "
-                            + str(round(no_of_points))
-                            + " locations"
-                        )
-                    else:
-                        no_of_points = n_available
-                        logger.info(
-                            "Class "
-                            + str(_class)
-                            + ": not enough pixels as requested, sampling at all "
-                            + str(int(no_of_points))
-                            + " locations"
-                        )
-                    sample_loc = df[df[class_attr] == _class].sample(
-                        n=int(round(no_of_points))
-                    )
-                    samples.append(sample_loc)
-
-            #                     try:
-            #                         sample_loc = df[df[class_attr] == _class].sample(n=int(round(no_of_points)))
-            #                         logger.info('Class '+ str(_class)+ ': sampled at '+ str(round(no_of_points)) + ' locations')
-            #                         samples.append(sample_loc)
-
-            #                     except ValueError:
-            #                         logger.info('Requested more sample points than population of pixels for class '+ str(_class)+', skipping')
-            #                         pass
-
-            else:
-                raise LdnError(
-                    "Some or all of the classes in 'manual_class_ratio' dictionary do not"
-                    + " match the classes in the supplied dataArray. "
-                    + "DataArray classes: "
-                    + str(classes)
-                    + ", Supplied dict classes: "
-                    + str(list(manual_class_ratios.keys()))
-                )
-
-        else:
-            raise LdnError(
-                "Must supply a dictionary mapping {'class': numofpoints} if sampling"
-                + " is set to 'manual'"
-            )
-
-    # Join back into single dataframe
-    all_samples = pd.concat([samples[i] for i in range(0, len(samples))])
-
-    # Get pd.multiindex coords as list
-    y = [i[0] for i in list(all_samples.index)]
-    x = [i[1] for i in list(all_samples.index)]
-
-    # Get CRS from the DataArray
-    if hasattr(da, "rio") and da.rio.crs is not None:
-        crs = da.rio.crs
-    elif hasattr(da, "spatial_ref"):
-        crs = da.spatial_ref
-    else:
-        crs = da.attrs.get("crs", None)
-
-    # Create geopandas dataframe and ensure output is in WGS84.
-    gdf = gpd.GeoDataFrame(
-        all_samples, crs=crs, geometry=gpd.points_from_xy(x, y)
-    ).reset_index()
-
-    gdf = gdf.drop(["latitude", "longitude"], axis=1)
-
-    if crs is not None and gdf.crs is not None and gdf.crs.to_epsg() != 4326:
-        gdf = gdf.to_crs("EPSG:4326")
-
-    if out_fname is not None:
-        gdf.to_file(out_fname)
-
-    return gdf
+# Forked from https://github.com/frontiersi/FAO_LC_workshop_Rwanda/blob/main/random_sampling.py
+import logging
+from typing import Iterator
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from ldn.utils import LdnError
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_STRATEGIES = [
+    "stratified_random",
+    "equal_stratified_random",
+    "random",
+    "manual",
+]
+
+# Rows read at once from arrays that aren't chunked with dask.
+DEFAULT_CHUNK_ROWS = 1024
+
+# Stratum key used for the 'random' strategy, which samples all classes together.
+_ALL_CLASSES = "all"
+
+
+def _row_blocks(values, chunk_rows: int) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield (first row, block) for consecutive row blocks of a 2D numpy or dask array.
+
+    Only one block is loaded into memory at once.
+    """
+    for row in range(0, values.shape[0], chunk_rows):
+        yield row, np.asarray(values[row : row + chunk_rows])
+
+
+def _valid(block: np.ndarray, drop_value) -> np.ndarray:
+    valid = block != drop_value
+    if block.dtype.kind == "f":
+        valid &= ~np.isnan(block)
+    return valid
+
+
+def count_classes(values, drop_value=0, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """Count the pixels of each class of a 2D class array, one row block at a time.
+
+    Args:
+        values: 2D numpy or dask array of classes.
+        drop_value: Value to exclude from the counts. NaN is always excluded.
+        chunk_rows: Number of rows read at once.
+
+    Returns:
+        Mapping of class value to pixel count.
+    """
+    counts: dict = {}
+    for _, block in _row_blocks(values, chunk_rows):
+        classes, class_counts = np.unique(
+            block[_valid(block, drop_value)], return_counts=True
+        )
+        for _class, count in zip(classes.tolist(), class_counts.tolist()):
+            counts[_class] = counts.get(_class, 0) + count
+    return counts
+
+
+def allocate_samples(
+    counts: dict,
+    n: int,
+    min_sample_n: int = 5,
+    sampling: str = "stratified_random",
+    manual_class_ratios: dict | None = None,
+) -> dict:
+    """Decide how many points to sample from each class.
+
+    Args:
+        counts: Mapping of class value to pixel count, from count_classes.
+        n: Total number of points. Ignored for 'manual' sampling.
+        min_sample_n: Minimum number of points per class for 'stratified_random'.
+        sampling: One of SAMPLING_STRATEGIES. See random_sampling.
+        manual_class_ratios: {'class': numofpoints} for 'manual' sampling.
+
+    Returns:
+        Mapping of class value (or 'all' for 'random' sampling) to number of points,
+        never more than the number of pixels available.
+    """
+    total = sum(counts.values())
+    class_ratio = pd.DataFrame(
+        {
+            "proportion": {c: count / total for c, count in counts.items()},
+            "n_available": counts,
+        }
+    ).sort_values("n_available", ascending=False)
+    logger.info(class_ratio)
+
+    def limit(_class, no_of_points, n_available) -> int:
+        if n_available >= no_of_points:
+            logger.info(f"Class {_class}: sampling at {round(no_of_points)} locations")
+            return min(int(round(no_of_points)), n_available)
+        logger.info(
+            f"Class {_class}: not enough pixels as requested, sampling at all"
+            f" {n_available} locations"
+        )
+        return n_available
+
+    if sampling == "stratified_random":
+        return {
+            _class: limit(
+                _class, max(min_sample_n, n * row.proportion), int(row.n_available)
+            )
+            for _class, row in class_ratio.iterrows()
+        }
+
+    if sampling == "equal_stratified_random":
+        return {
+            _class: limit(_class, n / len(counts), count)
+            for _class, count in sorted(counts.items())
+        }
+
+    if sampling == "random":
+        logger.info(f"Randomly sampling dataArray at {round(n)} locations")
+        return {_ALL_CLASSES: min(int(round(n)), total)}
+
+    if sampling == "manual":
+        if not isinstance(manual_class_ratios, dict):
+            raise LdnError(
+                "Must supply a dictionary mapping {'class': numofpoints} if sampling"
+                + " is set to 'manual'"
+            )
+        classes = sorted(counts)
+        if not set(manual_class_ratios).issubset([str(c) for c in classes]):
+            raise LdnError(
+                "Some or all of the classes in 'manual_class_ratio' dictionary do not"
+                + " match the classes in the supplied dataArray. "
+                + "DataArray classes: "
+                + str(classes)
+                + ", Supplied dict classes: "
+                + str(list(manual_class_ratios.keys()))
+            )
+        return {
+            _class: limit(_class, manual_class_ratios[str(_class)], counts[_class])
+            for _class in classes
+            if str(_class) in manual_class_ratios
+        }
+
+    raise LdnError(
+        "Sampling strategy must be one of 'stratified_random', "
+        + "'equal_stratified_random', 'random', or 'manual'"
+    )
+
+
+def draw_samples(
+    values,
+    counts: dict,
+    allocation: dict,
+    rng: np.random.Generator,
+    drop_value=0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Draw pixels uniformly at random, without replacement, from each class.
+
+    For each class, the ordinal positions of the chosen pixels (their rank among
+    that class's pixels in row-major order) are drawn up front. A second pass
+    over the row blocks then picks those pixels out, so memory is one block plus
+    the samples.
+
+    Args:
+        values: 2D numpy or dask array of classes.
+        counts: Mapping of class value to pixel count, from count_classes.
+        allocation: Mapping of class value (or 'all') to number of points, from
+            allocate_samples.
+        rng: Random number generator.
+        drop_value: Value to exclude from sampling.
+        chunk_rows: Number of rows read at once.
+
+    Returns:
+        (rows, cols, classes) arrays of the sampled pixels.
+    """
+    available = (
+        {_ALL_CLASSES: sum(counts.values())} if _ALL_CLASSES in allocation else counts
+    )
+    chosen = {
+        stratum: np.sort(rng.choice(available[stratum], size=k, replace=False))
+        for stratum, k in allocation.items()
+        if k > 0
+    }
+    seen = dict.fromkeys(chosen, 0)
+
+    rows, cols, classes = ({stratum: [] for stratum in chosen} for _ in range(3))
+    for first_row, block in _row_blocks(values, chunk_rows):
+        valid = _valid(block, drop_value)
+        for stratum, ordinals in chosen.items():
+            in_stratum = valid if stratum == _ALL_CLASSES else block == stratum
+            positions = np.flatnonzero(in_stratum)
+            start = seen[stratum]
+            seen[stratum] += len(positions)
+            lo, hi = np.searchsorted(ordinals, [start, seen[stratum]])
+            picked = positions[ordinals[lo:hi] - start]
+            block_rows, block_cols = np.unravel_index(picked, block.shape)
+            rows[stratum].append(block_rows + first_row)
+            cols[stratum].append(block_cols)
+            classes[stratum].append(block.ravel()[picked])
+
+    # Group by stratum, so the output doesn't depend on the block size.
+    if not chosen:
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+    return tuple(
+        np.concatenate([part for stratum in chosen for part in parts[stratum]])
+        for parts in (rows, cols, classes)
+    )
+
+
+def random_sampling(
+    da,
+    n,
+    min_sample_n=5,
+    sampling="stratified_random",
+    manual_class_ratios=None,
+    out_fname=None,
+    class_attr="class",
+    drop_value=0,
+    seed=None,
+    chunk_rows=None,
+):
+    """
+    Creates randomly sampled points for post-classification
+    accuracy assessment.
+
+    The classification is streamed in row blocks twice, once to count the
+    pixels in each class and once to pick out the sampled pixels, so memory
+    does not grow with the size of the DataArray.
+
+    Params:
+    -------
+    da: xarray.DataArray
+        A classified 2-dimensional xarray.DataArray, with y then x
+        dimensions. It may be backed by dask.
+    n: int
+        Total number of points to sample. Ignored if providing
+        a dictionary of {class:numofpoints} to 'manual_class_ratios'
+    min_sample_n: int
+        Minimum number of samples to generate per class
+    sampling: str
+        'stratified_random' = Create points that are randomly
+        distributed within each class, where each class has a
+        number of points proportional to its relative area.
+        'equal_stratified_random' = Create points that are randomly
+        distributed within each class, where each class has the
+        same number of points.
+        'random' = Create points that are randomly distributed
+        throughout the image.
+        'manual' = user definined, each class is allocated a
+        specified number of points, supply a manual_class_ratio
+        dictionary mapping number of points to each class
+    manual_class_ratios: dict
+        If setting sampling to 'manual', the provide a dictionary
+        of type {'class': numofpoints} mapping the number of points
+        to generate for each class.
+    out_fname: str
+        If providing a filepath name, e.g 'sample_points.shp', the
+        function will export a shapefile/geojson of the sampling
+        points to file.
+    class_attr: str
+        Column name of output dataframe that contains the integer
+        class values on the classification map.
+    drop_value: integer
+        Pixel value on the classification map to be excluded from sampling.
+    seed: int
+        Seed for the random number generator, for reproducible samples.
+    chunk_rows: int
+        Number of rows read at once. Defaults to the dask chunk
+        height, or 1024 rows for in-memory arrays.
+
+    Output
+    ------
+    GeoPandas.Dataframe
+
+    """
+
+    if sampling not in SAMPLING_STRATEGIES:
+        raise LdnError(
+            "Sampling strategy must be one of 'stratified_random', "
+            + "'equal_stratified_random', 'random', or 'manual'"
+        )
+
+    da = da.squeeze()
+    if da.ndim != 2:
+        raise LdnError(f"Expected a 2-dimensional DataArray, got dims {da.dims}")
+    values = da.data
+    if chunk_rows is None:
+        chunk_rows = da.chunks[0][0] if da.chunks else DEFAULT_CHUNK_ROWS
+
+    counts = count_classes(values, drop_value=drop_value, chunk_rows=chunk_rows)
+    if not counts:
+        raise LdnError("The DataArray has no pixels to sample.")
+    allocation = allocate_samples(
+        counts, n, min_sample_n, sampling, manual_class_ratios
+    )
+    rows, cols, classes = draw_samples(
+        values,
+        counts,
+        allocation,
+        np.random.default_rng(seed),
+        drop_value=drop_value,
+        chunk_rows=chunk_rows,
+    )
+
+    y_dim, x_dim = da.dims
+    y = da[y_dim].values[rows]
+    x = da[x_dim].values[cols]
+    samples = pd.DataFrame({class_attr: classes.astype(da.dtype)})
+    # Scalar coordinates, such as spatial_ref or time, become constant columns.
+    for name, coord in da.coords.items():
+        if coord.ndim == 0:
+            samples[name] = coord.item()
+
+    # Get CRS from the DataArray
+    if hasattr(da, "rio") and da.rio.crs is not None:
+        crs = da.rio.crs
+    elif hasattr(da, "spatial_ref"):
+        crs = da.spatial_ref
+    else:
+        crs = da.attrs.get("crs", None)
+
+    # Create geopandas dataframe and ensure output is in WGS84.
+    gdf = gpd.GeoDataFrame(samples, crs=crs, geometry=gpd.points_from_xy(x, y))
+
+    if crs is not None and gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+
+    if out_fname is not None:
+        gdf.to_file(out_fname)
+
+    return gdf
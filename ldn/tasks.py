@@ -0,0 +1,161 @@
+import logging
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+
+from ldn.grids import get_gadm, get_gadm_store
+from ldn.utils import ALL_COUNTRIES, LdnError
+
+logger = logging.getLogger(__name__)
+
+# Equal-area CRS used to compare tile and land areas.
+AREA_CRS = "EPSG:6933"
+
+# Used when a tile has no entry in the scene count table.
+DEFAULT_SCENE_COUNT = 100
+
+# Even a tile with a sliver of land still has to search, load and write, so never estimate below this.
+MIN_LAND_FRACTION = 0.05
+
+
+def tile_land_fractions(tiles: gpd.GeoDataFrame) -> dict[str, float]:
+    """Estimate the fraction of each tile covered by land, using GADM country geometries.
+
+    Args:
+        tiles: GeoDataFrame of tiles as returned by get_grid_tiles(format="gdf"),
+            with 'label' and 'geometry' columns.
+
+    Returns:
+        Mapping of tile label (e.g. "58_43") to land fraction in [0, 1].
+    """
+    get_gadm(countries=ALL_COUNTRIES)
+    # Fractions are estimates, so the simplified geometries are fine if they've been written.
+    store = get_gadm_store(simplified=True)
+    tiles_area = tiles.to_crs(AREA_CRS)
+
+    tree = store.tree(AREA_CRS)
+    land_geoms = tree.geometries
+
+    fractions = {}
+    for label, tile_geom in zip(tiles_area["label"], tiles_area.geometry):
+        tile_area = tile_geom.area
+        if tile_area == 0:
+            fractions[str(label)] = 0.0
+            continue
+        land_area = sum(
+            land_geoms[i].intersection(tile_geom).area
+            for i in tree.query(tile_geom, predicate="intersects")
+        )
+        fractions[str(label)] = min(land_area / tile_area, 1.0)
+
+    return fractions
+
+
+def load_scene_counts(path: Path) -> dict[tuple[str, str | None], int]:
+    """Load a cached table of expected scene counts per tile (and optionally per year).
+
+    The table is a CSV with 'id' and 'scene_count' columns, and an optional
+    'year' column. Rows without a year apply to every year of that tile.
+
+    Args:
+        path: Path to the CSV file.
+
+    Returns:
+        Mapping of (tile id, year or None) to scene count.
+    """
+    table = pd.read_csv(path, dtype={"id": str, "year": str})
+    if not {"id", "scene_count"}.issubset(table.columns):
+        raise LdnError(
+            f"Scene count table {path} must have 'id' and 'scene_count' columns."
+        )
+
+    years = table["year"] if "year" in table.columns else [None] * len(table)
+    return {
+        (tile_id, None if pd.isna(year) else year): int(count)
+        for tile_id, year, count in zip(table["id"], years, table["scene_count"])
+    }
+
+
+def estimate_task_cost(
+    task: dict,
+    land_fractions: dict[str, float],
+    scene_counts: dict[tuple[str, str | None], int],
+    ls7_buffer_years: int = 1,
+) -> float:
+    """Estimate the relative cost of a tile-year task.
+
+    Cost is the expected number of scenes scaled by the fraction of the
+    tile that is land, so one unit is roughly one all-land scene.
+
+    Args:
+        task: Task dict with 'id' and 'year' keys.
+        land_fractions: Mapping of tile label to land fraction.
+        scene_counts: Mapping of (tile id, year or None) to scene count.
+        ls7_buffer_years: Half-width of the temporal buffer that geomad uses for the LS7 era (<=2012).
+
+    Returns:
+        The estimated cost of the task.
+    """
+    tile_id, year = task["id"], task["year"]
+
+    scene_count = scene_counts.get((tile_id, year))
+    if scene_count is None:
+        scene_count = scene_counts.get((tile_id, None), DEFAULT_SCENE_COUNT)
+        # Per-tile counts are for a single year, but the LS7 era searches a buffered window.
+        if int(year) <= 2012:
+            scene_count *= 2 * ls7_buffer_years + 1
+
+    land_fraction = max(land_fractions.get(tile_id, 1.0), MIN_LAND_FRACTION)
+    return round(scene_count * land_fraction, 2)
+
+
+def pack_tasks(tasks: list[dict], batch_cost: float, large_cost: float) -> list[dict]:
+    """Bin-pack cheap tasks into batches and give expensive tasks their own batch.
+
+    Uses first-fit decreasing. Tasks must have a 'cost' key.
+
+    Args:
+        tasks: Task dicts with a 'cost' key.
+        batch_cost: Maximum total cost of a batch of cheap tasks.
+        large_cost: Tasks at or above this cost get their own 'large' batch.
+
+    Returns:
+        List of batches, each with 'id', 'size', 'cost' and 'tasks' keys.
+    """
+    if batch_cost <= 0:
+        raise LdnError("Batch cost must be greater than 0.")
+
+    large = [t for t in tasks if t["cost"] >= large_cost]
+    small = sorted(
+        (t for t in tasks if t["cost"] < large_cost),
+        key=lambda t: t["cost"],
+        reverse=True,
+    )
+
+    bins: list[list[dict]] = []
+    bin_costs: list[float] = []
+    for task in small:
+        for i, cost in enumerate(bin_costs):
+            if cost + task["cost"] <= batch_cost:
+                bins[i].append(task)
+                bin_costs[i] += task["cost"]
+                break
+        else:
+            bins.append([task])
+            bin_costs.append(task["cost"])
+
+    packed = [
+        ("large", t["cost"], [t])
+        for t in sorted(large, key=lambda t: t["cost"], reverse=True)
+    ] + [("small", cost, b) for b, cost in zip(bins, bin_costs)]
+    batches = [
+        {"id": f"batch_{i:04d}", "size": size, "cost": round(cost, 2), "tasks": b}
+        for i, (size, cost, b) in enumerate(packed)
+    ]
+
+    logger.info(
+        f"Packed {len(tasks)} tasks into {len(batches)} batches "
+        f"({len(large)} large, {len(bins)} small)."
+    )
+    return batches
@@ -0,0 +1,64 @@
+import dask.array as da
+import numpy as np
+import xarray as xr
+from scipy.ndimage import generic_filter
+
+from ldn.focal import class_fractions, heterogeneity, majority_filter
+
+
+def _random_classes(shape=(23, 19), seed=0):
+    rng = np.random.default_rng(seed)
+    classes = rng.integers(1, 8, size=shape).astype(np.uint8)
+    classes[rng.random(shape) < 0.2] = 255
+    return classes
+
+
+def _unique_count(window):
+    window = window[(window >= 1) & (window <= 7)]
+    return len(np.unique(window))
+
+
+def test_heterogeneity_matches_generic_filter():
+    classes = _random_classes()
+
+    expected = generic_filter(classes, _unique_count, size=5, mode="constant", cval=255)
+
+    np.testing.assert_array_equal(heterogeneity(classes, 5), expected)
+
+
+def test_majority_filter_and_ties():
+    classes = np.array(
+        [
+            [1, 1, 2, 255],
+            [1, 3, 2, 2],
+            [4, 4, 2, 2],
+        ],
+        dtype=np.uint8,
+    )
+
+    filtered = majority_filter(classes, 3)
+
+    np.testing.assert_array_equal(
+        filtered,
+        [
+            [1, 1, 2, 255],
+            [1, 1, 2, 2],  # A 1/2 tie, without the pixel's own class, takes 1.
+            [4, 4, 2, 2],  # A 4/2 tie keeps the pixel's own class.
+        ],
+    )
+
+
+def test_dask_chunks_match_numpy():
+    classes = _random_classes((40, 37), seed=1)
+    chunked = xr.DataArray(da.from_array(classes, chunks=(9, 11)), dims=("y", "x"))
+
+    for func in (heterogeneity, majority_filter):
+        result = func(chunked, 5)
+        assert isinstance(result.data, da.Array)
+        np.testing.assert_array_equal(result.values, func(classes, 5))
+
+    fractions = class_fractions(chunked, 3)
+    assert fractions.dims == ("class", "y", "x")
+    np.testing.assert_allclose(fractions.values, class_fractions(classes, 3))
+    valid = ~np.isnan(fractions.values[1])
+    np.testing.assert_allclose(fractions.values[1:].sum(axis=0)[valid], 1, rtol=1e-6)
@@ -1,7 +1,17 @@
+from unittest.mock import patch
+
+import dask.array as da
 import numpy as np
+import pytest
 import xarray as xr
 
-from ldn.geomad import GeoMADProcessor, LANDSAT_BANDS, set_stac_properties
+from ldn.geomad import (
+    GeoMADProcessor,
+    LANDSAT_BANDS,
+    compute_in_blocks,
+    delete_checkpoint,
+    set_stac_properties,
+)
 
 EXPECTED_BANDS = [
     "nir08",
@@ -115,3 +125,93 @@ def test_set_stac_properties_datetime_three_year_span() -> None:
     assert props["start_datetime"] == expected_start
     assert props["datetime"] == expected_midpoint
     assert props["end_datetime"] == expected_end
+
+
+def _lazy_geomad(calls: list, fail_after: int | None = None) -> xr.Dataset:
+    """A lazy 6 x 4 'GeoMAD' in 2 x 2 chunks that records which blocks are computed."""
+
+    def block(x, block_info=None):
+        location = tuple(block_info[0]["chunk-location"])
+        if fail_after is not None and len(calls) >= fail_after:
+            raise RuntimeError("Preempted")
+        calls.append(location)
+        return x + 1
+
+    red = da.zeros((6, 4), chunks=2, dtype="uint16").map_blocks(block, dtype="uint16")
+    coords = {"y": np.arange(6.0), "x": np.arange(4.0), "spatial_ref": 0}
+    geomad = xr.Dataset(
+        {"red": (("y", "x"), red), "emad": (("y", "x"), red.astype("float32") / 2)},
+        coords=coords,
+    )
+    geomad["red"].attrs["nodata"] = 0
+    return geomad
+
+
+def test_compute_in_blocks_resumes_completed_blocks(tmp_path) -> None:
+    store = str(tmp_path / "checkpoint.zarr")
+
+    first_calls: list = []
+    with pytest.raises(RuntimeError):
+        compute_in_blocks(_lazy_geomad(first_calls, fail_after=3), 2, store)
+
+    resumed_calls: list = []
+    result = compute_in_blocks(_lazy_geomad(resumed_calls), 2, store)
+
+    # The first run saved 3 of the 6 blocks before failing, and only the rest are redone.
+    assert len(first_calls) == 3
+    all_blocks = {(y, x) for y in range(3) for x in range(2)}
+    assert set(resumed_calls) == all_blocks - set(first_calls)
+    assert result["red"].dtype == np.uint16
+    assert result["red"].attrs["nodata"] == 0
+    assert "spatial_ref" in result.coords
+    np.testing.assert_array_equal(result["red"].values, np.ones((6, 4)))
+    np.testing.assert_array_equal(result["emad"].values, np.full((6, 4), 0.5))
+
+    delete_checkpoint(store)
+    assert not (tmp_path / "checkpoint.zarr").exists()
+
+
+def test_compute_in_blocks_restarts_when_options_change(tmp_path) -> None:
+    store = str(tmp_path / "checkpoint.zarr")
+    options = {"bands": ["red"], "mask_clouds_kwargs": {"include_shadow": True}}
+
+    first_calls: list = []
+    with pytest.raises(RuntimeError):
+        compute_in_blocks(
+            _lazy_geomad(first_calls, fail_after=3), 2, store, options=options
+        )
+
+    # Saved blocks computed without shadow masking can't be reused.
+    options["mask_clouds_kwargs"]["include_shadow"] = False
+    resumed_calls: list = []
+    compute_in_blocks(_lazy_geomad(resumed_calls), 2, store, options=options)
+
+    assert len(resumed_calls) == 6
+
+
+def _fake_geomedian_with_mads(data: xr.Dataset, **kwargs) -> xr.Dataset:
+    """A lazy stand-in for geomedian_with_mads: the per-pixel maximum and a count."""
+    result = data.max("time")
+    result["count"] = (data["red"] != 0).sum("time").astype("uint16")
+    return result
+
+
+@patch("ldn.geomad.geomedian_with_mads", _fake_geomedian_with_mads)
+def test_subtiled_process_matches_whole_tile() -> None:
+    input_ds = _make_landsat_input(n_times=3, size=9)
+    # Cloud in one pixel of the first timestep, near the window edges, so the
+    # cloud mask dilation crosses into neighbouring windows.
+    input_ds["qa_pixel"][:] = 1 << 6
+    input_ds["qa_pixel"][0, 4, 4] = 1 << 3
+    input_ds = input_ds.chunk({"y": 3, "x": 3})
+    options = dict(
+        min_timesteps=1,
+        drop_vars=["qa_pixel", "qa_radsat"],
+        mask_clouds_kwargs={"filters": [("dilation", 2)], "include_shadow": False},
+    )
+
+    whole = GeoMADProcessor(**options).process(input_ds)
+    subtiled = GeoMADProcessor(subtile_size=3, **options).process(input_ds)
+
+    xr.testing.assert_equal(whole, subtiled)
+    assert (whole["count"] == 2).sum() == 13  # The radius 2 dilated cloud is masked.
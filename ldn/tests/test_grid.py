@@ -1,4 +1,24 @@
+from unittest.mock import patch
+
+import geopandas as gpd
+import pytest
+from antimeridian import fix_polygon
+from odc.geo import XY
+from odc.geo.geom import Geometry
+from odc.geo.gridspec import GridSpec
+from shapely.geometry import box
+
 from ldn.cli_grid import list_countries
+from ldn.grids import (
+    GadmStore,
+    _clear_gadm_caches,
+    get_gadm,
+    get_gadm_store,
+    get_gridspec,
+    get_tile_geobox,
+    tiles_from_geometries,
+)
+from ldn.utils import LdnError
 
 ldn_countries = {
     "American Samoa": "ASM",
@@ -66,3 +86,103 @@ ldn_countries = {
 
 def test_list_countries() -> None:
     assert list_countries() == ldn_countries
+
+
+def _gadm() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {"GID_0": ["FJI", "FJI", "TON"]},
+        geometry=[
+            box(177, -18, 178, -17),
+            box(179.5, -17, 180, -16),
+            box(-175.5, -21.5, -175, -21),
+        ],
+        crs="EPSG:4326",
+    )
+
+
+def test_gadm_store_memoises_country_variants() -> None:
+    store = GadmStore(_gadm())
+
+    fiji = store.country_geometry("FJI")
+    buffered = store.country_geometry("FJI", 1000, crs="EPSG:3832")
+
+    assert fiji.geom_type == "MultiPolygon"
+    assert store.country_geometry("FJI") is fiji
+    assert store.country_geometry("FJI", 1000, crs="EPSG:3832") is buffered
+    assert buffered.area > store.country_geometry("FJI", crs="EPSG:3832").area
+    with pytest.raises(LdnError):
+        store.country_geometry("XXX")
+
+
+def test_gadm_store_query_uses_one_tree_per_crs() -> None:
+    store = GadmStore(_gadm())
+
+    hits = store.query(box(177.5, -17.5, 180, -16.5))
+
+    assert hits["GID_0"].to_list() == ["FJI"]
+    assert store.tree() is store.tree()
+    assert store.query(box(0, 0, 1, 1)).empty
+
+
+def test_get_gadm_reads_the_geopackage_once(tmp_path) -> None:
+    path = tmp_path / "gadm.gpkg"
+    _gadm().to_file(path, driver="GPKG")
+    _clear_gadm_caches()
+
+    with (
+        patch("ldn.grids.GADM_FILE", path),
+        patch("ldn.grids.gpd.read_file", wraps=gpd.read_file) as mock_read,
+    ):
+        fiji = get_gadm(countries={"Fiji": "FJI"})
+        tonga = get_gadm(countries={"Tonga": "TON"})
+        store = get_gadm_store()
+    _clear_gadm_caches()
+
+    assert len(fiji) == 2 and len(tonga) == 1
+    assert store.countries["GID_0"].to_list() == ["FJI", "TON"]
+    mock_read.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "grid",
+    [
+        get_gridspec("non-pacific"),
+        # A Pacific Mercator grid with tiles crossing the antimeridian.
+        GridSpec(
+            crs=3832,
+            tile_shape=(3200, 3200),
+            resolution=30,
+            origin=XY(-3_000_000.0, -4_000_000.0),
+        ),
+    ],
+)
+def test_tiles_from_geometries_matches_tiles_from_geopolygon(grid) -> None:
+    geometries = _gadm().geometry
+
+    tiles = tiles_from_geometries(grid, geometries, "test")
+
+    expected = {}
+    for geometry in geometries:
+        for index, geobox in grid.tiles_from_geopolygon(
+            Geometry(geometry, crs="EPSG:4326")
+        ):
+            expected[index] = fix_polygon(
+                geobox.extent.to_crs("EPSG:4326").geom, fix_winding=True
+            )
+    assert set(zip(tiles["x_index"], tiles["y_index"])) == set(expected)
+    for x, y, label, extent in zip(
+        tiles["x_index"], tiles["y_index"], tiles["label"], tiles.geometry
+    ):
+        assert label == f"{x}_{y}"
+        assert extent.symmetric_difference(expected[(x, y)]).area < 1e-9
+    assert (tiles["region"] == "test").all()
+
+
+def test_tile_geoboxes_are_memoised() -> None:
+    grid = get_gridspec("non-pacific")
+
+    geobox = get_tile_geobox("non-pacific", (119, 126))
+
+    assert get_gridspec("non-pacific") is grid
+    assert geobox == grid.tile_geobox((119, 126))
+    assert get_tile_geobox("non-pacific", (119, 126)) is geobox
@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import geopandas as gpd
+import numpy as np
+import xarray as xr
+from odc.geo.geobox import GeoBox
+from odc.geo.geom import box
+from odc.geo.xr import xr_zeros
+
+from ldn.grids import GadmStore
+from ldn.landmask import skip_chunks_outside, tile_land_geometry, tile_land_mask
+
+# A 400 x 400 pixel tile of 30 m pixels, loaded in 100 x 100 pixel chunks.
+GEOBOX = GeoBox.from_bbox((0, 0, 12_000, 12_000), crs="EPSG:6933", resolution=30)
+
+
+def _lazy_band(reads: list) -> xr.DataArray:
+    def read(block, block_info=None):
+        reads.append(tuple(block_info[0]["chunk-location"]))
+        return block + 7
+
+    band = xr_zeros(GEOBOX, chunks=(100, 100), dtype="uint16")
+    band = band.copy(data=band.data.map_blocks(read, dtype="uint16"))
+    band.attrs["nodata"] = 0
+    return band.expand_dims(time=2).chunk(time=1)
+
+
+def test_skip_chunks_outside_never_reads_ocean_chunks():
+    reads: list = []
+    ds = xr.Dataset({"red": _lazy_band(reads)})
+    # Land in the top left chunk only.
+    land = box(500, 10_000, 2000, 11_500, crs="EPSG:6933")
+
+    result = skip_chunks_outside(ds, land).compute()
+
+    assert set(reads) == {(0, 0)}
+    assert result["red"].dtype == np.uint16
+    assert result["red"].attrs["nodata"] == 0
+    assert (result["red"].values[:, :100, :100] == 7).all()
+    assert (result["red"].values[:, 100:, :] == 0).all()
+
+
+def test_tile_land_geometry_is_buffered_and_cached(tmp_path):
+    island = box(4000, 4000, 5000, 5000, crs="EPSG:6933").to_crs("EPSG:4326")
+    gadm = gpd.GeoDataFrame(
+        {"GID_0": ["TUV", "FJI"]},
+        geometry=[island.geom, box(100, -20, 101, -19, crs="EPSG:4326").geom],
+        crs="EPSG:4326",
+    )
+
+    with patch(
+        "ldn.landmask.get_gadm_store", return_value=GadmStore(gadm)
+    ) as mock_gadm:
+        land = tile_land_geometry(GEOBOX, buffer_m=1000, cache_dir=tmp_path)
+        cached = tile_land_geometry(GEOBOX, buffer_m=1000, cache_dir=tmp_path)
+
+    mock_gadm.assert_called_once()
+    assert np.isclose(land.area, cached.area)
+    # The 1 km island grown by 1 km, with rounded corners.
+    assert 8e6 < land.area < 9e6
+
+
+def test_tile_land_mask_is_rasterised_once(tmp_path):
+    land = box(0, 9000, 3000, 12_000, crs="EPSG:6933")
+
+    with patch("ldn.landmask.tile_land_geometry", return_value=land) as mock_land:
+        mask = tile_land_mask(GEOBOX, buffer_m=0, cache_dir=tmp_path)
+        cached = tile_land_mask(GEOBOX, buffer_m=0, cache_dir=tmp_path)
+
+    mock_land.assert_called_once()
+    assert mask.shape == (400, 400) and mask.dtype == bool
+    assert (mask == cached).all()
+    # 100 x 100 pixels in the top left corner, plus the row and column touching its edges.
+    assert mask[:100, :100].all()
+    assert 100 * 100 <= mask.sum() <= 101 * 101
+
+
+def test_tile_land_geometry_includes_buffered_land_outside_the_tile(tmp_path):
+    # A 1 km island 500 m east of the tile, and a country far away.
+    island = box(12_500, 4000, 13_500, 5000, crs="EPSG:6933").to_crs("EPSG:4326")
+    gadm = gpd.GeoDataFrame(
+        {"GID_0": ["TUV", "FJI"]},
+        geometry=[island.geom, box(100, -20, 101, -19, crs="EPSG:4326").geom],
+        crs="EPSG:4326",
+    )
+
+    with patch("ldn.landmask.get_gadm_store", return_value=GadmStore(gadm)):
+        land = tile_land_geometry(GEOBOX, buffer_m=1000, cache_dir=None)
+
+    # A 500 m strip of the island's buffer reaches into the tile.
+    assert 0.5e6 < land.area < 1.5e6
+    assert land.boundingbox.left >= 11_500
@@ -1,10 +1,18 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from cogeo_mosaic.errors import MosaicNotFoundError
 from cogeo_mosaic.mosaic import MosaicJSON
 from typer.testing import CliRunner
 
-from ldn.cli import _stac_self_link, _build_mosaic_for_year, app
+from ldn.cli import (
+    _feature_overlaps_years,
+    _load_features_by_year,
+    _mosaic_from_features,
+    _stac_self_link,
+    _update_mosaic,
+    app,
+)
 from ldn.utils import GEOMAD_VERSION, PREDICTION_VERSION, LdnError
 
 
@@ -25,14 +33,15 @@ def test_stac_self_link_returns_self_href():
     assert _stac_self_link(feature) == "https://example.com/items/item-123"
 
 
-# _build_mosaic_for_year
+# _mosaic_from_features
 
 
-def _make_stac_item(item_id: str, bbox: list[float]) -> MagicMock:
-    """Helper to create a mock STAC item with a Polygon geometry from a bbox."""
+def _make_stac_item(
+    item_id: str, bbox: list[float], start_year: int = 2020, end_year: int = 2020
+) -> dict:
+    """Helper to create a STAC item dict with a Polygon geometry from a bbox."""
     minx, miny, maxx, maxy = bbox
-    item = MagicMock()
-    item.to_dict.return_value = {
+    return {
         "id": item_id,
         "type": "Feature",
         "geometry": {
@@ -48,51 +57,32 @@ def _make_stac_item(item_id: str, bbox: list[float]) -> MagicMock:
             ],
         },
         "links": [{"rel": "self", "href": f"https://example.com/items/{item_id}"}],
-        "properties": {"datetime": "2020-06-01T00:00:00Z"},
+        "properties": {
+            "datetime": f"{(start_year + end_year) // 2}-06-30T00:00:00.000Z",
+            "start_datetime": f"{start_year}-01-01T00:00:00.000Z",
+            "end_datetime": f"{end_year}-12-31T23:59:59.000Z",
+        },
         "assets": {},
     }
-    return item
 
 
-@patch("ldn.cli.search_sync")
-@patch("ldn.cli.ItemCollection")
-def test_build_mosaic_for_year_returns_mosaic(mock_item_collection, mock_search):
-    items = [
+def test_mosaic_from_features_returns_mosaic():
+    features = [
         _make_stac_item("item-1", [103.6, 1.2, 104.0, 1.5]),
         _make_stac_item("item-2", [104.0, 1.2, 104.4, 1.5]),
         _make_stac_item("item-3", [103.6, 1.5, 104.0, 1.8]),
     ]
-    mock_search.return_value = ["raw-item-1", "raw-item-2", "raw-item-3"]
-    mock_item_collection.return_value = items
 
-    mosaic = _build_mosaic_for_year("2020", "https://example.com/stac.parquet")
+    mosaic = _mosaic_from_features(features)
 
-    mock_search.assert_called_once_with(
-        "https://example.com/stac.parquet", datetime="2020"
-    )
     assert isinstance(mosaic, MosaicJSON)
     assert mosaic.minzoom == 5
     assert mosaic.maxzoom == 14
 
 
-@patch("ldn.cli.search_sync")
-@patch("ldn.cli.ItemCollection")
-def test_build_mosaic_for_year_raises_on_empty(mock_item_collection, mock_search):
-    mock_search.return_value = []
-    mock_item_collection.return_value = []
-
-    with pytest.raises(LdnError, match="No STAC items found for year 2020"):
-        _build_mosaic_for_year("2020", "https://example.com/stac.parquet")
-
-
-@patch("ldn.cli.search_sync")
-@patch("ldn.cli.ItemCollection")
-def test_build_mosaic_for_year_converts_multipolygon_to_convex_hull(
-    mock_item_collection, mock_search
-):
+def test_mosaic_from_features_converts_multipolygon_to_convex_hull():
     """Items with MultiPolygon geometries should be converted to convex hull."""
-    item = MagicMock()
-    item.to_dict.return_value = {
+    item = {
         "id": "multi-item",
         "type": "Feature",
         "geometry": {
@@ -106,139 +96,203 @@ def test_build_mosaic_for_year_converts_multipolygon_to_convex_hull(
         "properties": {"datetime": "2020-06-01T00:00:00Z"},
         "assets": {},
     }
-    mock_search.return_value = ["raw"]
-    mock_item_collection.return_value = [item]
 
-    mosaic = _build_mosaic_for_year("2020", "https://example.com/stac.parquet")
+    mosaic = _mosaic_from_features([item])
 
     assert isinstance(mosaic, MosaicJSON)
 
 
-# make_mosaics CLI command
+# _feature_overlaps_years and _load_features_by_year
 
 
-@patch("ldn.cli.MosaicBackend")
-@patch("ldn.cli._build_mosaic_for_year")
-def test_make_mosaics_geomad_single_year(mock_build, mock_backend):
-    mock_mosaic = MagicMock(spec=MosaicJSON)
-    mock_build.return_value = mock_mosaic
+def test_feature_overlaps_years_uses_start_and_end_datetime():
+    item = _make_stac_item("item", [0, 0, 1, 1], start_year=2011, end_year=2013)
+    assert _feature_overlaps_years(item, 2013, 2013)
+    assert _feature_overlaps_years(item, 2010, 2011)
+    assert not _feature_overlaps_years(item, 2014, 2014)
 
-    # MosaicBackend is used as a context manager
-    mock_backend_instance = MagicMock()
-    mock_backend.return_value.__enter__ = MagicMock(return_value=mock_backend_instance)
+
+@patch("ldn.cli.search_sync")
+def test_load_features_by_year_reads_index_once(mock_search):
+    mock_search.return_value = [
+        _make_stac_item("item-2011", [0, 0, 1, 1], start_year=2010, end_year=2012),
+        _make_stac_item("item-2020", [0, 0, 1, 1]),
+        _make_stac_item("item-2021", [0, 0, 1, 1], start_year=2021, end_year=2021),
+    ]
+
+    features_by_year = _load_features_by_year(
+        ["2011", "2020", "2021"], "https://example.com/stac.parquet"
+    )
+
+    mock_search.assert_called_once_with(
+        "https://example.com/stac.parquet", datetime="2010/2021"
+    )
+    assert [f["id"] for f in features_by_year["2011"]] == ["item-2011"]
+    assert [f["id"] for f in features_by_year["2020"]] == ["item-2020"]
+    assert [f["id"] for f in features_by_year["2021"]] == ["item-2021"]
+
+
+@patch("ldn.cli.search_sync")
+def test_load_features_by_year_raises_on_missing_year(mock_search):
+    mock_search.return_value = [_make_stac_item("item-2020", [0, 0, 1, 1])]
+
+    with pytest.raises(LdnError, match="No STAC items found for year 2021"):
+        _load_features_by_year(["2020", "2021"], "https://example.com/stac.parquet")
+
+
+# _update_mosaic
+
+
+def _mock_existing_mosaic(mock_backend, hrefs: list[str]) -> MagicMock:
+    existing = MagicMock()
+    existing.mosaic_def.tiles = {"0123": hrefs}
+    mock_backend.return_value.__enter__ = MagicMock(return_value=existing)
     mock_backend.return_value.__exit__ = MagicMock(return_value=False)
+    return existing
 
-    result = runner.invoke(
+
+@patch("ldn.cli.MosaicBackend")
+def test_update_mosaic_inserts_only_new_items(mock_backend):
+    existing = _mock_existing_mosaic(mock_backend, ["https://example.com/items/item-1"])
+    features = [
+        _make_stac_item("item-1", [0, 0, 1, 1]),
+        _make_stac_item("item-2", [1, 0, 2, 1]),
+    ]
+
+    assert _update_mosaic(features, "s3://bucket/geomad_2020_mosaic.json")
+
+    existing.update.assert_called_once()
+    inserted = existing.update.call_args.args[0]
+    assert [f["id"] for f in inserted] == ["item-2"]
+
+
+@patch("ldn.cli.MosaicBackend")
+def test_update_mosaic_up_to_date_does_not_write(mock_backend):
+    existing = _mock_existing_mosaic(mock_backend, ["https://example.com/items/item-1"])
+
+    assert _update_mosaic(
+        [_make_stac_item("item-1", [0, 0, 1, 1])], "s3://bucket/m.json"
+    )
+    existing.update.assert_not_called()
+
+
+@patch("ldn.cli.MosaicBackend")
+def test_update_mosaic_rebuilds_when_items_removed(mock_backend):
+    _mock_existing_mosaic(
+        mock_backend,
+        ["https://example.com/items/item-1", "https://example.com/items/gone"],
+    )
+
+    assert not _update_mosaic(
+        [_make_stac_item("item-1", [0, 0, 1, 1])], "s3://bucket/m.json"
+    )
+
+
+@patch("ldn.cli.MosaicBackend")
+def test_update_mosaic_rebuilds_when_missing(mock_backend):
+    mock_backend.side_effect = MosaicNotFoundError("missing")
+
+    assert not _update_mosaic(
+        [_make_stac_item("item-1", [0, 0, 1, 1])], "s3://bucket/m.json"
+    )
+
+
+# make_mosaics CLI command
+
+
+def _invoke_make_mosaics(years: str, dataset: str):
+    return runner.invoke(
         app,
         [
             "make-mosaics",
             "--years",
-            "2020",
+            years,
             "--dataset",
-            "geomad",
+            dataset,
             "--version-geomad",
             GEOMAD_VERSION,
             "--version-prediction",
             PREDICTION_VERSION,
+            "--max-workers",
+            "1",
         ],
     )
 
+
+def _features_for_years(years, stac_geoparquet_url):
+    return {year: [_make_stac_item(f"item-{year}", [0, 0, 1, 1])] for year in years}
+
+
+@patch("ldn.cli.MosaicBackend")
+@patch("ldn.cli._load_features_by_year")
+def test_make_mosaics_geomad_single_year(mock_load, mock_backend):
+    mock_load.side_effect = _features_for_years
+
+    # MosaicBackend is used as a context manager
+    mock_backend_instance = MagicMock()
+    mock_backend.return_value.__enter__ = MagicMock(return_value=mock_backend_instance)
+    mock_backend.return_value.__exit__ = MagicMock(return_value=False)
+
+    result = _invoke_make_mosaics("2020", "geomad")
+
     assert result.exit_code == 0, result.output
-    mock_build.assert_called_once_with(
-        "2020",
+    mock_load.assert_called_once_with(
+        ["2020"],
         f"https://s3.us-west-2.amazonaws.com/data.ldn.auspatious.com/ausp_ls_geomad/{GEOMAD_VERSION}/ausp_ls_geomad.parquet",
     )
     mock_backend.assert_called_once()
     # Check the output path contains the expected pattern
     out_path = mock_backend.call_args[0][0]
     assert "geomad_2020_mosaic.json" in out_path
+    assert isinstance(mock_backend.call_args.kwargs["mosaic_def"], MosaicJSON)
 
 
 @patch("ldn.cli.MosaicBackend")
-@patch("ldn.cli._build_mosaic_for_year")
-def test_make_mosaics_prediction_single_year(mock_build, mock_backend):
-    mock_build.return_value = MagicMock(spec=MosaicJSON)
+@patch("ldn.cli._load_features_by_year")
+def test_make_mosaics_prediction_single_year(mock_load, mock_backend):
+    mock_load.side_effect = _features_for_years
     mock_backend.return_value.__enter__ = MagicMock(return_value=MagicMock())
     mock_backend.return_value.__exit__ = MagicMock(return_value=False)
 
-    result = runner.invoke(
-        app,
-        [
-            "make-mosaics",
-            "--years",
-            "2020",
-            "--dataset",
-            "prediction",
-            "--version-geomad",
-            GEOMAD_VERSION,
-            "--version-prediction",
-            PREDICTION_VERSION,
-        ],
-    )
+    result = _invoke_make_mosaics("2020", "prediction")
 
     assert result.exit_code == 0, result.output
-    mock_build.assert_called_once()
+    mock_load.assert_called_once()
     out_path = mock_backend.call_args[0][0]
     assert "prediction_2020_mosaic.json" in out_path
 
 
 @patch("ldn.cli.MosaicBackend")
-@patch("ldn.cli._build_mosaic_for_year")
-def test_make_mosaics_all_builds_both_datasets(mock_build, mock_backend):
-    mock_build.return_value = MagicMock(spec=MosaicJSON)
+@patch("ldn.cli._load_features_by_year")
+def test_make_mosaics_all_builds_both_datasets(mock_load, mock_backend):
+    mock_load.side_effect = _features_for_years
     mock_backend.return_value.__enter__ = MagicMock(return_value=MagicMock())
     mock_backend.return_value.__exit__ = MagicMock(return_value=False)
 
-    result = runner.invoke(
-        app,
-        [
-            "make-mosaics",
-            "--years",
-            "2020",
-            "--dataset",
-            "all",
-            "--version-geomad",
-            GEOMAD_VERSION,
-            "--version-prediction",
-            PREDICTION_VERSION,
-        ],
-    )
+    result = _invoke_make_mosaics("2020", "all")
 
     assert result.exit_code == 0, result.output
-    assert mock_build.call_count == 2
+    assert mock_load.call_count == 2
+    assert mock_backend.call_count == 2
 
-    called_urls = [c.args[1] for c in mock_build.call_args_list]
+    called_urls = [c.args[1] for c in mock_load.call_args_list]
     assert any("prediction" in url for url in called_urls)
     assert any("geomad" in url for url in called_urls)
 
 
 @patch("ldn.cli.MosaicBackend")
-@patch("ldn.cli._build_mosaic_for_year")
-def test_make_mosaics_multiple_years(mock_build, mock_backend):
-    mock_build.return_value = MagicMock(spec=MosaicJSON)
+@patch("ldn.cli._load_features_by_year")
+def test_make_mosaics_multiple_years(mock_load, mock_backend):
+    mock_load.side_effect = _features_for_years
     mock_backend.return_value.__enter__ = MagicMock(return_value=MagicMock())
     mock_backend.return_value.__exit__ = MagicMock(return_value=False)
 
-    result = runner.invoke(
-        app,
-        [
-            "make-mosaics",
-            "--years",
-            "2020,2021",
-            "--dataset",
-            "geomad",
-            "--version-geomad",
-            GEOMAD_VERSION,
-            "--version-prediction",
-            PREDICTION_VERSION,
-        ],
-    )
+    result = _invoke_make_mosaics("2020,2021", "geomad")
 
     assert result.exit_code == 0, result.output
-    assert mock_build.call_count == 2
-
-    called_years = [c.args[0] for c in mock_build.call_args_list]
-    assert called_years == ["2020", "2021"]
+    # The index is read once for all years.
+    mock_load.assert_called_once()
+    assert mock_load.call_args.args[0] == ["2020", "2021"]
 
     out_paths = [c[0][0] for c in mock_backend.call_args_list]
     assert any("geomad_2020_mosaic.json" in p for p in out_paths)
@@ -246,29 +300,56 @@ def test_make_mosaics_multiple_years(mock_build, mock_backend):
 
 
 @patch("ldn.cli.MosaicBackend")
-@patch("ldn.cli._build_mosaic_for_year")
-def test_make_mosaics_writes_with_overwrite(mock_build, mock_backend):
-    mock_mosaic = MagicMock(spec=MosaicJSON)
-    mock_build.return_value = mock_mosaic
+@patch("ldn.cli._load_features_by_year")
+def test_make_mosaics_writes_with_overwrite(mock_load, mock_backend):
+    mock_load.side_effect = _features_for_years
 
     mock_writer = MagicMock()
     mock_backend.return_value.__enter__ = MagicMock(return_value=mock_writer)
     mock_backend.return_value.__exit__ = MagicMock(return_value=False)
 
+    result = _invoke_make_mosaics("2020", "geomad")
+
+    assert result.exit_code == 0, result.output
+    mock_writer.write.assert_called_once_with(overwrite=True)
+
+
+# seed_tile_cache
+
+
+@patch("ldn.cli.requests")
+@patch("ldn.cli._seed_tiles_for_mosaic")
+def test_seed_tile_cache_requests_each_tile(mock_tiles, mock_requests):
+    mock_tiles.return_value = [(29, 16, 5), (58, 33, 6)]
+    mock_requests.get.return_value.status_code = 200
+
     result = runner.invoke(
         app,
         [
-            "make-mosaics",
+            "seed-tile-cache",
+            "--viewer-url",
+            "https://viewer.example.com/",
             "--years",
             "2020",
             "--dataset",
-            "geomad",
-            "--version-geomad",
-            GEOMAD_VERSION,
-            "--version-prediction",
-            PREDICTION_VERSION,
+            "prediction",
+            "--min-zoom",
+            "5",
+            "--max-zoom",
+            "6",
         ],
     )
 
     assert result.exit_code == 0, result.output
-    mock_writer.write.assert_called_once_with(overwrite=True)
+    mock_tiles.assert_called_once_with(
+        f"s3://data.ldn.auspatious.com/ausp_ls_lulc_prediction/{PREDICTION_VERSION}/mosaics/prediction_2020_mosaic.json",
+        5,
+        6,
+    )
+    urls = sorted(c.args[0] for c in mock_requests.get.call_args_list)
+    assert urls == [
+        "https://viewer.example.com/mosaic/tiles/WebMercatorQuad/5/29/16.png"
+        "?dataset=prediction&year=2020&assets=classification&colormap_name=lulc",
+        "https://viewer.example.com/mosaic/tiles/WebMercatorQuad/6/58/33.png"
+        "?dataset=prediction&year=2020&assets=classification&colormap_name=lulc",
+    ]
@@ -0,0 +1,83 @@
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+
+from ldn.overviews import (
+    build_overview_cog,
+    feature_crs,
+    overview_resampling,
+    product_year,
+)
+
+
+def _write_tile(path, left, top, data, nodata):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=data.shape[1],
+        height=data.shape[0],
+        count=1,
+        dtype=data.dtype,
+        nodata=nodata,
+        crs="EPSG:6933",
+        transform=from_origin(left, top, 30, 30),
+    ) as dst:
+        dst.write(data, 1)
+    return str(path)
+
+
+def test_build_overview_cog_mode_for_classes(tmp_path):
+    # Two side by side 64 x 64 pixel tiles, each 2 x 2 pixels at 960 m.
+    left_tile = np.full((64, 64), 1, dtype=np.uint8)
+    left_tile[:32, :32] = 3
+    left_tile[:32, :20] = 2  # A minority within the block.
+    right_tile = np.full((64, 64), 255, dtype=np.uint8)
+    right_tile[32:, 32:] = 6
+
+    hrefs = [
+        _write_tile(tmp_path / "a.tif", 0, 1920, left_tile, 255),
+        _write_tile(tmp_path / "b.tif", 1920, 1920, right_tile, 255),
+    ]
+    out_path = tmp_path / "overview.tif"
+
+    footprint = build_overview_cog(hrefs, str(out_path), Resampling.mode)
+
+    with rasterio.open(out_path) as src:
+        assert src.res == (960, 960)
+        assert src.nodata == 255
+        data = src.read(1)
+    np.testing.assert_array_equal(data, [[2, 1, 255, 255], [1, 1, 255, 6]])
+    assert footprint["type"] == "Polygon"
+
+
+def test_build_overview_cog_average_ignores_nodata(tmp_path):
+    tile = np.full((32, 32), 100, dtype=np.uint16)
+    tile[:, 16:] = 0  # Nodata.
+    tile[:16, :16] = 300
+    href = _write_tile(tmp_path / "a.tif", 0, 960, tile, 0)
+    out_path = tmp_path / "overview.tif"
+
+    build_overview_cog([href], str(out_path), Resampling.average)
+
+    with rasterio.open(out_path) as src:
+        assert src.read(1).tolist() == [[200]]
+
+
+def test_overview_resampling_by_asset():
+    assert overview_resampling("classification") == Resampling.mode
+    assert overview_resampling("red") == Resampling.average
+
+
+def test_product_year_and_crs():
+    ls7_era = {
+        "properties": {
+            "start_datetime": "2009-01-01T00:00:00Z",
+            "end_datetime": "2011-12-31T23:59:59Z",
+            "proj:code": "EPSG:3832",
+        }
+    }
+    assert product_year(ls7_era) == 2010
+    assert feature_crs(ls7_era) == "EPSG:3832"
+    assert feature_crs({"properties": {"proj:epsg": 6933}}) == "EPSG:6933"
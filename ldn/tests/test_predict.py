@@ -1,7 +1,7 @@
 import numpy as np
 import xarray as xr
 
-from ldn.classify import calculate_indices, scale_offset_landsat
+from ldn.classify import calculate_indices, do_prediction, scale_offset_landsat
 
 
 def _make_dataset(values: dict[str, list[list[float]]]) -> xr.Dataset:
@@ -203,4 +203,50 @@ class TestCalculateIndices:
             assert np.isnan(val), f"{band} = {val}"
 
 
-# TODO: Add tests for further prediction functions.
+# do_prediction
+
+
+class _BandModel:
+    """Stand-in classifier that predicts the 'a' band, with 90% confidence."""
+
+    feature_names_in_ = np.array(["a", "b"])
+
+    def __init__(self):
+        self.n_predicted = 0
+
+    def predict(self, obs):
+        self.n_predicted += len(obs)
+        return obs["a"].to_numpy()
+
+    def predict_proba(self, obs):
+        return np.tile([0.1, 0.9], (len(obs), 1))
+
+
+class TestDoPrediction:
+    def _dataset(self):
+        ds = _make_dataset(
+            {"a": [[1, 2, 3], [4, 5, 6]], "b": [[0, 0, 0], [0, 0, np.nan]]}
+        )
+        return ds.assign_coords(y=[1, 0], x=[0, 1, 2])
+
+    def test_predicts_valid_pixels(self):
+        model = _BandModel()
+        classification, unfiltered, probability = do_prediction(
+            self._dataset(), model, 30.0, 255
+        )
+        assert model.n_predicted == 5
+        assert classification.values.tolist() == [[1, 2, 3], [4, 5, 255]]
+        assert unfiltered.dtype == np.uint8
+        assert probability.values.tolist() == [[90, 90, 90], [90, 90, 255]]
+
+    def test_land_mask_skips_pixels_off_land(self):
+        model = _BandModel()
+        land = np.array([[True, True, False], [False, True, True]])
+        classification, unfiltered, probability = do_prediction(
+            self._dataset(), model, 30.0, 255, land_mask=land, outside_land_value=6
+        )
+        assert model.n_predicted == 3
+        assert classification.values.tolist() == [[1, 2, 6], [6, 5, 255]]
+        assert unfiltered.values.tolist() == [[1, 2, 6], [6, 5, 255]]
+        assert classification.dtype == np.uint8
+        assert probability.values.tolist() == [[90, 90, 255], [255, 90, 255]]
@@ -0,0 +1,65 @@
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+
+from ldn.random_sampling import random_sampling
+from ldn.utils import LdnError
+
+
+def _classification(chunks=None):
+    values = np.full((40, 50), 1, dtype=np.uint8)
+    values[:10] = 2
+    values[10:12] = 3
+    values[:, :5] = 255
+    data = da.from_array(values, chunks=chunks) if chunks else values
+    return xr.DataArray(
+        data,
+        dims=("y", "x"),
+        coords={"y": np.arange(40) * -30.0, "x": np.arange(50) * 30.0},
+    )
+
+
+def test_stratified_random_allocation_and_pixels():
+    samples = random_sampling(
+        _classification(), n=100, min_sample_n=20, drop_value=255, seed=1
+    )
+
+    counts = samples["class"].value_counts().to_dict()
+    # Class 1 has 28/40 rows, 2 has 10/40, and 3 would get 5 but has a minimum of 20.
+    assert counts == {1: 70, 2: 25, 3: 20}
+    assert samples.geometry.is_unique
+    assert (samples.geometry.x >= 150).all()  # Nodata columns are never sampled.
+    assert set(samples.loc[samples["class"] == 2].geometry.y) <= {
+        -30.0 * row for row in range(10)
+    }
+
+
+def test_streaming_is_reproducible_across_chunkings():
+    kwargs = dict(n=60, sampling="equal_stratified_random", drop_value=255, seed=7)
+
+    in_memory = random_sampling(_classification(), chunk_rows=1000, **kwargs)
+    chunked = random_sampling(_classification(chunks=(7, 50)), **kwargs)
+
+    assert in_memory["class"].value_counts().to_dict() == {1: 20, 2: 20, 3: 20}
+    assert in_memory.geometry.equals(chunked.geometry)
+
+
+def test_random_and_manual_sampling():
+    random = random_sampling(_classification(), n=30, sampling="random", seed=0)
+    assert len(random) == 30
+    assert 255 in set(random["class"])  # Only drop_value (0 here) is excluded.
+
+    manual = random_sampling(
+        _classification(),
+        n=0,
+        sampling="manual",
+        manual_class_ratios={"2": 5, "3": 500},
+        drop_value=255,
+    )
+    assert manual["class"].value_counts().to_dict() == {3: 90, 2: 5}
+
+    with pytest.raises(LdnError):
+        random_sampling(
+            _classification(), n=0, sampling="manual", manual_class_ratios={"9": 1}
+        )
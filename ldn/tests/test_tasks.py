@@ -0,0 +1,355 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from ldn.cli import STAC_KEY_TEMPLATE, app
+from ldn.tasks import (
+    DEFAULT_SCENE_COUNT,
+    MIN_LAND_FRACTION,
+    estimate_task_cost,
+    load_scene_counts,
+    pack_tasks,
+)
+from ldn.utils import LdnError
+
+
+runner = CliRunner()
+
+TASKS = [
+    {"id": "58_43", "year": "2020", "region": "pacific"},
+    {"id": "63_20", "year": "2020", "region": "pacific"},
+    {"id": "119_126", "year": "2020", "region": "non-pacific"},
+]
+
+EXISTING_KEY = (
+    "dep_ls_geomad/0-2-0/058/043/2020/dep_ls_geomad_058_043_2020.stac-item.json"
+)
+
+
+def _mock_s3_client(keys: list[str]) -> MagicMock:
+    """Mock a boto3 S3 client whose paginator returns the keys under the requested prefix."""
+    client = MagicMock()
+
+    def paginate(Bucket, Prefix):
+        return [{"Contents": [{"Key": k} for k in keys if k.startswith(Prefix)]}]
+
+    client.get_paginator.return_value.paginate.side_effect = paginate
+    return client
+
+
+# filter_tasks
+
+
+def test_stac_key_template_matches_item_layout():
+    key = STAC_KEY_TEMPLATE.format(
+        prefix="dep",
+        sensor="ls",
+        dataset_id="geomad",
+        version="0-2-0",
+        x=58,
+        y=43,
+        year="2020",
+    )
+    assert key == EXISTING_KEY
+
+
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+def test_filter_tasks_removes_existing(mock_boto3, mock_itempath):
+    mock_itempath.return_value.stac_path.return_value = EXISTING_KEY
+    client = _mock_s3_client([EXISTING_KEY])
+    mock_boto3.client.return_value = client
+
+    result = runner.invoke(
+        app,
+        ["filter-tasks", "--tasks-json", json.dumps(TASKS), "--version", "0.2.0"],
+    )
+
+    assert result.exit_code == 0, result.output
+    remaining = json.loads(result.output)
+    assert [t["id"] for t in remaining] == ["63_20", "119_126"]
+
+    # One listing per tile-x sub-prefix.
+    prefixes = sorted(
+        c.kwargs["Prefix"]
+        for c in client.get_paginator.return_value.paginate.call_args_list
+    )
+    assert prefixes == [
+        "ci_ls_geomad/0-2-0/119/",
+        "dep_ls_geomad/0-2-0/058/",
+        "dep_ls_geomad/0-2-0/063/",
+    ]
+
+
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+def test_filter_tasks_fails_when_template_out_of_sync(mock_boto3, mock_itempath):
+    mock_itempath.return_value.stac_path.return_value = "some/other/layout.json"
+    mock_boto3.client.return_value = _mock_s3_client([])
+
+    result = runner.invoke(
+        app,
+        ["filter-tasks", "--tasks-json", json.dumps(TASKS), "--version", "0-2-0"],
+    )
+
+    assert result.exit_code != 0
+
+
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+def test_filter_tasks_uses_fresh_listing_cache(mock_boto3, mock_itempath, tmp_path):
+    mock_itempath.return_value.stac_path.return_value = EXISTING_KEY
+    cache = tmp_path / "listing.json"
+    now = time.time()
+    cache.write_text(
+        json.dumps(
+            {
+                "bucket": "data.ldn.auspatious.com",
+                "shards": {
+                    "dep_ls_geomad/0-2-0/058/": {
+                        "created": now,
+                        "keys": [EXISTING_KEY],
+                    },
+                    "dep_ls_geomad/0-2-0/063/": {"created": now, "keys": []},
+                    "ci_ls_geomad/0-2-0/119/": {"created": now, "keys": []},
+                },
+            }
+        )
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            "filter-tasks",
+            "--tasks-json",
+            json.dumps(TASKS),
+            "--version",
+            "0-2-0",
+            "--listing-cache",
+            str(cache),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert len(json.loads(result.output)) == 2
+    mock_boto3.client.assert_not_called()
+
+
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+def test_filter_tasks_relists_only_stale_shards(mock_boto3, mock_itempath, tmp_path):
+    mock_itempath.return_value.stac_path.return_value = EXISTING_KEY
+    client = _mock_s3_client([EXISTING_KEY])
+    mock_boto3.client.return_value = client
+    cache = tmp_path / "listing.json"
+    old = time.time() - 7200
+    cache.write_text(
+        json.dumps(
+            {
+                "bucket": "data.ldn.auspatious.com",
+                "shards": {
+                    "dep_ls_geomad/0-2-0/058/": {"created": old, "keys": []},
+                    "dep_ls_geomad/0-2-0/063/": {"created": time.time(), "keys": []},
+                    "ci_ls_geomad/0-2-0/119/": {"created": old + 6000, "keys": []},
+                },
+            }
+        )
+    )
+    args = ["filter-tasks", "--tasks-json", json.dumps(TASKS), "--version", "0-2-0"]
+    args += ["--listing-cache", str(cache)]
+
+    result = runner.invoke(app, args)
+
+    assert result.exit_code == 0, result.output
+    assert len(json.loads(result.output)) == 2
+    prefixes = sorted(
+        c.kwargs["Prefix"]
+        for c in client.get_paginator.return_value.paginate.call_args_list
+    )
+    assert prefixes == ["dep_ls_geomad/0-2-0/058/"]
+
+    # The reused shards keep their original listing times.
+    shards = json.loads(cache.read_text())["shards"]
+    assert shards["ci_ls_geomad/0-2-0/119/"]["created"] == old + 6000
+    assert shards["dep_ls_geomad/0-2-0/058/"]["created"] > old + 6000
+
+
+# estimate_task_cost
+
+
+def test_estimate_task_cost_scales_scene_count_by_land_fraction():
+    task = {"id": "58_43", "year": "2020"}
+    cost = estimate_task_cost(task, {"58_43": 0.5}, {("58_43", "2020"): 200})
+    assert cost == 100
+
+
+def test_estimate_task_cost_defaults_and_ls7_buffer():
+    task = {"id": "58_43", "year": "2010"}
+    cost = estimate_task_cost(task, {"58_43": 1.0}, {})
+    assert cost == DEFAULT_SCENE_COUNT * 3
+
+
+def test_estimate_task_cost_has_minimum_land_fraction():
+    task = {"id": "58_43", "year": "2020"}
+    cost = estimate_task_cost(task, {"58_43": 0.0}, {("58_43", None): 100})
+    assert cost == 100 * MIN_LAND_FRACTION
+
+
+def test_load_scene_counts_with_and_without_year(tmp_path):
+    table = tmp_path / "counts.csv"
+    table.write_text("id,year,scene_count\n58_43,2020,120\n63_20,,80\n")
+
+    counts = load_scene_counts(table)
+
+    assert counts == {("58_43", "2020"): 120, ("63_20", None): 80}
+
+
+# pack_tasks
+
+
+def test_pack_tasks_bins_small_and_isolates_large():
+    tasks = [
+        {"id": str(i), "year": "2020", "cost": c}
+        for i, c in enumerate([5, 6, 7, 200, 3])
+    ]
+
+    batches = pack_tasks(tasks, batch_cost=10, large_cost=150)
+
+    assert batches[0]["size"] == "large"
+    assert [t["id"] for t in batches[0]["tasks"]] == ["3"]
+    small = [b for b in batches if b["size"] == "small"]
+    assert all(b["cost"] <= 10 for b in small)
+    assert sorted(t["id"] for b in small for t in b["tasks"]) == ["0", "1", "2", "4"]
+    assert len({b["id"] for b in batches}) == len(batches)
+
+
+def test_pack_tasks_rejects_non_positive_batch_cost():
+    with pytest.raises(LdnError):
+        pack_tasks([], batch_cost=0, large_cost=1)
+
+
+# print_tasks
+
+
+@patch("ldn.cli.load_tile_registry", return_value=None)
+@patch("ldn.cli.get_grid_tiles")
+def test_print_tasks_default_output_is_unchanged(
+    mock_tiles, mock_registry, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    mock_tiles.return_value = [((58, 43), "pacific")]
+
+    result = runner.invoke(app, ["print-tasks", "--years", "2020,2021"])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == [
+        {"id": "58_43", "year": "2020", "region": "pacific"},
+        {"id": "58_43", "year": "2021", "region": "pacific"},
+    ]
+
+
+# geomad_batch
+
+
+@patch("ldn.cli._build_geomad_task")
+@patch("ldn.cli.object_exists")
+@patch("ldn.cli.get_gridspec")
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+@patch("ldn.cli.configure_s3_access")
+@patch("ldn.cli.DaskClient")
+def test_geomad_batch_isolates_failures(
+    mock_dask,
+    mock_configure,
+    mock_boto3,
+    mock_itempath,
+    mock_gridspec,
+    mock_exists,
+    mock_build,
+):
+    mock_exists.return_value = False
+
+    def build(tile_index, **kwargs):
+        task = MagicMock()
+        if tile_index == (63, 20):
+            task.run.side_effect = RuntimeError("boom")
+        else:
+            task.run.return_value = ["a.tif", "b.tif"]
+        return task
+
+    mock_build.side_effect = build
+    batches = [{"id": "batch_0000", "size": "small", "cost": 1, "tasks": TASKS}]
+
+    result = runner.invoke(
+        app,
+        ["geomad-batch", "--tasks-json", json.dumps(batches), "--version", "0-2-0"],
+    )
+
+    assert result.exit_code != 0
+    results = json.loads(result.stdout)
+    statuses = {r["id"]: r["status"] for r in results}
+    assert statuses == {"58_43": "succeeded", "63_20": "failed", "119_126": "succeeded"}
+    # Shared setup happens once for the whole batch.
+    mock_dask.assert_called_once()
+    mock_configure.assert_called_once()
+    mock_boto3.client.assert_called_once()
+    assert mock_gridspec.call_count == 2  # One per region.
+
+
+@patch("ldn.cli.Task")
+@patch("ldn.cli.StacCreator")
+@patch("ldn.cli.AwsDsCogWriter")
+@patch("ldn.cli.PystacSearcher")
+@patch("ldn.cli.object_exists", return_value=False)
+@patch("ldn.cli.get_gridspec")
+@patch("ldn.cli.S3ItemPath")
+@patch("ldn.cli.boto3")
+@patch("ldn.cli.configure_s3_access")
+@patch("ldn.cli.DaskClient")
+def test_geomad_batch_stdout_is_only_the_results_json(
+    mock_dask,
+    mock_configure,
+    mock_boto3,
+    mock_itempath,
+    mock_gridspec,
+    mock_exists,
+    mock_searcher,
+    mock_writer,
+    mock_stac_creator,
+    mock_task,
+):
+    mock_task.return_value.run.return_value = ["a.tif"]
+    # LS7 era Pacific tasks, which log their search window and collection tiers.
+    tasks = [{"id": "58_43", "year": "2010", "region": "pacific"}]
+
+    result = runner.invoke(
+        app,
+        ["geomad-batch", "--tasks-json", json.dumps(tasks), "--version", "0-2-0"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout)[0]["status"] == "succeeded"
+    assert mock_searcher.call_args.kwargs["datetime"] == "2009/2011"
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["geomad", "--tile-id", "58_43", "--year", "2020", "--region", "pacific"],
+        ["geomad-batch", "--tasks-json", json.dumps(TASKS)],
+    ],
+)
+@patch("ldn.cli.configure_s3_access")
+def test_geomad_rejects_subtile_size_not_multiple_of_chunk_size(
+    mock_configure, command
+):
+    args = command + ["--version", "0-2-0", "--subtile-size", "3000"]
+
+    result = runner.invoke(app, args + ["--xy-chunk-size", "2048"])
+
+    assert isinstance(result.exception, LdnError)
+    assert "multiple of --xy-chunk-size" in str(result.exception)
+    mock_configure.assert_not_called()
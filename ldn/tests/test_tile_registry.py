@@ -0,0 +1,110 @@
+import json
+from unittest.mock import patch
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+from typer.testing import CliRunner
+
+from ldn.cli import app
+from ldn.grids import get_gridspec
+from ldn.tile_registry import TileRegistry, load_tile_registry, source_hashes
+from ldn.utils import LdnError
+
+runner = CliRunner()
+
+
+def _tiles() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {
+            "x_index": [58, 63, 119],
+            "y_index": [43, 20, 126],
+            "label": ["58_43", "63_20", "119_126"],
+            "region": ["pacific", "pacific", "non-pacific"],
+        },
+        geometry=[box(178, -18, 179, -17), box(-172, -14, -171, -13), box(0, 0, 1, 1)],
+        crs="epsg:4326",
+    )
+
+
+def _registry() -> TileRegistry:
+    return TileRegistry.from_tiles(_tiles(), {"58_43": 0.25, "63_20": 0.5})
+
+
+def test_registry_round_trips_and_looks_up_tiles(tmp_path):
+    path = _registry().with_column("scene_count", [10, 20, 30]).save(tmp_path / "t.npz")
+
+    registry = TileRegistry.load(path)
+
+    assert len(registry) == 3
+    assert registry.labels.tolist() == ["58_43", "63_20", "119_126"]
+    row = registry.row("63_20")
+    assert row["region"] == "pacific"
+    assert row["land_fraction"] == 0.5
+    assert row["scene_count"] == 20
+    assert row["bbox"].tolist() == [-172, -14, -171, -13]
+    assert registry.land_fractions()["119_126"] == 1.0
+    with pytest.raises(LdnError):
+        registry.row("1_1")
+
+
+def test_registry_filters_by_region_and_carries_scene_counts():
+    registry = _registry().with_scene_counts({("58_43", None): 12}, default=100)
+
+    pacific = registry.for_region("pacific")
+
+    assert pacific.tiles() == [((58, 43), "pacific"), ((63, 20), "pacific")]
+    assert registry.for_region("non-pacific").tiles() == [((119, 126), "non-pacific")]
+    assert pacific.scene_counts() == {("58_43", None): 12, ("63_20", None): 100}
+
+
+def test_registry_builds_geometries_from_the_grid():
+    grid = get_gridspec("non-pacific")
+    registry = TileRegistry.from_tiles(_tiles()).for_region("non-pacific")
+
+    extent = registry.geometries().iloc[0]
+
+    expected = grid.tile_geobox((119, 126)).extent.to_crs("epsg:4326").geom
+    assert extent.symmetric_difference(expected).area < 1e-9
+
+
+def test_load_tile_registry_is_none_without_a_file(tmp_path):
+    assert load_tile_registry(path=tmp_path / "missing.npz") is None
+
+
+def test_load_tile_registry_is_none_once_the_tile_geojsons_change(tmp_path):
+    geojson = tmp_path / "sids_pacific_tiles.geojson"
+    geojson.write_text(_tiles().to_json())
+    sources = source_hashes([geojson])
+    path = TileRegistry.from_tiles(_tiles(), sources=sources).save(tmp_path / "t.npz")
+
+    registry = load_tile_registry("pacific", path, source_files=[geojson])
+    assert registry.sources == sources
+    assert len(registry) == 2
+
+    # As if regenerated by get-grid-tiles --overwrite.
+    geojson.write_text(_tiles().iloc[:1].to_json())
+    assert load_tile_registry("pacific", path, source_files=[geojson]) is None
+
+
+@patch("ldn.cli.get_grid_tiles")
+@patch("ldn.cli.load_tile_registry")
+def test_print_tasks_reads_the_registry(
+    mock_registry, mock_tiles, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    mock_registry.return_value = (
+        _registry().with_column("scene_count", [10, 20, 30]).for_region("pacific")
+    )
+
+    result = runner.invoke(
+        app, ["print-tasks", "--years", "2020", "--grids", "pacific", "--estimate-cost"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == [
+        {"id": "58_43", "year": "2020", "region": "pacific", "cost": 2.5},
+        {"id": "63_20", "year": "2020", "region": "pacific", "cost": 10.0},
+    ]
+    mock_registry.assert_called_once_with("pacific")
+    mock_tiles.assert_not_called()
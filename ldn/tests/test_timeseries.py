@@ -0,0 +1,111 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from typer.testing import CliRunner
+
+from ldn.cli import app
+from ldn.timeseries import query_timeseries, read_asset_values
+
+runner = CliRunner()
+
+INDEX_URL = "https://example.com/index.parquet"
+
+
+def _write_cog(path, data, nodata=255):
+    # 0.01 degree pixels with the top left corner at (10, 0).
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=data.shape[1],
+        height=data.shape[0],
+        count=1,
+        dtype=data.dtype,
+        nodata=nodata,
+        crs="EPSG:4326",
+        transform=from_origin(10, 0, 0.01, 0.01),
+    ) as dst:
+        dst.write(data, 1)
+    return str(path)
+
+
+def _item(year, href):
+    return {
+        "properties": {
+            "start_datetime": f"{year}-01-01T00:00:00Z",
+            "end_datetime": f"{year}-12-31T23:59:59Z",
+        },
+        "assets": {"classification": {"href": href}},
+    }
+
+
+def test_read_asset_values_point_and_polygon(tmp_path):
+    data = np.arange(100, dtype=np.uint8).reshape(10, 10)
+    data[0, 0] = 255
+    href = _write_cog(tmp_path / "a.tif", data)
+
+    point = read_asset_values(href, {"type": "Point", "coordinates": [10.015, -0.025]})
+    outside = read_asset_values(href, {"type": "Point", "coordinates": [20, 20]})
+    polygon = read_asset_values(
+        href,
+        {
+            "type": "Polygon",
+            "coordinates": [
+                [[10.0, 0.0], [10.02, 0.0], [10.02, -0.02], [10.0, -0.02], [10.0, 0.0]]
+            ],
+        },
+    )
+
+    assert point.tolist() == [21]
+    assert outside.tolist() == []
+    assert sorted(polygon.tolist()) == [1, 10, 11]  # Pixel 0 is nodata.
+
+
+@patch("ldn.timeseries.search_sync")
+def test_query_timeseries_caches_per_year(mock_search, tmp_path):
+    hrefs = {
+        year: _write_cog(tmp_path / f"{year}.tif", np.full((10, 10), c, np.uint8))
+        for year, c in [("2020", 1), ("2021", 3)]
+    }
+    mock_search.return_value = [_item(y, h) for y, h in hrefs.items()]
+    point = {"type": "Point", "coordinates": [10.05, -0.05]}
+
+    first = query_timeseries(point, INDEX_URL, ["2020", "2021"], ["classification"])
+    second = query_timeseries(point, INDEX_URL, ["2021"], ["classification"])
+
+    assert first == [
+        {"year": "2020", "classification": 1},
+        {"year": "2021", "classification": 3},
+    ]
+    assert second == [{"year": "2021", "classification": 3}]
+    mock_search.assert_called_once()
+
+
+@patch("ldn.cli.query_timeseries")
+def test_timeseries_command_point(mock_query):
+    mock_query.return_value = [{"year": "2020", "classification": 1}]
+
+    result = runner.invoke(
+        app,
+        [
+            "timeseries",
+            "--dataset",
+            "prediction",
+            "--lon",
+            "178.1",
+            "--lat",
+            "-17.8",
+            "--years",
+            "2020",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == [{"year": "2020", "classification": 1}]
+    geometry, _, years, assets = mock_query.call_args.args
+    assert geometry == {"type": "Point", "coordinates": [178.1, -17.8]}
+    assert years == ["2020"]
+    assert assets == ["classification"]
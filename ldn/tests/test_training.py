@@ -0,0 +1,270 @@
+import json
+from unittest.mock import patch
+
+import geopandas as gpd
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+import rasterio
+import xarray as xr
+from affine import Affine
+from odc.geo.geobox import GeoBox
+from pystac import Asset, Item
+from typer.testing import CliRunner
+
+from ldn.classify import GEOMAD_BANDS
+from ldn.cli import app
+from ldn.grids import get_gridspec
+from ldn.training import (
+    FEATURE_MANIFEST_FILE,
+    MODEL_FILE,
+    assign_tiles,
+    extract_training_data,
+    holdout_split,
+    load_training_data,
+    outlier_mask,
+    train_model,
+    write_partition,
+)
+from ldn.utils import LdnError
+
+runner = CliRunner()
+
+# The top left 10 x 10 pixels of non-Pacific tile 058_043.
+GEOBOX = GeoBox((10, 10), Affine(30, 0, -14_432_000, 0, -30, -5_776_000), "EPSG:6933")
+
+
+def _points(rows_cols, classes):
+    xs = [GEOBOX.affine.c + 30 * col + 15 for _, col in rows_cols]
+    ys = [GEOBOX.affine.f - 30 * row - 15 for row, _ in rows_cols]
+    return gpd.GeoDataFrame(
+        {"lulc": classes}, geometry=gpd.points_from_xy(xs, ys), crs="EPSG:6933"
+    ).to_crs(4326)
+
+
+def _geomad_item(tmp_path, nodata_at=None):
+    assets = {}
+    for i, band in enumerate(GEOMAD_BANDS):
+        data = np.full((10, 10), 10_000 + i, dtype=np.uint16)
+        if nodata_at is not None:
+            data[nodata_at] = 0
+        path = tmp_path / f"{band}.tif"
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            width=10,
+            height=10,
+            count=1,
+            dtype="uint16",
+            crs="EPSG:6933",
+            transform=GEOBOX.affine,
+        ) as dst:
+            dst.write(data, 1)
+        assets[band] = Asset(str(path))
+    return Item("geomad", None, None, pd.Timestamp("2020-01-01"), {}, assets=assets)
+
+
+def _terrain(geobox):
+    elevation = np.arange(100, dtype=np.float32).reshape(10, 10)
+    return xr.Dataset(
+        {
+            "elevation": (("y", "x"), elevation),
+            "slope": (("y", "x"), elevation / 10),
+            "aspect": (("y", "x"), np.zeros((10, 10), dtype=np.float32)),
+        }
+    )
+
+
+def test_assign_tiles_matches_gridspec():
+    points = gpd.GeoDataFrame(
+        geometry=gpd.points_from_xy([150.1, -60.5, 10.0], [-20.2, 15.3, 0.1]),
+        crs=4326,
+    )
+    grid = get_gridspec("non-pacific")
+    projected = points.to_crs(grid.crs)
+
+    tiles = assign_tiles(points, "non-pacific")
+
+    expected = [
+        "{:03d}_{:03d}".format(*grid.pt2idx(x, y).xy)
+        for x, y in zip(projected.geometry.x, projected.geometry.y)
+    ]
+    assert tiles["tile_id"].tolist() == expected
+
+
+@patch("ldn.training.get_tile_geobox", return_value=GEOBOX)
+@patch("ldn.training.load_dem_terrain", side_effect=_terrain)
+def test_extract_training_data_writes_partitions(mock_terrain, mock_geobox, tmp_path):
+    item = _geomad_item(tmp_path, nodata_at=(9, 9))
+    points = _points([(0, 0), (2, 5), (9, 9)], [1, 2, 3])
+    output = tmp_path / "training"
+
+    with patch("ldn.training.find_geomad_item", return_value=item) as mock_find:
+        written = extract_training_data(
+            points,
+            "non-pacific",
+            ["2019", "2020"],
+            str(output),
+            max_workers=1,
+            terrain_cache_dir=tmp_path / "terrain",
+        )
+
+    assert len(written) == 2
+    assert mock_find.call_count == 2
+    # Terrain is derived once for both years, and cached.
+    mock_terrain.assert_called_once()
+    assert (tmp_path / "terrain" / "non-pacific_058_043.npz").exists()
+
+    table = ds.dataset(output, format="parquet", partitioning="hive").to_table()
+    frame = table.to_pandas().sort_values(["year", "point_id"])
+    # The point over GeoMAD nodata is dropped.
+    assert frame["point_id"].tolist() == [0, 1, 0, 1]
+    assert set(frame["tile_id"]) == {"058_043"}
+    assert frame["elevation"].tolist() == [0, 25, 0, 25]
+    assert frame["lulc"].tolist() == [1, 2, 1, 2]
+    assert {"ndvi", "bui", "slope", *GEOMAD_BANDS} <= set(frame.columns)
+    assert frame["red"].dtype == np.float32
+
+
+@patch("ldn.training.get_tile_geobox", return_value=GEOBOX)
+@patch("ldn.training.load_dem_terrain", side_effect=_terrain)
+def test_extract_training_data_reports_missing_geomad(
+    mock_terrain, mock_geobox, tmp_path
+):
+    with (
+        patch("ldn.training.find_geomad_item", side_effect=LdnError("No GeoMAD")),
+        pytest.raises(LdnError, match="058_043 2020"),
+    ):
+        extract_training_data(
+            _points([(0, 0)], [1]),
+            "non-pacific",
+            ["2020"],
+            str(tmp_path / "training"),
+            max_workers=1,
+            terrain_cache_dir=None,
+        )
+
+
+def _write_training_data(output, rows_per_class=40):
+    rng = np.random.default_rng(0)
+    for year, tile_id in [
+        ("2019", "058_043"),
+        ("2020", "058_043"),
+        ("2020", "059_043"),
+    ]:
+        lulc = np.repeat([1, 2], rows_per_class)
+        write_partition(
+            str(output),
+            year,
+            tile_id,
+            pd.DataFrame(
+                {
+                    "point_id": np.arange(len(lulc)),
+                    "lulc": lulc,
+                    "longitude": rng.uniform(size=len(lulc)),
+                    "red": (lulc + rng.normal(0, 0.1, len(lulc))).astype(np.float32),
+                    "ndvi": rng.normal(size=len(lulc)).astype(np.float32),
+                    "elevation": rng.normal(size=len(lulc)).astype(np.float32),
+                }
+            ),
+        )
+
+
+def test_load_training_data_projects_columns_and_filters_years(tmp_path):
+    _write_training_data(tmp_path)
+
+    X, y, features, groups = load_training_data(str(tmp_path))
+    assert features == ["red", "ndvi", "elevation"]
+    assert X.dtype == np.float32
+    assert X.shape == (240, 3)
+    assert len(y) == 240
+    # A point in 058_043 has a row for 2019 and 2020, and 059_043 has its own points.
+    assert len(np.unique(groups)) == 160
+
+    X, y, features, groups = load_training_data(
+        str(tmp_path), features=["elevation", "red"], years=["2019"]
+    )
+    assert features == ["elevation", "red"]
+    assert X.shape == (80, 2)
+
+    with pytest.raises(LdnError, match="missing features"):
+        load_training_data(str(tmp_path), features=["nope"])
+
+
+def test_holdout_split_keeps_each_point_on_one_side():
+    y = np.tile(np.repeat([1, 2], 50), 3)
+    groups = np.tile(np.arange(100), 3)  # Each point sampled in 3 years.
+
+    train, test, method = holdout_split(y, groups, test_size=0.3)
+
+    assert method.startswith("GroupShuffleSplit")
+    assert len(test) == 90
+    assert not set(groups[train]) & set(groups[test])
+
+    train, test, method = holdout_split(y, None, test_size=0.3)
+    assert method.startswith("stratified")
+    assert len(test) == 90
+
+
+def test_outlier_mask_caps_outliers_per_class():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3)).astype(np.float32)
+    y = np.repeat([1, 2], 100)
+    X[:20] += 100  # 20 far outliers in class 1.
+
+    outliers = outlier_mask(X, y, threshold=3.5, max_fraction=0.05)
+
+    assert outliers[:100].sum() == 5
+    assert not outliers[20:100].any()
+    assert not outliers[100:].any()
+
+
+def test_train_model_writes_model_manifest_and_benchmark(tmp_path):
+    _write_training_data(tmp_path / "training")
+
+    paths = train_model(
+        str(tmp_path / "training"),
+        str(tmp_path / "model"),
+        n_estimators=5,
+        n_jobs=1,
+        remove_outliers=True,
+    )
+
+    model = joblib.load(paths["model"])
+    assert list(model.feature_names_in_) == ["red", "ndvi", "elevation"]
+    assert paths["model"].endswith(MODEL_FILE)
+    with open(tmp_path / "model" / FEATURE_MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    assert manifest["features"] == ["red", "ndvi", "elevation"]
+    assert manifest["classes"] == [1, 2]
+    with open(paths["benchmark"]) as f:
+        report = json.load(f)
+    assert report["inference"]["rows"] > 0
+    assert report["holdout"]["accuracy"] > 0.9
+    assert report["split"] == "GroupShuffleSplit by tile_id and point_id"
+
+
+@patch("ldn.cli_classify.train_model")
+def test_train_model_command_splits_lists(mock_train, tmp_path):
+    result = runner.invoke(
+        app,
+        [
+            "classify",
+            "train-model",
+            "--training-data",
+            str(tmp_path),
+            "--features",
+            "red, ndvi",
+            "--years",
+            "2020",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    kwargs = mock_train.call_args.kwargs
+    assert kwargs["features"] == ["red", "ndvi"]
+    assert kwargs["years"] == ["2020"]
+    assert kwargs["n_estimators"] == 500
@@ -0,0 +1,39 @@
+import dask.array as da
+import numpy as np
+import xarray as xr
+
+from ldn.typology import cci_lc_lut, cci_lc_map, remap_classes
+
+
+def test_remap_classes_matches_mapping_for_every_dtype():
+    values = np.array([[0, 10, 50], [210, 3, 220]])
+    expected = [
+        [cci_lc_map[0], cci_lc_map[10], cci_lc_map[50]],
+        [cci_lc_map[210], 255, cci_lc_map[220]],
+    ]
+
+    for dtype in ["uint8", "uint16", "int32", "float32"]:
+        remapped = remap_classes(values.astype(dtype), cci_lc_map)
+        assert remapped.dtype == np.uint8
+        assert remapped.tolist() == expected
+
+    assert (
+        remap_classes(np.array([-1.0, np.nan, 1e6]), cci_lc_lut).tolist() == [255] * 3
+    )
+
+
+def test_remap_classes_dask_is_lazy_and_keeps_attrs():
+    data = xr.DataArray(
+        da.from_array(np.array([[10, 10], [50, 0]], dtype=np.uint8), chunks=1),
+        dims=("y", "x"),
+        attrs={"nodata": 0},
+    )
+
+    remapped = remap_classes(data, cci_lc_map)
+
+    assert isinstance(remapped.data, da.Array)
+    assert remapped.attrs == {"nodata": 0}
+    assert remapped.compute().values.tolist() == [
+        [cci_lc_map[10], cci_lc_map[10]],
+        [cci_lc_map[50], 255],
+    ]
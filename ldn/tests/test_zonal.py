@@ -0,0 +1,147 @@
+import dask.array as da
+import geopandas as gpd
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import box, mapping
+
+from ldn.utils import LdnError
+from ldn.zonal import (
+    N_CLASSES,
+    merge_zonal_stats,
+    pixel_area_per_row,
+    tile_id_from_href,
+    tile_jobs,
+    tile_zonal_stats,
+    transition_matrix,
+    zonal_stats_tables,
+)
+
+TRANSFORM = from_origin(0, 300, 30, 30)  # 10 x 10 pixels of 30 m in EPSG:6933.
+
+
+def _write_classes(path, data):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=data.shape[1],
+        height=data.shape[0],
+        count=1,
+        dtype="uint8",
+        nodata=255,
+        crs="EPSG:6933",
+        transform=TRANSFORM,
+    ) as dst:
+        dst.write(data, 1)
+    return str(path)
+
+
+def _left_half_wgs84():
+    # The left 5 columns of the raster, in WGS84.
+    return mapping(
+        gpd.GeoSeries([box(0, 0, 150, 300)], crs="EPSG:6933").to_crs(4326).iloc[0]
+    )
+
+
+def test_pixel_area_per_row_is_exact_for_equal_area_grid():
+    np.testing.assert_allclose(pixel_area_per_row(TRANSFORM, "EPSG:6933", 10), 900)
+
+
+def test_tile_zonal_stats_counts_classes_and_transitions(tmp_path):
+    first = np.full((10, 10), 1, dtype=np.uint8)
+    first[0, :] = 255  # Nodata row.
+    second = first.copy()
+    second[1, :] = 3  # Tree cover to cropland.
+    hrefs = {
+        "2020": _write_classes(tmp_path / "2020.tif", first),
+        "2021": _write_classes(tmp_path / "2021.tif", second),
+    }
+
+    result = tile_zonal_stats(
+        "1_1", hrefs, [("AAA", _left_half_wgs84())], cache_dir=tmp_path / "cache"
+    )
+
+    pixels, area = result["classes"][("AAA", "2020")]
+    assert pixels.tolist() == [5, 45, 0, 0, 0, 0, 0, 0]
+    np.testing.assert_allclose(area, pixels * 900)
+    transition_pixels, _ = result["transitions"][("AAA", "2020", "2021")]
+    assert transition_pixels.shape == (N_CLASSES, N_CLASSES)
+    assert transition_pixels[1, 3] == 5
+    assert transition_pixels[1, 1] == 40
+    assert list((tmp_path / "cache").glob("1_1_*.npy"))
+
+
+def test_merge_and_tables():
+    pixels = np.zeros(N_CLASSES, dtype=np.int64)
+    pixels[2] = 10
+    partial = {
+        "classes": {("AAA", "2020"): (pixels, pixels * 900.0)},
+        "transitions": {},
+    }
+
+    total = {"classes": {}, "transitions": {}}
+    merge_zonal_stats(total, partial)
+    merge_zonal_stats(total, partial)
+    class_areas, transitions = zonal_stats_tables(total)
+
+    assert class_areas.to_dict("records") == [
+        {"country": "AAA", "year": "2020", "class": 2, "pixels": 20, "area_ha": 1.8}
+    ]
+    assert transitions.empty
+
+
+def test_tile_jobs_groups_by_tile_and_finds_countries():
+    def feature(x, year):
+        return {
+            "geometry": mapping(box(x, 0, x + 1, 1)),
+            "properties": {"datetime": f"{year}-01-01T00:00:00Z"},
+            "assets": {
+                "classification": {
+                    "href": f"s3://bucket/pred/0-0-1/{x:03d}/001/{year}/x.tif"
+                }
+            },
+        }
+
+    features_by_year = {
+        "2020": [feature(0, 2020), feature(5, 2020)],
+        "2021": [feature(0, 2021)],
+    }
+    gadm = gpd.GeoDataFrame(
+        {"GID_0": ["AAA"]}, geometry=[box(0.5, 0, 2, 1)], crs="EPSG:4326"
+    )
+
+    jobs = tile_jobs(features_by_year, gadm)
+
+    assert len(jobs) == 1
+    tile_id, hrefs, zones = jobs[0]
+    assert tile_id == "0_1"
+    assert sorted(hrefs) == ["2020", "2021"]
+    assert [code for code, _ in zones] == ["AAA"]
+
+
+def test_tile_id_from_href_requires_tile_path():
+    assert tile_id_from_href("https://x/058/043/2020/a.tif") == "58_43"
+    with pytest.raises(LdnError):
+        tile_id_from_href("https://x/a.tif")
+
+
+def test_transition_matrix_matches_unique_pairs_and_streams_dask():
+    rng = np.random.default_rng(0)
+    source = rng.choice([1, 2, 3, 6, 255], size=(30, 20)).astype(np.uint8)
+    target = rng.choice([1, 2, 3, 6, 255], size=(30, 20)).astype(np.uint8)
+    mask = rng.random((30, 20)) > 0.3
+
+    pairs, counts = np.unique(
+        np.vstack([source[mask], target[mask]]).T, axis=0, return_counts=True
+    )
+    expected = np.zeros((N_CLASSES, N_CLASSES), dtype=np.int64)
+    for (s, t), n in zip(pairs, counts):
+        expected[0 if s == 255 else s, 0 if t == 255 else t] = n
+
+    np.testing.assert_array_equal(transition_matrix(source, target, mask), expected)
+    chunked = transition_matrix(
+        da.from_array(source, chunks=7), da.from_array(target, chunks=9), mask
+    )
+    np.testing.assert_array_equal(chunked, expected)
@@ -0,0 +1,258 @@
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterable, Literal
+
+import geopandas as gpd
+import numpy as np
+
+from ldn.grids import (
+    NON_PACIFIC_TILES_FILE,
+    PACIFIC_TILES_FILE,
+    get_gridspec,
+    tile_extents,
+)
+from ldn.utils import LdnError
+
+logger = logging.getLogger(__name__)
+
+# Compact replacement for reparsing the sids_*_tiles.geojson files, written by `ldn grid build-registry`.
+TILE_REGISTRY_FILE = Path(__file__).parent / "sids_tiles.npz"
+
+# Regions are stored as an index into this tuple.
+REGIONS = ("pacific", "non-pacific")
+
+# Columns every registry has. Any other columns are per-tile metadata, e.g. scene_count.
+REQUIRED_COLUMNS = ("x_index", "y_index", "region", "land_fraction", "bbox")
+
+# The tile GeoJSONs a registry is built from. It is stale once any of them change.
+SOURCE_FILES = (PACIFIC_TILES_FILE, NON_PACIFIC_TILES_FILE)
+
+# Keys of the saved registry that record its source files, rather than per-tile columns.
+SOURCE_NAMES_KEY = "source_names"
+SOURCE_HASHES_KEY = "source_hashes"
+
+
+def source_hashes(paths: Iterable[Path] = SOURCE_FILES) -> dict[str, str]:
+    """Return the SHA-256 of each existing tile GeoJSON, keyed by file name."""
+    return {
+        Path(path).name: hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        for path in paths
+        if Path(path).exists()
+    }
+
+
+class TileRegistry:
+    """A table of grid tiles held as NumPy arrays, one row per tile.
+
+    Each tile has an (x_index, y_index), a region, a land fraction and a WGS84
+    bounding box (minx, miny, maxx, maxy), plus any extra per-tile columns.
+    The registry is saved as an uncompressed .npz file, so it loads in
+    milliseconds. Labels, the label lookup and tile geometries are only built
+    when they are first used. It also records the hashes of the tile GeoJSONs
+    it was built from, so a registry left behind by regenerating the tiles can
+    be detected.
+    """
+
+    def __init__(
+        self, columns: dict[str, np.ndarray], sources: dict[str, str] | None = None
+    ):
+        """Create a TileRegistry.
+
+        Args:
+            columns: Mapping of column name to an array with one row per tile.
+                Must include the REQUIRED_COLUMNS.
+            sources: Optional mapping of tile GeoJSON file name to its SHA-256,
+                as returned by source_hashes.
+        """
+        missing = set(REQUIRED_COLUMNS) - set(columns)
+        if missing:
+            raise LdnError(f"Tile registry is missing columns: {sorted(missing)}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise LdnError("Tile registry columns must all have the same length.")
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        self.sources = dict(sources or {})
+        self._labels: np.ndarray | None = None
+        self._rows: dict[str, int] | None = None
+        self._geometries: gpd.GeoSeries | None = None
+
+    @classmethod
+    def from_tiles(
+        cls,
+        tiles: gpd.GeoDataFrame,
+        land_fractions: dict[str, float] | None = None,
+        sources: dict[str, str] | None = None,
+    ) -> "TileRegistry":
+        """Build a registry from tiles as returned by get_grid_tiles(format="gdf").
+
+        Args:
+            tiles: GeoDataFrame with 'x_index', 'y_index', 'label', 'region' and
+                'geometry' columns.
+            land_fractions: Optional mapping of tile label to land fraction.
+                Tiles without one are treated as all land.
+            sources: Optional hashes of the tile GeoJSONs the tiles were read from.
+        """
+        land_fractions = land_fractions or {}
+        unknown = set(tiles["region"]) - set(REGIONS)
+        if unknown:
+            raise LdnError(f"Unknown tile regions: {sorted(unknown)}")
+        return cls(
+            {
+                "x_index": tiles["x_index"].to_numpy(dtype=np.int32),
+                "y_index": tiles["y_index"].to_numpy(dtype=np.int32),
+                "region": np.array(
+                    [REGIONS.index(r) for r in tiles["region"]], dtype=np.int8
+                ),
+                "land_fraction": np.array(
+                    [land_fractions.get(str(label), 1.0) for label in tiles["label"]],
+                    dtype=np.float32,
+                ),
+                "bbox": tiles.geometry.bounds.to_numpy(dtype=np.float64),
+            },
+            sources,
+        )
+
+    @classmethod
+    def load(cls, path: Path = TILE_REGISTRY_FILE) -> "TileRegistry":
+        """Load a registry written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files}
+        names = columns.pop(SOURCE_NAMES_KEY, np.array([], dtype=str))
+        hashes = columns.pop(SOURCE_HASHES_KEY, np.array([], dtype=str))
+        return cls(columns, dict(zip(names.tolist(), hashes.tolist())))
+
+    def save(self, path: Path = TILE_REGISTRY_FILE) -> Path:
+        """Save the registry as an uncompressed .npz file."""
+        np.savez(
+            path,
+            **self.columns,
+            **{
+                SOURCE_NAMES_KEY: np.array(list(self.sources), dtype=str),
+                SOURCE_HASHES_KEY: np.array(list(self.sources.values()), dtype=str),
+            },
+        )
+        logger.info(f"Wrote {len(self)} tiles to {path}")
+        return Path(path)
+
+    def __len__(self) -> int:
+        return len(self.columns["x_index"])
+
+    def _subset(self, rows: np.ndarray) -> "TileRegistry":
+        return TileRegistry(
+            {name: values[rows] for name, values in self.columns.items()},
+            self.sources,
+        )
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Tile labels, e.g. "58_43"."""
+        if self._labels is None:
+            self._labels = np.char.add(
+                np.char.add(self.columns["x_index"].astype(str), "_"),
+                self.columns["y_index"].astype(str),
+            )
+        return self._labels
+
+    @property
+    def regions(self) -> np.ndarray:
+        """Region name of each tile."""
+        return np.asarray(REGIONS)[self.columns["region"]]
+
+    def row(self, label: str) -> dict:
+        """Return one tile's columns as a dict, looked up by label."""
+        if self._rows is None:
+            self._rows = {label: i for i, label in enumerate(self.labels.tolist())}
+        if label not in self._rows:
+            raise LdnError(f"Tile {label} is not in the tile registry.")
+        i = self._rows[label]
+        row = {name: values[i] for name, values in self.columns.items()}
+        row["label"] = label
+        row["region"] = REGIONS[row["region"]]
+        return row
+
+    def for_region(
+        self, region: Literal["all", "pacific", "non-pacific"]
+    ) -> "TileRegistry":
+        """Return the tiles of one region, or all tiles."""
+        if region == "all":
+            return self
+        if region not in REGIONS:
+            raise LdnError(f"Invalid region {region}.")
+        return self._subset(self.columns["region"] == REGIONS.index(region))
+
+    def with_column(self, name: str, values) -> "TileRegistry":
+        """Return a copy of the registry with an added or replaced per-tile column."""
+        columns = dict(self.columns)
+        columns[name] = np.asarray(values)
+        return TileRegistry(columns, self.sources)
+
+    def with_scene_counts(
+        self, scene_counts: dict[tuple[str, str | None], int], default: int
+    ) -> "TileRegistry":
+        """Add a 'scene_count' column from a table loaded by load_scene_counts.
+
+        Only the per-tile (not per-year) counts are used.
+        """
+        counts = [scene_counts.get((label, None), default) for label in self.labels]
+        return self.with_column("scene_count", np.array(counts, dtype=np.int32))
+
+    def scene_counts(self) -> dict[tuple[str, str | None], int]:
+        """Return the 'scene_count' column in the load_scene_counts format, or {} if there is none."""
+        if "scene_count" not in self.columns:
+            return {}
+        return {
+            (label, None): count
+            for label, count in zip(
+                self.labels.tolist(), self.columns["scene_count"].tolist()
+            )
+        }
+
+    def tiles(self) -> list[tuple[tuple[int, int], str]]:
+        """Return tiles in the get_grid_tiles list format, [((x, y), region), ...]."""
+        return list(
+            zip(
+                zip(self.columns["x_index"].tolist(), self.columns["y_index"].tolist()),
+                self.regions.tolist(),
+            )
+        )
+
+    def land_fractions(self) -> dict[str, float]:
+        """Return a mapping of tile label to land fraction."""
+        return dict(zip(self.labels.tolist(), self.columns["land_fraction"].tolist()))
+
+    def geometries(self) -> gpd.GeoSeries:
+        """Return the antimeridian-fixed WGS84 extent of each tile, built on first use."""
+        if self._geometries is None:
+            extents = np.empty(len(self), dtype=object)
+            for code, region in enumerate(REGIONS):
+                rows = self.columns["region"] == code
+                if rows.any():
+                    indices = np.column_stack(
+                        [self.columns["x_index"][rows], self.columns["y_index"][rows]]
+                    )
+                    extents[rows] = tile_extents(get_gridspec(region), indices)
+            self._geometries = gpd.GeoSeries(extents, crs="epsg:4326")
+        return self._geometries
+
+
+def load_tile_registry(
+    region: Literal["all", "pacific", "non-pacific"] = "all",
+    path: Path = TILE_REGISTRY_FILE,
+    source_files: Iterable[Path] = SOURCE_FILES,
+) -> TileRegistry | None:
+    """Load the tiles of a region from the registry.
+
+    Returns None if the registry hasn't been built, or if the tile GeoJSONs have
+    changed since it was, e.g. after get-grid-tiles --overwrite.
+    """
+    if not Path(path).exists():
+        return None
+    registry = TileRegistry.load(path)
+    if registry.sources != source_hashes(source_files):
+        logger.warning(
+            f"The tile GeoJSONs have changed since {path} was built, so it is not used. "
+            "Rebuild it with `ldn grid build-registry`."
+        )
+        return None
+    return registry.for_region(region)
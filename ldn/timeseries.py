@@ -0,0 +1,179 @@
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.warp import transform_geom
+from rasterio.windows import Window, WindowError, from_bounds
+from rustac import search_sync
+from shapely.geometry import shape
+
+from ldn.overviews import CATEGORICAL_ASSETS, product_year
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMESERIES_ASSETS = {
+    "prediction": ["classification"],
+    "geomad": ["red", "green", "blue", "nir08", "swir16", "swir22"],
+}
+
+# Per-year results, keyed by (index URL, year, geometry, assets).
+YEAR_CACHE_SIZE = 4096
+_year_cache: OrderedDict[tuple, dict] = OrderedDict()
+_year_cache_lock = Lock()
+
+
+def find_items_by_year(
+    geometry: dict, stac_geoparquet_url: str, years: list[str]
+) -> dict[str, list[dict]]:
+    """Find the STAC items covering a geometry for each year, with one index search.
+
+    Args:
+        geometry: WGS84 GeoJSON geometry.
+        stac_geoparquet_url: URL of the STAC-Geoparquet index.
+        years: Product years.
+
+    Returns:
+        Mapping of each year to the items of that product year covering the geometry.
+    """
+    # LS7 era items span a year either side of their product year.
+    start, end = min(int(y) for y in years) - 1, max(int(y) for y in years) + 1
+    features = search_sync(
+        stac_geoparquet_url, intersects=geometry, datetime=f"{start}/{end}"
+    )
+    items_by_year: dict[str, list[dict]] = {year: [] for year in years}
+    for feature in features:
+        year = str(product_year(feature))
+        if year in items_by_year:
+            items_by_year[year].append(feature)
+    return items_by_year
+
+
+def read_asset_values(href: str, geometry: dict) -> np.ndarray:
+    """Read the valid pixel values of a COG under a WGS84 point or polygon.
+
+    Only the window covering the geometry is read.
+
+    Args:
+        href: Path or URL of a single band COG.
+        geometry: WGS84 GeoJSON Point, Polygon or MultiPolygon.
+
+    Returns:
+        1D array of the valid (not nodata) pixel values under the geometry.
+    """
+    with rasterio.open(href) as src:
+        geom = transform_geom("EPSG:4326", src.crs, geometry)
+        full = Window(0, 0, src.width, src.height)
+        if geom["type"] == "Point":
+            row, col = src.index(*geom["coordinates"][:2])
+            window = Window(col, row, 1, 1)
+        else:
+            window = from_bounds(*shape(geom).bounds, transform=src.transform)
+            window = window.round_offsets().round_lengths()
+        try:
+            window = window.intersection(full)
+        except WindowError:
+            return np.array([], dtype=src.dtypes[0])
+
+        data = src.read(1, window=window, masked=True)
+        if geom["type"] != "Point":
+            outside = geometry_mask(
+                [geom],
+                out_shape=data.shape,
+                transform=src.window_transform(window),
+                all_touched=True,
+            )
+            data = np.ma.masked_where(outside, data)
+    return data.compressed()
+
+
+def summarise_values(values: np.ndarray, asset: str, point: bool):
+    """Summarise the pixel values of an asset for one year.
+
+    Returns the pixel value for a point (None if nodata). For an area, returns
+    pixel counts per class for class maps and the mean for everything else.
+    """
+    if point:
+        return values[0].item() if len(values) else None
+    if asset in CATEGORICAL_ASSETS:
+        classes, counts = np.unique(values, return_counts=True)
+        return {str(c): int(n) for c, n in zip(classes.tolist(), counts)}
+    return {
+        "mean": float(values.mean()) if len(values) else None,
+        "count": int(len(values)),
+    }
+
+
+def _read_year(items: list[dict], geometry: dict, assets: tuple[str, ...]) -> dict:
+    """Read and summarise one year's assets, combining every item covering the geometry."""
+    point = geometry["type"] == "Point"
+    result = {}
+    for asset in assets:
+        values = [
+            read_asset_values(item["assets"][asset]["href"], geometry)
+            for item in items
+            if asset in item.get("assets", {})
+        ]
+        combined = np.concatenate(values) if values else np.array([])
+        result[asset] = summarise_values(combined, asset, point)
+    return result
+
+
+def query_timeseries(
+    geometry: dict,
+    stac_geoparquet_url: str,
+    years: list[str],
+    assets: list[str],
+    max_workers: int = 16,
+) -> list[dict]:
+    """Return the per-year values of a point, or summaries of an area, for a product.
+
+    Covering tiles are found through the STAC-Geoparquet index, and only the COG
+    windows under the geometry are read, for all years concurrently. Results are
+    cached per year, so repeated or overlapping queries only read new years.
+
+    Args:
+        geometry: WGS84 GeoJSON Point, Polygon or MultiPolygon.
+        stac_geoparquet_url: URL of the product's STAC-Geoparquet index.
+        years: Product years.
+        assets: Assets to read, e.g. ['classification'].
+        max_workers: Number of years read concurrently.
+
+    Returns:
+        One dict per year, with a 'year' key and one key per asset.
+    """
+    geometry_key = json.dumps(geometry, sort_keys=True)
+    assets_key = tuple(assets)
+
+    def cache_key(year: str) -> tuple:
+        return (stac_geoparquet_url, year, geometry_key, assets_key)
+
+    results = {}
+    with _year_cache_lock:
+        for year in years:
+            if cache_key(year) in _year_cache:
+                _year_cache.move_to_end(cache_key(year))
+                results[year] = _year_cache[cache_key(year)]
+
+    missing = [year for year in years if year not in results]
+    if missing:
+        items_by_year = find_items_by_year(geometry, stac_geoparquet_url, missing)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            values = executor.map(
+                lambda year: _read_year(items_by_year[year], geometry, assets_key),
+                missing,
+            )
+            for year, year_values in zip(missing, values):
+                results[year] = year_values
+
+        with _year_cache_lock:
+            for year in missing:
+                _year_cache[cache_key(year)] = results[year]
+            while len(_year_cache) > YEAR_CACHE_SIZE:
+                _year_cache.popitem(last=False)
+
+    return [{"year": year, **results[year]} for year in years]
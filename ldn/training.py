@@ -0,0 +1,651 @@
+import json
+import logging
+import time
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Literal
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pa_dataset
+import pyarrow.parquet as pq
+import rasterio
+import xarray as xr
+from joblib import dump as joblib_dump
+from pyarrow import fs
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import classification_report
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
+
+from ldn.classify import (
+    GEOMAD_BANDS,
+    GEOMAD_STAC_GEOPARQUET_URL,
+    calculate_indices,
+    find_geomad_item,
+    load_dem_terrain,
+    scale_offset_landsat,
+)
+from ldn.grids import get_gridspec, get_tile_geobox
+from ldn.utils import PREDICTION_VERSION, LdnError, class_attr, get_analysis_epsg
+
+logger = logging.getLogger(__name__)
+
+# Terrain doesn't change between years, so it is derived once per tile and kept here.
+TERRAIN_CACHE_DIR = Path("classification/terrain")
+
+TERRAIN_BANDS = ["elevation", "slope", "aspect"]
+
+# Columns written by extract_training_data that aren't model features.
+NON_FEATURE_COLUMNS = ("point_id", "longitude", "latitude", "year", "tile_id")
+
+# Columns that identify a training point across years, so the holdout split keeps
+# every year of a point on the same side.
+GROUP_COLUMNS = ("tile_id", "point_id")
+
+MODEL_FILE = "lulc_random_forest_model.joblib"
+FEATURE_MANIFEST_FILE = "lulc_random_forest_features.json"
+BENCHMARK_FILE = "lulc_random_forest_benchmark.json"
+
+# A 96 km tile of 30 m pixels, used to estimate prediction time per tile.
+TILE_PIXELS = 3200 * 3200
+
+# GDAL settings for reading a few pixels from remote COGs.
+COG_READ_ENV = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+}
+
+
+def assign_tiles(
+    points: gpd.GeoDataFrame, region: Literal["pacific", "non-pacific"]
+) -> pd.DataFrame:
+    """Find the grid tile of each point, from the grid's origin and tile size.
+
+    This is the same binning as GridSpec.pt2idx, done for all points at once.
+
+    Args:
+        points: Point GeoDataFrame in any CRS.
+        region: Grid region, "pacific" or "non-pacific".
+
+    Returns:
+        DataFrame with 'tile_id' (e.g. "058_043"), and 'x' and 'y' in the
+        analysis CRS, indexed like points.
+    """
+    grid = get_gridspec(region)
+    projected = points.geometry.to_crs(get_analysis_epsg(region))
+    xs, ys = projected.x.to_numpy(), projected.y.to_numpy()
+    (ox, oy), (size_x, size_y) = grid.origin.xy, grid.tile_size.xy
+    tile_x = np.floor((xs - ox) / size_x).astype(int)
+    tile_y = np.floor((ys - oy) / size_y).astype(int)
+    return pd.DataFrame(
+        {
+            "tile_id": [f"{tx:03d}_{ty:03d}" for tx, ty in zip(tile_x, tile_y)],
+            "x": xs,
+            "y": ys,
+        },
+        index=points.index,
+    )
+
+
+def cached_terrain(
+    region: Literal["pacific", "non-pacific"],
+    tile_id: str,
+    cache_dir: Path | None = TERRAIN_CACHE_DIR,
+) -> dict[str, np.ndarray]:
+    """Load a tile's elevation, slope and aspect, deriving them only once per tile.
+
+    Args:
+        region: Grid region of the tile.
+        tile_id: Tile identifier (e.g. "058_043").
+        cache_dir: Directory to cache terrain in, or None to not cache.
+
+    Returns:
+        Mapping of terrain band to a float32 array on the tile's pixel grid.
+    """
+    cache_path = Path(cache_dir) / f"{region}_{tile_id}.npz" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        with np.load(cache_path) as cached:
+            return {band: cached[band] for band in TERRAIN_BANDS}
+
+    tile_index = tuple(int(i) for i in tile_id.split("_"))
+    terrain = load_dem_terrain(get_tile_geobox(region, tile_index)).compute()
+    arrays = {band: terrain[band].values.astype(np.float32) for band in TERRAIN_BANDS}
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(cache_path, **arrays)
+    return arrays
+
+
+def sample_cog(href: str, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Read the first band of a COG at points, reading only the blocks under them."""
+    with rasterio.Env(**COG_READ_ENV), rasterio.open(href) as src:
+        return np.array([value[0] for value in src.sample(zip(xs, ys), indexes=1)])
+
+
+def sample_tile(
+    region: Literal["pacific", "non-pacific"],
+    tile_id: str,
+    years: list[str],
+    points: pd.DataFrame,
+    stac_geoparquet_url: str = GEOMAD_STAC_GEOPARQUET_URL,
+    terrain_cache_dir: Path | None = TERRAIN_CACHE_DIR,
+) -> tuple[list[tuple[str, pd.DataFrame]], list[tuple[str, str]]]:
+    """Sample GeoMAD, spectral index and terrain features under one tile's points.
+
+    Features match the variables of search_and_load_geomad_indices_dem, so
+    the trained model can predict on them.
+
+    Args:
+        region: Grid region of the tile.
+        tile_id: Tile identifier (e.g. "058_043").
+        years: Years of GeoMAD to sample.
+        points: Points in the tile, with 'x' and 'y' columns in the analysis
+            CRS. Any other columns (e.g. the class) are kept.
+        stac_geoparquet_url: STAC geoparquet index of the GeoMAD version to use.
+        terrain_cache_dir: Directory to cache each tile's terrain in.
+
+    Returns:
+        ([(year, features)], [(year, error)]). Points with any missing feature
+        are dropped.
+    """
+    xs, ys = points["x"].to_numpy(), points["y"].to_numpy()
+    tile_index = tuple(int(i) for i in tile_id.split("_"))
+    geobox = get_tile_geobox(region, tile_index)
+    cols, rows = ~geobox.affine @ (xs, ys)
+    rows = np.clip(np.floor(rows).astype(int), 0, geobox.height - 1)
+    cols = np.clip(np.floor(cols).astype(int), 0, geobox.width - 1)
+
+    terrain = cached_terrain(region, tile_id, terrain_cache_dir)
+    terrain_values = {band: terrain[band][rows, cols] for band in TERRAIN_BANDS}
+
+    results, failures = [], []
+    for year in years:
+        try:
+            item = find_geomad_item(tile_id, year, stac_geoparquet_url)
+        except LdnError as e:
+            logger.warning(f"Skipping tile {tile_id} year {year}: {e}")
+            failures.append((year, str(e)))
+            continue
+
+        geomad = xr.Dataset(
+            {
+                band: ("point", sample_cog(item.assets[band].href, xs, ys))
+                for band in GEOMAD_BANDS
+            }
+        )
+        geomad = calculate_indices(scale_offset_landsat(geomad))
+
+        features = points.drop(columns=["x", "y"]).copy()
+        for name, values in geomad.data_vars.items():
+            features[name] = values.values.astype(np.float32)
+        for band, values in terrain_values.items():
+            features[band] = values
+
+        feature_names = list(geomad.data_vars) + TERRAIN_BANDS
+        missing = features[feature_names].isna().any(axis=1)
+        if missing.any():
+            logger.info(
+                f"Dropping {missing.sum()} of {len(features)} points with missing features in tile {tile_id} year {year}"
+            )
+        results.append((year, features[~missing].reset_index(drop=True)))
+    return results, failures
+
+
+def _filesystem(output: str) -> tuple[fs.FileSystem, str]:
+    if "://" in output:
+        return fs.FileSystem.from_uri(output)
+    return fs.LocalFileSystem(), str(Path(output).absolute())
+
+
+def write_partition(
+    output: str, year: str, tile_id: str, features: pd.DataFrame
+) -> str:
+    """Write one tile-year of features under hive-style year=/tile_id= partitions.
+
+    Args:
+        output: Local directory or URI (e.g. s3://bucket/prefix).
+        year: Year of the features.
+        tile_id: Tile identifier.
+        features: Features of the tile's points.
+
+    Returns:
+        The path written to.
+    """
+    filesystem, root = _filesystem(output)
+    directory = f"{root}/year={year}/tile_id={tile_id}"
+    filesystem.create_dir(directory, recursive=True)
+    path = f"{directory}/part-0.parquet"
+    pq.write_table(
+        pa.Table.from_pandas(features, preserve_index=False),
+        path,
+        filesystem=filesystem,
+    )
+    return path
+
+
+def extract_training_data(
+    points: gpd.GeoDataFrame,
+    region: Literal["pacific", "non-pacific"],
+    years: list[str],
+    output: str,
+    class_column: str = class_attr,
+    max_workers: int = 4,
+    stac_geoparquet_url: str = GEOMAD_STAC_GEOPARQUET_URL,
+    terrain_cache_dir: Path | None = TERRAIN_CACHE_DIR,
+) -> list[str]:
+    """Sample training features for points, in parallel over tiles.
+
+    Points are grouped by tile, and each tile is handled by one worker process,
+    so its terrain is derived once for all years. Only the GeoMAD COG blocks
+    under the points are read. Each tile-year is written as soon as it is done.
+
+    Args:
+        points: Training points with a class column, in any CRS.
+        region: Grid region of the points.
+        years: Years of GeoMAD to sample.
+        output: Local directory or URI to write partitioned Parquet to.
+        class_column: Name of the class column.
+        max_workers: Number of worker processes. 1 runs in this process.
+        stac_geoparquet_url: STAC geoparquet index of the GeoMAD version to use.
+        terrain_cache_dir: Directory to cache each tile's terrain in.
+
+    Returns:
+        Paths of the Parquet files written.
+    """
+    if class_column not in points.columns:
+        raise LdnError(f"Training points have no '{class_column}' column.")
+
+    lon_lat = points.geometry.to_crs("EPSG:4326")
+    located = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "point_id": np.arange(len(points)),
+                    class_column: points[class_column].to_numpy(),
+                    "longitude": lon_lat.x.to_numpy(),
+                    "latitude": lon_lat.y.to_numpy(),
+                },
+                index=points.index,
+            ),
+            assign_tiles(points, region),
+        ],
+        axis=1,
+    )
+    tiles = {
+        tile_id: group.drop(columns="tile_id").reset_index(drop=True)
+        for tile_id, group in located.groupby("tile_id")
+    }
+    logger.info(
+        f"Sampling {len(points)} points in {len(tiles)} tiles for years {years} with {max_workers} workers"
+    )
+
+    jobs = [
+        (region, tile_id, years, tile_points, stac_geoparquet_url, terrain_cache_dir)
+        for tile_id, tile_points in tiles.items()
+    ]
+    written, failed = [], []
+
+    def collect(tile_id, results, failures):
+        for year, features in results:
+            written.append(write_partition(output, year, tile_id, features))
+        failed.extend((tile_id, year, error) for year, error in failures)
+
+    if max_workers == 1:
+        for job in jobs:
+            try:
+                collect(job[1], *sample_tile(*job))
+            except Exception as e:
+                logger.exception(f"Failed to sample tile {job[1]}")
+                failed.append((job[1], None, str(e)))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(sample_tile, *job): job[1] for job in jobs}
+            for future in as_completed(futures):
+                tile_id = futures[future]
+                try:
+                    collect(tile_id, *future.result())
+                except Exception as e:
+                    logger.exception(f"Failed to sample tile {tile_id}")
+                    failed.append((tile_id, None, str(e)))
+
+    logger.info(f"Wrote {len(written)} tile-year partitions to {output}")
+    if failed:
+        raise LdnError(
+            f"Failed to sample {len(failed)} tiles or tile-years: "
+            + ", ".join(
+                f"{tile_id} {year or ''}".strip() for tile_id, year, _ in failed
+            )
+        )
+    return written
+
+
+def load_training_data(
+    path: str,
+    class_column: str = class_attr,
+    features: list[str] | None = None,
+    years: list[str] | None = None,
+) -> tuple[np.ndarray, np.ndarray, list[str], np.ndarray | None]:
+    """Stream partitioned training Parquet into a float32 feature matrix.
+
+    Only the feature and class columns (and year partitions) asked for are
+    read. Batches are copied straight into one preallocated array, so peak
+    memory is the matrix plus one batch.
+
+    Args:
+        path: Directory or URI written by extract_training_data.
+        class_column: Name of the class column.
+        features: Feature columns, in order. Defaults to every numeric column
+            that isn't the class or one of NON_FEATURE_COLUMNS.
+        years: Years to read. Defaults to all.
+
+    Returns:
+        (features, classes, feature names, groups). Rows with a missing value
+        are dropped. groups numbers each training point (one per tile_id and
+        point_id, shared by all its years), or is None if the data has no
+        point_id column.
+    """
+    filesystem, root = _filesystem(path)
+    dataset = pa_dataset.dataset(
+        root, filesystem=filesystem, format="parquet", partitioning="hive"
+    )
+    schema = dataset.schema
+    if class_column not in schema.names:
+        raise LdnError(f"Training data at {path} has no '{class_column}' column.")
+    if features is None:
+        features = [
+            field.name
+            for field in schema
+            if field.name != class_column
+            and field.name not in NON_FEATURE_COLUMNS
+            and (pa.types.is_floating(field.type) or pa.types.is_integer(field.type))
+        ]
+    missing = set(features) - set(schema.names)
+    if missing:
+        raise LdnError(f"Training data is missing features: {sorted(missing)}")
+
+    row_filter = None
+    if years is not None:
+        row_filter = pa_dataset.field("year").cast(pa.string()).isin(years)
+    n_rows = dataset.count_rows(filter=row_filter)
+    if n_rows == 0:
+        raise LdnError(f"No training data found at {path}.")
+
+    group_columns = [name for name in GROUP_COLUMNS if name in schema.names]
+    if "point_id" not in group_columns:
+        group_columns = []
+
+    X = np.empty((n_rows, len(features)), dtype=np.float32)
+    y = None
+    groups = np.zeros(n_rows, dtype=np.int64) if group_columns else None
+    tile_codes: dict[str, int] = {}
+    row = 0
+    for batch in dataset.to_batches(
+        columns=features + [class_column] + group_columns, filter=row_filter
+    ):
+        end = row + batch.num_rows
+        for i, name in enumerate(features):
+            X[row:end, i] = batch.column(name).to_numpy(zero_copy_only=False)
+        classes = batch.column(class_column).to_numpy(zero_copy_only=False)
+        if y is None:
+            y = np.empty(n_rows, dtype=classes.dtype)
+        y[row:end] = classes
+        if groups is not None:
+            groups[row:end] = batch.column("point_id").to_numpy(zero_copy_only=False)
+            if "tile_id" in group_columns:
+                # Point ids are only unique within one extraction, so include the tile.
+                tiles = batch.column("tile_id").to_numpy(zero_copy_only=False)
+                names, inverse = np.unique(tiles.astype(str), return_inverse=True)
+                codes = np.array(
+                    [tile_codes.setdefault(name, len(tile_codes)) for name in names]
+                )
+                groups[row:end] |= codes[inverse].astype(np.int64) << 32
+        row = end
+
+    valid = ~np.isnan(X).any(axis=1)
+    if not valid.all():
+        logger.info(f"Dropping {(~valid).sum()} rows with missing features")
+        X, y = X[valid], y[valid]
+        if groups is not None:
+            groups = groups[valid]
+    logger.info(f"Loaded {len(y)} training rows with {len(features)} features")
+    return X, y, features, groups
+
+
+def holdout_split(
+    y: np.ndarray,
+    groups: np.ndarray | None,
+    test_size: float,
+    random_state: int = 42,
+) -> tuple[np.ndarray, np.ndarray, str]:
+    """Split rows into training and holdout rows.
+
+    The same point sampled in several years has near identical features, so
+    with groups every row of a point goes to the same side, and the holdout
+    accuracy is measured on points the model hasn't seen. Without groups the
+    rows are split with stratification by class.
+
+    Args:
+        y: Class of each row.
+        groups: Training point of each row, as returned by load_training_data,
+            or None.
+        test_size: Fraction of points (or rows, without groups) to hold out.
+        random_state: Seed for the split.
+
+    Returns:
+        (training rows, holdout rows, description of the split method).
+    """
+    rows = np.arange(len(y))
+    if groups is None:
+        logger.warning(
+            "Training data has no point_id, so the holdout split is by row and "
+            "may share points with the training rows"
+        )
+        train, test = train_test_split(
+            rows, test_size=test_size, stratify=y, random_state=random_state
+        )
+        return train, test, "stratified train_test_split by row"
+
+    splitter = GroupShuffleSplit(
+        n_splits=1, test_size=test_size, random_state=random_state
+    )
+    train, test = next(splitter.split(rows, y, groups))
+    return train, test, "GroupShuffleSplit by tile_id and point_id"
+
+
+def outlier_mask(
+    X: np.ndarray,
+    y: np.ndarray,
+    threshold: float = 3.5,
+    max_fraction: float = 0.05,
+) -> np.ndarray:
+    """Find outliers within each class by their robust z-score distance.
+
+    Each feature is standardised with the class's median and median absolute
+    deviation, and a row's distance is the root mean square of those z-scores.
+    Rows further than threshold are outliers, up to the worst max_fraction of
+    each class.
+
+    Args:
+        X: (rows, features) feature matrix.
+        y: Class of each row.
+        threshold: Distance beyond which a row is an outlier.
+        max_fraction: Largest fraction of a class that can be outliers.
+
+    Returns:
+        Boolean array, True for outlier rows.
+    """
+    outliers = np.zeros(len(y), dtype=bool)
+    for _class in np.unique(y):
+        rows = np.flatnonzero(y == _class)
+        values = X[rows]
+        median = np.median(values, axis=0)
+        mad = np.median(np.abs(values - median), axis=0) * 1.4826
+        # Constant features don't tell rows apart.
+        mad[mad == 0] = np.inf
+        distance = np.sqrt(np.mean(((values - median) / mad) ** 2, axis=1))
+
+        limit = int(max_fraction * len(rows))
+        candidates = np.flatnonzero(distance > threshold)
+        if len(candidates) > limit:
+            candidates = candidates[np.argsort(distance[candidates])[::-1][:limit]]
+        outliers[rows[candidates]] = True
+        logger.info(
+            f"Class {_class}: {len(candidates)} of {len(rows)} rows are outliers"
+        )
+    return outliers
+
+
+def benchmark_inference(
+    model: RandomForestClassifier, X: np.ndarray, feature_names: list[str]
+) -> dict:
+    """Time predict_proba on a feature matrix and estimate the time per tile.
+
+    Args:
+        model: Fitted classifier.
+        X: Rows to predict, e.g. the held out test rows.
+        feature_names: Column names of X.
+
+    Returns:
+        Benchmark report with rows, seconds and rows per second.
+    """
+    obs = pd.DataFrame(X, columns=feature_names, copy=False)
+    start = time.perf_counter()
+    model.predict_proba(obs)
+    seconds = time.perf_counter() - start
+    rows_per_second = len(obs) / seconds if seconds > 0 else float("inf")
+    return {
+        "rows": len(obs),
+        "seconds": seconds,
+        "rows_per_second": rows_per_second,
+        "estimated_seconds_per_tile": TILE_PIXELS / rows_per_second,
+        "n_jobs": model.n_jobs,
+    }
+
+
+def _write_bytes(output: str, name: str, data: bytes) -> str:
+    filesystem, root = _filesystem(output)
+    filesystem.create_dir(root, recursive=True)
+    path = f"{root}/{name}"
+    with filesystem.open_output_stream(path) as f:
+        f.write(data)
+    return path
+
+
+def train_model(
+    training_data: str,
+    output: str,
+    class_column: str = class_attr,
+    features: list[str] | None = None,
+    years: list[str] | None = None,
+    n_estimators: int = 500,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    test_size: float = 0.3,
+    remove_outliers: bool = False,
+    outlier_threshold: float = 3.5,
+    max_outlier_fraction: float = 0.05,
+    benchmark_rows: int = 100_000,
+) -> dict[str, str]:
+    """Train the LULC random forest from extracted training data.
+
+    Like notebooks/training_data/1_Train_Predict.ipynb, uses a 70/30 split and
+    a balanced 500 tree forest, seeded so retraining on the same data gives the
+    same model. The split is by training point (see holdout_split), so no point
+    is in both the training and holdout rows. Trees are built in parallel with
+    n_jobs.
+
+    Args:
+        training_data: Directory or URI written by extract_training_data.
+        output: Directory or URI to write the model, feature manifest and
+            benchmark report to.
+        class_column: Name of the class column.
+        features: Feature columns, in order. Defaults to all of them.
+        years: Years of training data to use. Defaults to all.
+        n_estimators: Number of trees.
+        n_jobs: Number of parallel jobs for fitting and predicting, -1 for all CPUs.
+        random_state: Seed for the split and the forest.
+        test_size: Fraction of training points (rows if the data has no
+            point_id) held out to evaluate and benchmark the model, or 0 to
+            train on all rows.
+        remove_outliers: Whether to drop outliers of each class before training.
+        outlier_threshold: Robust z-score distance beyond which a row is an outlier.
+        max_outlier_fraction: Largest fraction of a class dropped as outliers.
+        benchmark_rows: Largest number of rows to time prediction on.
+
+    Returns:
+        Mapping of 'model', 'features' and 'benchmark' to the paths written.
+    """
+    X, y, feature_names, groups = load_training_data(
+        training_data, class_column, features, years
+    )
+
+    if remove_outliers:
+        keep = ~outlier_mask(X, y, outlier_threshold, max_outlier_fraction)
+        X, y = X[keep], y[keep]
+        if groups is not None:
+            groups = groups[keep]
+
+    split = None
+    if test_size > 0:
+        train, test, split = holdout_split(y, groups, test_size, random_state)
+        X_train, X_test, y_train, y_test = X[train], X[test], y[train], y[test]
+    else:
+        X_train, y_train, X_test, y_test = X, y, None, None
+    logger.info(
+        f"Training on {len(y_train)} rows, classes: {dict(zip(*np.unique(y_train, return_counts=True)))}"
+    )
+
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        class_weight="balanced",
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+    start = time.perf_counter()
+    # A DataFrame, so the model records feature names for do_prediction to order by.
+    model.fit(pd.DataFrame(X_train, columns=feature_names, copy=False), y_train)
+    fit_seconds = time.perf_counter() - start
+    logger.info(f"Trained {n_estimators} trees in {fit_seconds:.1f}s")
+
+    benchmark_X = X_test if X_test is not None else X_train
+    report = {
+        "prediction_version": PREDICTION_VERSION,
+        "training_rows": len(y_train),
+        "split": split,
+        "fit_seconds": fit_seconds,
+        "inference": benchmark_inference(
+            model, benchmark_X[:benchmark_rows], feature_names
+        ),
+    }
+    if X_test is not None:
+        predicted = model.predict(pd.DataFrame(X_test, columns=feature_names))
+        report["holdout"] = classification_report(
+            y_test, predicted, output_dict=True, zero_division=0
+        )
+        logger.info(f"Holdout accuracy: {report['holdout']['accuracy']:.3f}")
+
+    manifest = {
+        "features": feature_names,
+        "dtype": "float32",
+        "class_column": class_column,
+        "classes": model.classes_.tolist(),
+        "prediction_version": PREDICTION_VERSION,
+    }
+
+    buffer = BytesIO()
+    joblib_dump(model, buffer)
+    paths = {
+        "model": _write_bytes(output, MODEL_FILE, buffer.getvalue()),
+        "features": _write_bytes(
+            output, FEATURE_MANIFEST_FILE, json.dumps(manifest, indent=2).encode()
+        ),
+        "benchmark": _write_bytes(
+            output, BENCHMARK_FILE, json.dumps(report, indent=2, default=float).encode()
+        ),
+    }
+    logger.info(f"Wrote model to {paths['model']}")
+    return paths
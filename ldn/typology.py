@@ -1,4 +1,8 @@
 from importlib.resources import files
+
+import dask.array as da
+import numpy as np
+import xarray as xr
 import yaml
 
 
@@ -13,3 +17,76 @@ with _typology_path.open("r", encoding="utf-8") as f:
     world_cover_map = typology_mapping["world_cover_map"]
     cci_lc_map = typology_mapping["cci_lc_map"]
     io_map = typology_mapping["io_map"]
+
+# Class values are packed into 0..N_CLASSES-1, with 0 for nodata and anything that isn't a class.
+CLASS_VALUES = sorted(v for v in classes_flipped if v != 255)
+N_CLASSES = max(CLASS_VALUES) + 1
+
+# Maps any uint8 class raster value to its packed class index.
+CLASS_LUT = np.zeros(256, dtype=np.uint8)
+CLASS_LUT[CLASS_VALUES] = CLASS_VALUES
+
+
+def remap_lut(mapping: dict[int, int], fill_value: int = 255) -> np.ndarray:
+    """Build a dense lookup table from a class mapping, e.g. cci_lc_map.
+
+    Index i of the table holds the new class for source value i, and values
+    missing from the mapping get fill_value.
+    """
+    lut = np.full(max(mapping) + 1, fill_value, dtype=np.uint8)
+    lut[list(mapping.keys())] = list(mapping.values())
+    return lut
+
+
+world_cover_lut = remap_lut(world_cover_map)
+cci_lc_lut = remap_lut(cci_lc_map)
+io_lut = remap_lut(io_map)
+
+
+def _remap_array(values: np.ndarray, lut: np.ndarray, fill_value: int) -> np.ndarray:
+    if values.dtype.kind == "u" and values.dtype.itemsize <= 2:
+        # Small unsigned types: pad the table to cover every possible value and
+        # look up directly, with no bounds checks.
+        full = np.full(np.iinfo(values.dtype).max + 1, fill_value, dtype=lut.dtype)
+        full[: len(lut)] = lut[: len(full)]
+        return np.take(full, values)
+
+    if values.dtype.kind == "f":
+        values = np.where(np.isnan(values), -1, values)
+    values = values.astype(np.int64, copy=False)
+    valid = (values >= 0) & (values < len(lut))
+    remapped = np.take(lut, np.clip(values, 0, len(lut) - 1))
+    return np.where(valid, remapped, np.asarray(fill_value, dtype=lut.dtype))
+
+
+def remap_classes(data, mapping: dict[int, int] | np.ndarray, fill_value: int = 255):
+    """Remap an external product's classes to ours in a single lookup per pixel.
+
+    Args:
+        data: Integer (or NaN nodata float) numpy array, dask array or xarray
+            DataArray. Dask arrays are remapped chunk by chunk.
+        mapping: A class mapping such as cci_lc_map, or a table from remap_lut.
+        fill_value: Class for values that are not in the mapping.
+
+    Returns:
+        uint8 classes, the same type and shape as data.
+    """
+    lut = (
+        remap_lut(mapping, fill_value)
+        if isinstance(mapping, dict)
+        else np.asarray(mapping)
+    )
+    if isinstance(data, xr.DataArray):
+        return xr.apply_ufunc(
+            _remap_array,
+            data,
+            kwargs={"lut": lut, "fill_value": fill_value},
+            dask="parallelized",
+            output_dtypes=[lut.dtype],
+            keep_attrs=True,
+        )
+    if isinstance(data, da.Array):
+        return data.map_blocks(
+            _remap_array, lut=lut, fill_value=fill_value, dtype=lut.dtype
+        )
+    return _remap_array(np.asarray(data), lut, fill_value)
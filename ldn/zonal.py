@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import re
+from pathlib import Path
+
+import dask
+import dask.array as da
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import rasterio
+from pyproj import Transformer
+from rasterio.features import rasterize
+from rasterio.warp import transform_geom
+from shapely import STRtree
+from shapely.geometry import mapping, shape
+
+from ldn.overviews import product_year
+from ldn.typology import CLASS_LUT, N_CLASSES, remap_classes
+from ldn.utils import LdnError
+
+logger = logging.getLogger(__name__)
+
+# Equal-area CRS used to measure pixel areas.
+AREA_CRS = "EPSG:6933"
+
+# Items are written under .../{x:03d}/{y:03d}/{year}/...
+TILE_PATH_PATTERN = re.compile(r"/(\d{3})/(\d{3})/\d{4}/")
+
+
+def tile_id_from_href(href: str) -> str:
+    """Return the tile id (e.g. "58_43") from an asset href."""
+    match = TILE_PATH_PATTERN.search(href)
+    if match is None:
+        raise LdnError(f"Cannot find a tile index in {href}.")
+    return f"{int(match.group(1))}_{int(match.group(2))}"
+
+
+def pixel_area_per_row(transform, crs, height: int) -> np.ndarray:
+    """Return the true area in m² of a pixel in each row of a raster.
+
+    Pixel area only varies with latitude, so one column is enough. This is
+    exact for equal-area grids and corrects for scale distortion in others
+    (e.g. the Pacific Mercator grid).
+    """
+    rows = np.arange(height + 1)
+    ys = transform.f + transform.e * rows
+    left = np.full(height + 1, transform.c)
+    right = left + transform.a
+
+    to_area = Transformer.from_crs(crs, AREA_CRS, always_xy=True)
+    lx, ly = to_area.transform(left, ys)
+    rx, ry = to_area.transform(right, ys)
+
+    # Shoelace formula for each row's quadrilateral (top left, top right, bottom right, bottom left).
+    xs = np.stack([lx[:-1], rx[:-1], rx[1:], lx[1:]])
+    ys = np.stack([ly[:-1], ry[:-1], ry[1:], ly[1:]])
+    return 0.5 * np.abs(
+        (xs * np.roll(ys, -1, axis=0) - np.roll(xs, -1, axis=0) * ys).sum(axis=0)
+    )
+
+
+def _transition_counts(source, target, mask=None) -> np.ndarray:
+    source = remap_classes(source, CLASS_LUT, fill_value=0).ravel().astype(np.int64)
+    target = remap_classes(target, CLASS_LUT, fill_value=0).ravel()
+    codes = source * N_CLASSES + target
+    if mask is not None:
+        codes = codes[np.asarray(mask).ravel()]
+    counts = np.bincount(codes, minlength=N_CLASSES * N_CLASSES)
+    return counts.reshape(N_CLASSES, N_CLASSES)
+
+
+def transition_matrix(source, target, mask=None) -> np.ndarray:
+    """Count the pixels changing from each class to each other class.
+
+    Each pixel's (from, to) pair is encoded as one integer, from * N_CLASSES + to,
+    and all pairs are counted in a single np.bincount. Dask inputs are counted
+    block by block, so only a block is in memory at once. Results for several
+    tiles or chunks can simply be added together.
+
+    Args:
+        source: Classes at the start, as a numpy array, dask array or DataArray.
+        target: Classes at the end, with the same shape as source.
+        mask: Optional boolean array of the pixels to count.
+
+    Returns:
+        int64 array of shape (N_CLASSES, N_CLASSES), where [i, j] is the number of
+        pixels going from class i to class j. Index 0 counts nodata and any value
+        that isn't a class.
+    """
+    arrays = [getattr(a, "data", a) for a in (source, target, mask) if a is not None]
+    if not any(isinstance(a, da.Array) for a in arrays):
+        return _transition_counts(*arrays)
+
+    arrays = [da.asarray(a) for a in arrays]
+    arrays = [a.rechunk(arrays[0].chunks) for a in arrays]
+    blocks = zip(*(a.to_delayed().ravel() for a in arrays))
+    partials = [dask.delayed(_transition_counts)(*block) for block in blocks]
+    return sum(dask.compute(*partials))
+
+
+def rasterize_zones(
+    zones: list[tuple[str, dict]],
+    transform,
+    crs,
+    shape: tuple[int, int],
+    cache_dir: Path | None = None,
+    cache_key: str | None = None,
+) -> np.ndarray:
+    """Burn zones into a raster of zone numbers, 1 for the first zone, 0 for none.
+
+    Args:
+        zones: (zone id, WGS84 GeoJSON geometry) pairs.
+        transform: Affine transform of the raster.
+        crs: CRS of the raster.
+        shape: (height, width) of the raster.
+        cache_dir: Optional directory to cache the raster in, so reruns skip rasterising.
+        cache_key: Name for the cached raster, e.g. the tile id.
+
+    Returns:
+        uint16 array of zone numbers.
+    """
+    cache_path = None
+    if cache_dir is not None and cache_key is not None:
+        zone_ids = ",".join(zone_id for zone_id, _ in zones)
+        digest = hashlib.sha256(zone_ids.encode()).hexdigest()[:12]
+        cache_path = Path(cache_dir) / f"{cache_key}_{digest}.npy"
+        if cache_path.exists():
+            return np.load(cache_path)
+
+    zone_raster = rasterize(
+        [
+            (transform_geom("EPSG:4326", crs, geometry), number)
+            for number, (_, geometry) in enumerate(zones, start=1)
+        ],
+        out_shape=shape,
+        transform=transform,
+        fill=0,
+        dtype="uint16",
+    )
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(cache_path, zone_raster)
+    return zone_raster
+
+
+def tile_zonal_stats(
+    tile_id: str,
+    hrefs_by_year: dict[str, str],
+    zones: list[tuple[str, dict]],
+    cache_dir: Path | None = None,
+) -> dict:
+    """Accumulate class areas and year-to-year transitions per zone for one tile.
+
+    The zones are rasterised once for the tile, then each year's class raster is
+    read in turn. Zone, class (and previous class) are combined into one integer
+    code per pixel and counted with np.bincount, so each year costs a few passes
+    over the tile regardless of the number of zones or classes.
+
+    Args:
+        tile_id: Tile id, used to name cached zone rasters.
+        hrefs_by_year: Mapping of year to the tile's classification COG.
+        zones: (zone id, WGS84 GeoJSON geometry) pairs overlapping the tile.
+        cache_dir: Optional directory to cache zone rasters in.
+
+    Returns:
+        {"classes": {(zone, year): (pixels, area)}, "transitions": {(zone, from_year, to_year): (pixels, area)}},
+        where pixels and area (m²) are arrays of shape (N_CLASSES,) and (N_CLASSES, N_CLASSES).
+    """
+    years = sorted(hrefs_by_year)
+    with rasterio.open(hrefs_by_year[years[0]]) as src:
+        transform, crs, raster_shape = src.transform, src.crs, src.shape
+
+    zone_raster = rasterize_zones(
+        zones, transform, crs, raster_shape, cache_dir=cache_dir, cache_key=tile_id
+    ).astype(np.int64)
+    n_zones = len(zones) + 1
+    row_area = pixel_area_per_row(transform, crs, raster_shape[0])
+    pixel_area = np.broadcast_to(row_area[:, None], raster_shape).ravel()
+    zone_codes = zone_raster.ravel() * N_CLASSES
+
+    classes = {}
+    transitions = {}
+    previous_year, previous = None, None
+    for year in years:
+        with rasterio.open(hrefs_by_year[year]) as src:
+            current = CLASS_LUT[src.read(1)].ravel().astype(np.int64)
+
+        codes = zone_codes + current
+        pixels = np.bincount(codes, minlength=n_zones * N_CLASSES)
+        area = np.bincount(codes, weights=pixel_area, minlength=n_zones * N_CLASSES)
+        pixels = pixels.reshape(n_zones, N_CLASSES)
+        area = area.reshape(n_zones, N_CLASSES)
+        for number, (zone_id, _) in enumerate(zones, start=1):
+            classes[(zone_id, year)] = (pixels[number], area[number])
+
+        if previous is not None and int(year) == int(previous_year) + 1:
+            codes = (zone_codes + previous) * N_CLASSES + current
+            size = n_zones * N_CLASSES * N_CLASSES
+            pixels = np.bincount(codes, minlength=size)
+            area = np.bincount(codes, weights=pixel_area, minlength=size)
+            pixels = pixels.reshape(n_zones, N_CLASSES, N_CLASSES)
+            area = area.reshape(n_zones, N_CLASSES, N_CLASSES)
+            for number, (zone_id, _) in enumerate(zones, start=1):
+                transitions[(zone_id, previous_year, year)] = (
+                    pixels[number],
+                    area[number],
+                )
+        previous_year, previous = year, current
+
+    return {"classes": classes, "transitions": transitions}
+
+
+def merge_zonal_stats(total: dict, partial: dict) -> dict:
+    """Add one tile's results from tile_zonal_stats into a running total, in place."""
+    for kind in ("classes", "transitions"):
+        for key, (pixels, area) in partial[kind].items():
+            if key in total[kind]:
+                total_pixels, total_area = total[kind][key]
+                total[kind][key] = (total_pixels + pixels, total_area + area)
+            else:
+                total[kind][key] = (pixels.copy(), area.copy())
+    return total
+
+
+def tile_jobs(
+    features_by_year: dict[str, list[dict]], gadm: gpd.GeoDataFrame
+) -> list[tuple[str, dict[str, str], list[tuple[str, dict]]]]:
+    """Group classification COGs by tile and find the countries overlapping each tile.
+
+    Args:
+        features_by_year: Mapping of year to prediction STAC items.
+        gadm: GADM countries, with 'GID_0' and 'geometry' columns, in WGS84.
+
+    Returns:
+        (tile id, {year: href}, [(country code, geometry clipped to the tile)]) for each
+        tile that overlaps a country.
+    """
+    hrefs: dict[str, dict[str, str]] = {}
+    footprints: dict[str, dict] = {}
+    for year, features in features_by_year.items():
+        for feature in features:
+            if product_year(feature) != int(year):
+                continue
+            href = feature["assets"]["classification"]["href"]
+            tile_id = tile_id_from_href(href)
+            hrefs.setdefault(tile_id, {})[year] = href
+            footprints.setdefault(tile_id, feature["geometry"])
+
+    countries = gadm.dissolve(by="GID_0").reset_index()
+    country_geoms = countries.geometry.values
+    tree = STRtree(country_geoms)
+
+    jobs = []
+    for tile_id, tile_hrefs in sorted(hrefs.items()):
+        footprint = shape(footprints[tile_id])
+        zones = [
+            (
+                countries["GID_0"].iloc[i],
+                mapping(country_geoms[i].intersection(footprint)),
+            )
+            for i in sorted(tree.query(footprint, predicate="intersects"))
+        ]
+        if zones:
+            jobs.append((tile_id, tile_hrefs, zones))
+    return jobs
+
+
+def zonal_stats_tables(total: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Convert merged zonal stats into class area and transition tables.
+
+    Returns:
+        (class areas, transitions) DataFrames. Areas are in hectares, and class 0 is nodata.
+    """
+    class_rows = [
+        (zone_id, year, c, int(pixels[c]), area[c] / 10_000)
+        for (zone_id, year), (pixels, area) in total["classes"].items()
+        for c in np.flatnonzero(pixels)
+    ]
+    transition_rows = [
+        (zone_id, from_year, to_year, s, d, int(pixels[s, d]), area[s, d] / 10_000)
+        for (zone_id, from_year, to_year), (pixels, area) in total[
+            "transitions"
+        ].items()
+        for s, d in zip(*np.nonzero(pixels))
+    ]
+    class_areas = pd.DataFrame(
+        class_rows, columns=["country", "year", "class", "pixels", "area_ha"]
+    ).sort_values(["country", "year", "class"], ignore_index=True)
+    transitions = pd.DataFrame(
+        transition_rows,
+        columns=[
+            "country",
+            "from_year",
+            "to_year",
+            "from_class",
+            "to_class",
+            "pixels",
+            "area_ha",
+        ],
+    ).sort_values(["country", "from_year", "from_class", "to_class"], ignore_index=True)
+    return class_areas, transitions
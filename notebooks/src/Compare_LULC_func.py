@@ -1,8 +1,9 @@
 # package for comparing LULC products
 import numpy as np
-import xarray as xr
 from matplotlib.colors import ListedColormap, BoundaryNorm
 from ldn.typology import colors as class_colors, classes_flipped as standard_legend
+from ldn.typology import remap_classes
+from ldn.zonal import transition_matrix
 
 
 def get_standard_legend():
@@ -32,25 +33,18 @@ def get_standard_norm():
 
 
 # project the current land cover classes to UNCCD, based on the given mapping directory
+# Classes missing from the mapping become NaN, which the comparison notebooks mask out
 def standardise_class(DataArray, mapping):
-    # Create a copy to preserve original metadata
-    remapped = xr.full_like(DataArray, fill_value=np.nan)
-
-    for original, new in mapping.items():
-        remapped = remapped.where(DataArray != original, new)
-
-    return remapped
+    remapped = remap_classes(DataArray, mapping).astype("float32")
+    return remapped.where(DataArray.isin(list(mapping)))
 
 
 # Given the source and target data, generate the parameters for sankey diagrams
 def load_sankey_params(s_data, t_data, mask, count_limit=10):
-    pairs, counts = np.unique(
-        np.vstack([s_data[mask], t_data[mask]]).T, axis=0, return_counts=True
-    )
-
-    keep = counts > count_limit
-    pairs = pairs[keep]
-    counts = counts[keep]
+    matrix = transition_matrix(s_data, t_data, mask)
+    matrix[0, :] = matrix[:, 0] = 0  # Drop nodata
+    pairs = np.argwhere(matrix > count_limit)
+    counts = matrix[pairs[:, 0], pairs[:, 1]]
 
     uniq_source = np.unique(pairs[:, 0])
     uniq_target = np.unique(pairs[:, 1])
@@ -72,6 +66,8 @@ def load_sankey_params(s_data, t_data, mask, count_limit=10):
 
 
 # Define heterogeneity function
+# For whole rasters, ldn.focal.heterogeneity counts classes without a per-pixel callback,
+# but it also leaves out 255 (nodata) and gives 0 rather than NaN for empty windows
 def heterogeneity_func(window):
     window = window[window > 0]  # remove nodata (value == 0)
     if len(window) == 0:
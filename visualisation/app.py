@@ -5,19 +5,41 @@ Uses TiTiler to visualise a MosaicJSON of either GeoMedian/GeoMAD or predicted L
 Tiles from separate per-band COGs using TiTiler + STACReader.
 """
 
+import hashlib
+import json
 import logging
 import os
 import re
 import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
 from typing import Annotated, Literal
 
+import attr
 import boto3
+import numpy as np
+from botocore.exceptions import ClientError
+import pystac
 from cogeo_mosaic.backends import MosaicBackend
-from fastapi import FastAPI, Query, HTTPException
+from cogeo_mosaic.backends.base import MosaicJSONBackend
+from cogeo_mosaic.backends.file import FileBackend
+from cogeo_mosaic.backends.s3 import S3Backend
+from cogeo_mosaic.backends.web import HttpBackend
+from cogeo_mosaic.mosaic import MosaicJSON
+from morecantile import Tile
+from fastapi import Body, FastAPI, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from rio_tiler.io import STACReader
+from rio_tiler.io.stac import fetch
 from rio_tiler.colormap import cmap as default_cmap
+from rio_tiler.errors import EmptyMosaicError, NoAssetFoundError
 from titiler.core.dependencies import create_colormap_dependency
 from titiler.core.dependencies import AssetsExprParams
 from titiler.core.errors import DEFAULT_STATUS_CODES, add_exception_handlers
@@ -87,51 +109,561 @@ os.environ.update(
 MOSAIC_S3_BUCKET = "data.ldn.auspatious.com"
 GEOMAD_DATASET_PREFIX = "ausp_ls_geomad"
 PREDICTION_DATASET_PREFIX = "ausp_ls_lulc_prediction"
-MOSAIC_PATHS_GEOMAD: dict[str, str] = {}
-MOSAIC_PATHS_PREDICTION: dict[str, str] = {}
+# Tiles at or below this zoom are read from the overview mosaics built by `ldn make-overviews`
+# (if one exists for the year), instead of opening every full resolution tile COG.
+OVERVIEW_MAX_ZOOM = int(os.environ.get("OVERVIEW_MAX_ZOOM", "7"))
+
+# Mosaic discovery.
+# Mosaic paths are discovered on first use rather than at import, so a cold start makes
+# no S3 calls. A manifest baked into the image (see `python app.py <manifest>`) is used
+# until the first refresh; after MOSAIC_REGISTRY_TTL seconds the registry re-scans S3 in
+# the background, so new mosaics appear without a redeploy.
+MOSAIC_REGISTRY_TTL = int(os.environ.get("MOSAIC_REGISTRY_TTL", "300"))
+MOSAIC_MANIFEST = os.environ.get(
+    "MOSAIC_MANIFEST",
+    os.path.join(os.path.dirname(__file__), "manifest", "mosaics.json"),
+)
 
-# Scan S3 for mosaic JSONs on startup and populate paths dicts.
-# Expects filenames like geomad_2020_mosaic.json or prediction_2020_mosaic.json.
+# Expects filenames like geomad_2020_mosaic.json or prediction_2020_mosaic.json,
+# and geomad_2020_overview_mosaic.json for overviews.
 MOSAIC_PATTERN = re.compile(r"(\w+)_(\d{4})_mosaic\.json$")
+OVERVIEW_PATTERN = re.compile(r"(\w+)_(\d{4})_overview_mosaic\.json$")
+
+DATASET_PREFIXES = {
+    "geomad": (GEOMAD_DATASET_PREFIX, GEOMAD_VERSION),
+    "prediction": (PREDICTION_DATASET_PREFIX, PREDICTION_VERSION),
+}
 
-try:
+
+def scan_s3_for_mosaics() -> dict[str, dict[str, dict[str, str]]]:
+    """List S3 for mosaic JSONs.
+
+    Returns:
+        {"mosaics": {dataset: {year: path}}, "overviews": {dataset: {year: path}}}.
+    """
     s3 = boto3.client("s3")
-    for dataset_prefix, version, paths_dict in [
-        (GEOMAD_DATASET_PREFIX, GEOMAD_VERSION, MOSAIC_PATHS_GEOMAD),
-        (
-            PREDICTION_DATASET_PREFIX,
-            PREDICTION_VERSION,
-            MOSAIC_PATHS_PREDICTION,
-        ),
-    ]:
-        s3_prefix = f"{dataset_prefix}/{version}/mosaics/"
-        # Capped at 1000 items (no pagination). Fine because there is one mosaic per year.
-        response = s3.list_objects_v2(Bucket=MOSAIC_S3_BUCKET, Prefix=s3_prefix)
-        for obj in response.get("Contents", []):
-            key = obj["Key"]
-            match = MOSAIC_PATTERN.search(key)
-            if match:
-                year = match.group(2)
-                paths_dict[year] = f"s3://{MOSAIC_S3_BUCKET}/{key}"
-except Exception as e:
-    logger.error(f"Failed to scan S3 for mosaics: {e}")
-    if not MOSAIC_PATHS_GEOMAD and not MOSAIC_PATHS_PREDICTION:
-        raise RuntimeError(
-            f"Cannot start: failed to discover any mosaics from s3://{MOSAIC_S3_BUCKET}. "
-            f"Check AWS credentials and network connectivity. Error: {e}"
+    registry: dict[str, dict[str, dict[str, str]]] = {"mosaics": {}, "overviews": {}}
+    for kind, pattern in [("mosaics", MOSAIC_PATTERN), ("overviews", OVERVIEW_PATTERN)]:
+        for dataset, (dataset_prefix, version) in DATASET_PREFIXES.items():
+            s3_prefix = f"{dataset_prefix}/{version}/{kind}/"
+            # Capped at 1000 items (no pagination). Fine because there is one mosaic per year,
+            # and the delimiter skips the per-year folders of overview COGs.
+            response = s3.list_objects_v2(
+                Bucket=MOSAIC_S3_BUCKET, Prefix=s3_prefix, Delimiter="/"
+            )
+            paths = registry[kind].setdefault(dataset, {})
+            for obj in response.get("Contents", []):
+                key = obj["Key"]
+                match = pattern.search(key)
+                if match:
+                    paths[match.group(2)] = f"s3://{MOSAIC_S3_BUCKET}/{key}"
+    return registry
+
+
+class MosaicRegistry:
+    """Lazily loaded, TTL-refreshed registry of mosaic paths per dataset and year."""
+
+    def __init__(self, ttl: int, manifest_path: str | None = None):
+        self.ttl = ttl
+        self.manifest_path = manifest_path
+        self._registry: dict[str, dict[str, dict[str, str]]] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self) -> dict[str, dict[str, dict[str, str]]]:
+        """Return the registry, loading it on first use and refreshing it in the background when stale."""
+        if self._registry is None:
+            with self._lock:
+                if self._registry is None:
+                    self._load()
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            self.refresh_in_background()
+        return self._registry or {"mosaics": {}, "overviews": {}}
+
+    def _load(self) -> None:
+        """Load from the manifest if there is one, otherwise scan S3. Caller holds the lock."""
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self._registry = json.load(f)
+            logger.info(f"Loaded mosaics from manifest {self.manifest_path}")
+        else:
+            self._registry = scan_s3_for_mosaics()
+            logger.info(f"Discovered mosaics from s3://{MOSAIC_S3_BUCKET}")
+        self._loaded_at = time.monotonic()
+        self._log()
+
+    def refresh(self) -> None:
+        """Re-scan S3, keeping the current registry if the scan fails."""
+        try:
+            registry = scan_s3_for_mosaics()
+        except Exception as e:
+            logger.error(f"Failed to scan S3 for mosaics: {e}")
+            # Back off for a full TTL before trying again.
+            registry = None
+        with self._lock:
+            if registry is not None:
+                self._registry = registry
+                self._log()
+                # Recheck each mosaic's ETag on its next use, to pick up mosaics rewritten in place.
+                _mosaic_versions.clear()
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread, unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def _log(self) -> None:
+        for kind, datasets in (self._registry or {}).items():
+            for dataset, paths in datasets.items():
+                logger.info(f"{dataset} {kind}: {sorted(paths.keys())}")
+
+
+mosaic_registry = MosaicRegistry(MOSAIC_REGISTRY_TTL, MOSAIC_MANIFEST)
+
+
+def get_mosaic_paths(
+    kind: Literal["mosaics", "overviews"], dataset: str
+) -> dict[str, str]:
+    """Return the {year: path} mosaics or overviews of a dataset."""
+    try:
+        registry = mosaic_registry.get()
+    except Exception as e:
+        logger.error(f"Failed to discover mosaics: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to discover mosaics from s3://{MOSAIC_S3_BUCKET}.",
         ) from e
+    return registry.get(kind, {}).get(dataset, {})
+
+
+# Compact mosaic index.
+# A MosaicJSON stores its quadkey -> asset href map as a dict of lists of strings, and
+# cogeo-mosaic re-reads it from S3 whenever its TTL cache expires. Instead, each mosaic
+# is read once and flattened into sorted numpy arrays, so a tile lookup is a binary
+# search plus a slice, and the hrefs (shared by many quadkeys) are stored only once.
+# Mosaics and STAC items can be rewritten in place (`make-mosaics --update`, reprocessed
+# tiles), so cached mosaics are keyed on their ETag (or mtime), which is rechecked every
+# MOSAIC_INDEX_TTL seconds, and cached STAC items are refetched after STAC_ITEM_TTL seconds.
+MOSAIC_INDEX_CACHE_SIZE = int(os.environ.get("MOSAIC_INDEX_CACHE_SIZE", "64"))
+MOSAIC_INDEX_TTL = int(os.environ.get("MOSAIC_INDEX_TTL", "300"))
+STAC_ITEM_CACHE_SIZE = int(os.environ.get("STAC_ITEM_CACHE_SIZE", "4096"))
+STAC_ITEM_TTL = int(os.environ.get("STAC_ITEM_TTL", "3600"))
+# Load every discovered mosaic into the index in a background thread on startup.
+PRELOAD_MOSAIC_INDEXES = os.environ.get("PRELOAD_MOSAIC_INDEXES", "true") == "true"
+
+
+class TtlCache:
+    """Thread-safe, size-bounded LRU cache whose entries are reloaded after ttl seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (loaded at, value), least recently used first.
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key, load):
+        """Return the cached value of key, calling load(key) if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = load(key)
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def mosaic_version(path: str) -> str:
+    """Return a token that changes when a mosaic is rewritten: its S3 ETag or file mtime.
+
+    Other (e.g. HTTP) paths fall back to the current MOSAIC_INDEX_TTL period.
+    """
+    parsed = urlparse(path)
+    if parsed.scheme == "s3":
+        try:
+            response = boto3.client("s3").head_object(
+                Bucket=parsed.netloc, Key=parsed.path.lstrip("/")
+            )
+        except ClientError:
+            # Let the mosaic read report the error, e.g. as a MosaicNotFoundError.
+            return "unknown"
+        return response["ETag"]
+    if parsed.scheme in ("", "file"):
+        return str(os.stat(parsed.path if parsed.scheme else path).st_mtime_ns)
+    return f"period-{int(time.time() // max(MOSAIC_INDEX_TTL, 1))}"
+
+
+_mosaic_versions = TtlCache(MOSAIC_INDEX_CACHE_SIZE, MOSAIC_INDEX_TTL)
+
+
+@attr.s(frozen=True, slots=True)
+class CompactMosaicIndex:
+    """Array-backed quadkey -> asset href map for one mosaic.
+
+    The assets of quadkeys[i] are hrefs[asset_ids[offsets[i]:offsets[i + 1]]].
+    """
+
+    quadkeys: np.ndarray = attr.ib()  # Sorted fixed-width bytes, e.g. dtype "S8".
+    offsets: np.ndarray = attr.ib()  # int64, len(quadkeys) + 1.
+    asset_ids: np.ndarray = attr.ib()  # int32 indices into hrefs.
+    hrefs: tuple[str, ...] = attr.ib()
+
+    @classmethod
+    def from_tiles(cls, tiles: dict[str, list[str]]) -> "CompactMosaicIndex":
+        """Build the index from a MosaicJSON 'tiles' mapping."""
+        quadkeys = sorted(tiles)
+        href_ids: dict[str, int] = {}
+        asset_ids = [
+            href_ids.setdefault(href, len(href_ids))
+            for qk in quadkeys
+            for href in tiles[qk]
+        ]
+        offsets = np.zeros(len(quadkeys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(tiles[qk]) for qk in quadkeys])
+        return cls(
+            quadkeys=np.array(quadkeys, dtype="S"),
+            offsets=offsets,
+            asset_ids=np.array(asset_ids, dtype=np.int32),
+            hrefs=tuple(href_ids),
+        )
+
+    def lookup(self, quadkeys: list[str]) -> list[str]:
+        """Return the unique asset hrefs of the given quadkeys, in mosaic order."""
+        if not quadkeys or len(self.quadkeys) == 0:
+            return []
+        wanted = np.array(quadkeys, dtype="S")
+        positions = np.minimum(
+            np.searchsorted(self.quadkeys, wanted), len(self.quadkeys) - 1
+        )
+        found = positions[self.quadkeys[positions] == wanted]
+        ids = [
+            i
+            for pos in found
+            for i in self.asset_ids[self.offsets[pos] : self.offsets[pos + 1]]
+        ]
+        return [self.hrefs[i] for i in dict.fromkeys(ids)]
+
+    def to_tiles(self) -> dict[str, list[str]]:
+        """Rebuild the MosaicJSON 'tiles' mapping, sharing the href strings."""
+        return {
+            quadkey.decode(): [
+                self.hrefs[i]
+                for i in self.asset_ids[self.offsets[pos] : self.offsets[pos + 1]]
+            ]
+            for pos, quadkey in enumerate(self.quadkeys)
+        }
+
+
+@lru_cache(maxsize=MOSAIC_INDEX_CACHE_SIZE)
+def _load_compact_mosaic(
+    path: str, version: str
+) -> tuple[MosaicJSON, CompactMosaicIndex]:
+    # cogeo-mosaic keeps its own per-path TTL cache of documents, which would hand back the
+    # old version. Clearing it is cheap, as every other mosaic is cached here by version.
+    for backend in (FileBackend, S3Backend, HttpBackend):
+        backend._read.cache_clear()
+    with MosaicBackend(path) as mosaic:
+        mosaic_def = mosaic.mosaic_def
+    index = CompactMosaicIndex.from_tiles(mosaic_def.tiles)
+    # Rebuilt from the index, so each href string is held once however many quadkeys use it.
+    mosaic_def = mosaic_def.model_copy(update={"tiles": index.to_tiles()})
+    logger.info(
+        f"Indexed {path} ({version}): {len(index.quadkeys)} quadkeys, {len(index.hrefs)} assets."
+    )
+    return mosaic_def, index
+
+
+def load_compact_mosaic(path: str) -> tuple[MosaicJSON, CompactMosaicIndex]:
+    """Return a mosaic and its compact index, reading it again only if it has been rewritten."""
+    return _load_compact_mosaic(path, _mosaic_versions.get(path, mosaic_version))
+
+
+@attr.s
+class CompactMosaicBackend(MosaicJSONBackend):
+    """Read-only mosaic backend that serves asset lookups from the compact index."""
+
+    _backend_name = "Compact"
+
+    def _read(self) -> MosaicJSON:
+        mosaic_def, _ = load_compact_mosaic(self.input)
+        return mosaic_def
+
+    def write(self, overwrite: bool = True):
+        raise NotImplementedError("CompactMosaicBackend is read-only.")
+
+    def get_assets(self, x: int, y: int, z: int, reverse: bool = False) -> list[str]:
+        _, index = load_compact_mosaic(self.input)
+        quadkeys = self.find_quadkeys(Tile(x=x, y=y, z=z), self.quadkey_zoom)
+        assets = index.lookup(quadkeys)
+        if self.mosaic_def.asset_prefix:
+            assets = [self.mosaic_def.asset_prefix + asset for asset in assets]
+        if reverse:
+            assets = list(reversed(assets))
+        return assets
 
-logger.info(f"GeoMAD mosaics: {sorted(MOSAIC_PATHS_GEOMAD.keys())}")
-logger.info(f"Prediction mosaics: {sorted(MOSAIC_PATHS_PREDICTION.keys())}")
 
-DATASETS: dict[str, dict[str, str]] = {
-    "geomad": MOSAIC_PATHS_GEOMAD,
-    "prediction": MOSAIC_PATHS_PREDICTION,
+_stac_items = TtlCache(STAC_ITEM_CACHE_SIZE, STAC_ITEM_TTL)
+
+
+def load_stac_item(href: str) -> pystac.Item:
+    """Fetch and parse a STAC item, reusing it for STAC_ITEM_TTL seconds so tile requests skip the S3 round trip."""
+    return _stac_items.get(href, lambda h: pystac.Item.from_dict(fetch(h), h))
+
+
+@attr.s
+class CachedSTACReader(STACReader):
+    """STACReader that takes its items from the in-process STAC item cache."""
+
+    def __attrs_post_init__(self):
+        if self.item is None and not self.fetch_options:
+            self.item = load_stac_item(self.input)
+        super().__attrs_post_init__()
+
+
+def preload_mosaic_indexes(paths: list[str]) -> None:
+    """Load the compact index of each mosaic, logging (not raising) failures."""
+    for path in paths:
+        try:
+            load_compact_mosaic(path)
+        except Exception as e:
+            logger.error(f"Failed to preload mosaic index for {path}: {e}")
+
+
+def preload_all_mosaic_indexes() -> None:
+    """Discover the mosaics and load their indexes, most recent years first."""
+    try:
+        registry = mosaic_registry.get()
+    except Exception as e:
+        logger.error(f"Failed to discover mosaics to preload: {e}")
+        return
+    paths = [
+        path
+        for datasets in registry.values()
+        for dataset_paths in datasets.values()
+        for _, path in sorted(dataset_paths.items(), reverse=True)
+    ]
+    preload_mosaic_indexes(paths[:MOSAIC_INDEX_CACHE_SIZE])
+
+
+if PRELOAD_MOSAIC_INDEXES and __name__ != "__main__":
+    threading.Thread(target=preload_all_mosaic_indexes, daemon=True).start()
+
+
+# Rendered tile cache.
+# Tiles for a given dataset, version and year never change, so rendered tiles are kept
+# on local disk (Lambda /tmp, bounded by TILE_CACHE_MAX_BYTES and evicted least recently
+# used first) and, if TILE_CACHE_S3_URI is set, in S3 where they are shared between
+# containers and can be pre-seeded with `ldn seed-tile-cache`.
+# Mosaics updated in place (`make-mosaics --update`) keep their version, so clear the
+# S3 tier for that version after an update.
+TILE_CACHE_DIR = os.environ.get(
+    "TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tile-cache")
+)
+# 256 MB, half of Lambda's default 512 MB of /tmp.
+TILE_CACHE_MAX_BYTES = int(os.environ.get("TILE_CACHE_MAX_BYTES", "268435456"))
+TILE_CACHE_S3_URI = os.environ.get("TILE_CACHE_S3_URI")  # e.g. s3://bucket/tile-cache/
+
+# Matches /mosaic/tiles/{tileMatrixSetId}/{z}/{x}/{y}[@{scale}x].{format}
+TILE_PATH_PATTERN = re.compile(
+    r"^/mosaic/tiles/(?P<tms>[^/]+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)"
+    r"(?P<scale>@\dx)?\.(?P<format>\w+)$"
+)
+TILE_MEDIA_TYPES = {
+    "png": "image/png",
+    "pngraw": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "tif": "image/tiff",
+    "npy": "application/x-binary",
 }
+DATASET_VERSIONS = {"geomad": GEOMAD_VERSION, "prediction": PREDICTION_VERSION}
+
+
+def tile_cache_key(path: str, query_params) -> str | None:
+    """Build the cache key of a tile request, or None if it should not be cached.
+
+    The key is '{dataset}/{version}/{year}/{z}/{x}/{y}/{hash}.{format}', where the hash
+    covers the tile matrix set, scale and every other query parameter (assets,
+    colormap, rescale, ...), so differently styled tiles never collide. It also covers
+    the version (ETag or mtime) of the mosaic the tile is read from, so tiles cached
+    before the mosaic was rewritten (e.g. by `make-mosaics --update`) are not served.
+    """
+    match = TILE_PATH_PATTERN.match(path)
+    dataset = query_params.get("dataset")
+    year = query_params.get("year")
+    if (
+        match is None
+        or match["format"] not in TILE_MEDIA_TYPES
+        or dataset not in DATASET_VERSIONS
+        or year is None
+        or not year.isdigit()
+    ):
+        return None
+    try:
+        mosaic_path = resolve_mosaic_path(dataset, year, int(match["z"]))
+    except HTTPException:
+        # Not cached, so the tile endpoint reports the error.
+        return None
+    version = _mosaic_versions.get(mosaic_path, mosaic_version)
+
+    # Sorted by name only, and stably, so repeated parameters (e.g. assets) keep their order.
+    style = sorted(
+        ((k, v) for k, v in query_params.multi_items() if k not in ("dataset", "year")),
+        key=lambda kv: kv[0],
+    )
+    style_hash = hashlib.sha256(
+        repr((match["tms"], match["scale"], style, version)).encode()
+    ).hexdigest()[:16]
+    return (
+        f"{dataset}/{DATASET_VERSIONS[dataset]}/{year}/"
+        f"{match['z']}/{match['x']}/{match['y']}/{style_hash}.{match['format']}"
+    )
+
+
+class DiskTileCache:
+    """Size-bounded LRU cache of rendered tiles on local disk."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> size, LRU first.
+        self._size = 0
+
+        # Adopt tiles left by a previous run (e.g. a warm Lambda container), oldest first.
+        existing = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                stat = os.stat(full_path)
+                existing.append((stat.st_mtime, os.path.relpath(full_path, root), stat))
+        for _, key, stat in sorted(existing):
+            self._entries[key] = stat.st_size
+            self._size += stat.st_size
+        self._evict()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(os.path.join(self.root, key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+            return None
+
+    def put(self, key: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        full_path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial tile.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, full_path)
+        with self._lock:
+            self._size += len(content) - self._entries.pop(key, 0)
+            self._entries[key] = len(content)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used tiles until the cache fits. Caller holds the lock."""
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(os.path.join(self.root, key))
+            except FileNotFoundError:
+                pass
+
+
+class S3TileCache:
+    """Shared tile cache in S3, under a prefix."""
+
+    def __init__(self, uri: str):
+        parsed = urlparse(uri)
+        self.bucket = parsed.netloc
+        self.prefix = parsed.path.strip("/")
+        self._client = boto3.client("s3")
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            response = self._client.get_object(
+                Bucket=self.bucket, Key=f"{self.prefix}/{key}"
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                logger.warning(f"Tile cache read failed for {key}: {e}")
+            return None
+        return response["Body"].read()
+
+    def put(self, key: str, content: bytes) -> None:
+        try:
+            self._client.put_object(
+                Bucket=self.bucket,
+                Key=f"{self.prefix}/{key}",
+                Body=content,
+                ContentType=TILE_MEDIA_TYPES[key.rsplit(".", 1)[-1]],
+            )
+        except ClientError as e:
+            logger.warning(f"Tile cache write failed for {key}: {e}")
+
+
+disk_tile_cache = (
+    DiskTileCache(TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES)
+    if TILE_CACHE_MAX_BYTES > 0
+    else None
+)
+s3_tile_cache = S3TileCache(TILE_CACHE_S3_URI) if TILE_CACHE_S3_URI else None
+
+
+def get_cached_tile(key: str) -> tuple[bytes | None, str]:
+    """Look a tile up in the disk tier then the S3 tier, promoting S3 hits to disk."""
+    if disk_tile_cache is not None:
+        content = disk_tile_cache.get(key)
+        if content is not None:
+            return content, "hit-disk"
+    if s3_tile_cache is not None:
+        content = s3_tile_cache.get(key)
+        if content is not None:
+            if disk_tile_cache is not None:
+                disk_tile_cache.put(key, content)
+            return content, "hit-s3"
+    return None, "miss"
+
+
+def put_cached_tile(key: str, content: bytes) -> None:
+    """Store a rendered tile in every configured tier."""
+    if disk_tile_cache is not None:
+        disk_tile_cache.put(key, content)
+    if s3_tile_cache is not None:
+        s3_tile_cache.put(key, content)
 
 
 # Custom path dependency
 def mosaic_path_params(
+    request: Request,
     year: Annotated[
         str,
         Query(description="Year (e.g. '2020')", pattern=r"^\d{4}$"),
@@ -142,13 +674,27 @@ def mosaic_path_params(
     ],
 ) -> str:
     """Resolve dataset and year query parameters to a mosaic.json file path."""
-    mosaic_paths = DATASETS.get(dataset)
-    if mosaic_paths is None:
+    z = request.path_params.get("z")
+    return resolve_mosaic_path(dataset, year, int(z) if z is not None else None)
+
+
+def resolve_mosaic_path(dataset: str, year: str, z: int | None = None) -> str:
+    """Return the mosaic.json path of a dataset and year.
+
+    Low zoom tile requests resolve to the year's overview mosaic, if there is one.
+    """
+    if dataset not in DATASET_PREFIXES:
         raise HTTPException(
             status_code=404,
-            detail=f"Unknown dataset '{dataset}'. Valid options: {list(DATASETS.keys())}.",
+            detail=f"Unknown dataset '{dataset}'. Valid options: {list(DATASET_PREFIXES.keys())}.",
         )
 
+    overview_path = get_mosaic_paths("overviews", dataset).get(year)
+    if overview_path and z is not None and z <= OVERVIEW_MAX_ZOOM:
+        return overview_path
+
+    mosaic_paths = get_mosaic_paths("mosaics", dataset)
+
     if year in mosaic_paths:
         return str(mosaic_paths[year])
     else:
@@ -177,6 +723,39 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def tile_cache(request, call_next):
+    """Serve tiles from the rendered tile cache, and cache newly rendered tiles."""
+    use_cache = request.method == "GET" and (
+        disk_tile_cache is not None or s3_tile_cache is not None
+    )
+    key = (
+        # Off the event loop, as checking the mosaic version may call S3.
+        await run_in_threadpool(tile_cache_key, request.url.path, request.query_params)
+        if use_cache
+        else None
+    )
+    if key is None:
+        return await call_next(request)
+
+    content, status = await run_in_threadpool(get_cached_tile, key)
+    media_type = TILE_MEDIA_TYPES[key.rsplit(".", 1)[-1]]
+    if content is not None:
+        return Response(
+            content, media_type=media_type, headers={"X-Tile-Cache": status}
+        )
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    content = b"".join([chunk async for chunk in response.body_iterator])
+    await run_in_threadpool(put_cached_tile, key, content)
+    headers = dict(response.headers)
+    headers.pop("content-length", None)
+    headers["X-Tile-Cache"] = status
+    return Response(content, status_code=200, headers=headers, media_type=media_type)
+
+
 @app.middleware("http")
 async def add_cache_control(request, call_next):
     """Add Cache-Control headers to tile responses for browser caching."""
@@ -189,8 +768,8 @@ async def add_cache_control(request, call_next):
 
 
 mosaic_factory = MosaicTilerFactory(
-    backend=MosaicBackend,  # type: ignore
-    dataset_reader=STACReader,
+    backend=CompactMosaicBackend,  # type: ignore
+    dataset_reader=CachedSTACReader,
     path_dependency=mosaic_path_params,
     layer_dependency=AssetsExprParams,
     router_prefix="/mosaic",
@@ -211,8 +790,8 @@ def health():
 @app.get("/config.json", tags=["Viewer"])
 def config():
     """Return dynamic configuration for the frontend."""
-    years_geomad = sorted(MOSAIC_PATHS_GEOMAD.keys())
-    years_prediction = sorted(MOSAIC_PATHS_PREDICTION.keys())
+    years_geomad = sorted(get_mosaic_paths("mosaics", "geomad").keys())
+    years_prediction = sorted(get_mosaic_paths("mosaics", "prediction").keys())
     all_years = sorted(set(years_geomad + years_prediction))
     default_year = all_years[-1] if all_years else "2020"
     return {
@@ -223,6 +802,157 @@ def config():
     }
 
 
+# Time series queries.
+# Per-year values of a point, or summaries of an area, read through the same mosaics
+# (and compact index and STAC item cache) as the tiles. The `ldn timeseries` command
+# answers the same queries from the STAC-Geoparquet index.
+TIMESERIES_CACHE_SIZE = int(os.environ.get("TIMESERIES_CACHE_SIZE", "4096"))
+TIMESERIES_CONCURRENCY = int(os.environ.get("TIMESERIES_CONCURRENCY", "16"))
+TIMESERIES_MAX_SIZE = 1024  # Largest side, in pixels, read for an area.
+# Matches DEFAULT_TIMESERIES_ASSETS in ldn/timeseries.py and CATEGORICAL_ASSETS in ldn/overviews.py.
+DEFAULT_TIMESERIES_ASSETS = {
+    "prediction": ["classification"],
+    "geomad": ["red", "green", "blue", "nir08", "swir16", "swir22"],
+}
+CATEGORICAL_ASSETS = {"classification", "classification_unfiltered"}
+
+
+def point_values(
+    mosaic_path: str, lon: float, lat: float, assets: tuple[str, ...]
+) -> dict:
+    """Read the value of each asset at a point from one year's mosaic.
+
+    Cached until the mosaic is rewritten, like load_compact_mosaic.
+    """
+    version = _mosaic_versions.get(mosaic_path, mosaic_version)
+    return _point_values(mosaic_path, version, lon, lat, assets)
+
+
+@lru_cache(maxsize=TIMESERIES_CACHE_SIZE)
+def _point_values(
+    mosaic_path: str, version: str, lon: float, lat: float, assets: tuple[str, ...]
+) -> dict:
+    with CompactMosaicBackend(mosaic_path, reader=CachedSTACReader) as mosaic:
+        try:
+            points = mosaic.point(lon, lat, assets=list(assets))
+        except NoAssetFoundError:
+            points = []
+    for _, point in points:
+        mask = np.ma.getmaskarray(point.array)
+        if not mask.all():
+            return {
+                asset: None if masked else value.item()
+                for asset, value, masked in zip(assets, point.array.data, mask)
+            }
+    return {asset: None for asset in assets}
+
+
+def area_values(mosaic_path: str, geometry_json: str, assets: tuple[str, ...]) -> dict:
+    """Summarise each asset under a polygon from one year's mosaic.
+
+    Class maps get pixel counts per class, everything else the mean and count of valid
+    pixels. Cached until the mosaic is rewritten, like load_compact_mosaic.
+    """
+    version = _mosaic_versions.get(mosaic_path, mosaic_version)
+    return _area_values(mosaic_path, version, geometry_json, assets)
+
+
+@lru_cache(maxsize=TIMESERIES_CACHE_SIZE)
+def _area_values(
+    mosaic_path: str, version: str, geometry_json: str, assets: tuple[str, ...]
+) -> dict:
+    with CompactMosaicBackend(mosaic_path, reader=CachedSTACReader) as mosaic:
+        try:
+            image, _ = mosaic.feature(
+                json.loads(geometry_json),
+                assets=list(assets),
+                max_size=TIMESERIES_MAX_SIZE,
+            )
+            bands = list(image.array)
+        except (NoAssetFoundError, EmptyMosaicError):
+            bands = [np.ma.masked_all((0,)) for _ in assets]
+
+    summaries = {}
+    for asset, band in zip(assets, bands):
+        values = band.compressed()
+        if asset in CATEGORICAL_ASSETS:
+            classes, counts = np.unique(values, return_counts=True)
+            summaries[asset] = {
+                str(c): int(n) for c, n in zip(classes.tolist(), counts)
+            }
+        else:
+            summaries[asset] = {
+                "mean": float(values.mean()) if len(values) else None,
+                "count": int(len(values)),
+            }
+    return summaries
+
+
+def query_years(dataset: str, years: list[str] | None, read_year) -> list[dict]:
+    """Run read_year on the mosaic of each requested year concurrently."""
+    mosaic_paths = get_mosaic_paths("mosaics", dataset)
+    selected = sorted(mosaic_paths) if not years else sorted(set(years))
+    unknown = [year for year in selected if year not in mosaic_paths]
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No mosaic found for years {unknown} in dataset '{dataset}'. Available years: {sorted(mosaic_paths.keys())}.",
+        )
+    with ThreadPoolExecutor(max_workers=TIMESERIES_CONCURRENCY) as executor:
+        values = executor.map(lambda year: read_year(mosaic_paths[year]), selected)
+        return [{"year": year, **v} for year, v in zip(selected, values)]
+
+
+@app.get("/timeseries/point", tags=["Query"])
+def timeseries_point(
+    dataset: Annotated[
+        Literal["geomad", "prediction"],
+        Query(description="Dataset name (must be either 'geomad' or 'prediction')"),
+    ],
+    lon: Annotated[float, Query(ge=-180, le=180, description="Longitude")],
+    lat: Annotated[float, Query(ge=-90, le=90, description="Latitude")],
+    assets: Annotated[
+        list[str] | None,
+        Query(description="Assets to read, e.g. `assets=classification`"),
+    ] = None,
+    years: Annotated[
+        list[str] | None,
+        Query(description="Years to read (e.g. `years=2020`). Defaults to all."),
+    ] = None,
+):
+    """Return the per-year pixel values of a point."""
+    asset_tuple = tuple(assets or DEFAULT_TIMESERIES_ASSETS[dataset])
+    return query_years(
+        dataset, years, lambda path: point_values(path, lon, lat, asset_tuple)
+    )
+
+
+@app.post("/timeseries/area", tags=["Query"])
+def timeseries_area(
+    geometry: Annotated[
+        dict, Body(description="GeoJSON Polygon or Feature, in WGS84.")
+    ],
+    dataset: Annotated[
+        Literal["geomad", "prediction"],
+        Query(description="Dataset name (must be either 'geomad' or 'prediction')"),
+    ],
+    assets: Annotated[
+        list[str] | None,
+        Query(description="Assets to read, e.g. `assets=classification`"),
+    ] = None,
+    years: Annotated[
+        list[str] | None,
+        Query(description="Years to read (e.g. `years=2020`). Defaults to all."),
+    ] = None,
+):
+    """Return per-year summaries of an area: class counts for class maps, otherwise means."""
+    asset_tuple = tuple(assets or DEFAULT_TIMESERIES_ASSETS[dataset])
+    geometry_json = json.dumps(geometry.get("geometry", geometry), sort_keys=True)
+    return query_years(
+        dataset, years, lambda path: area_values(path, geometry_json, asset_tuple)
+    )
+
+
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 
 
@@ -235,3 +965,11 @@ def root():
 handler = Mangum(
     app, lifespan="off"
 )  # Lifespan "off" disables startup/shutdown events which can slow down Lambda cold starts.
+
+
+if __name__ == "__main__":
+    # Write the mosaic manifest to bake into the image, e.g. `python app.py manifest/mosaics.json`.
+    manifest_path = sys.argv[1] if len(sys.argv) > 1 else MOSAIC_MANIFEST
+    with open(manifest_path, "w") as f:
+        json.dump(scan_s3_for_mosaics(), f, indent=2, sort_keys=True)
+    logger.info(f"Wrote mosaic manifest to {manifest_path}")
@@ -17,6 +17,8 @@ echo "==> Building mosaics..."
 # poetry run ldn make-mosaics --dataset "geomad" --years "2000-2025" --version-geomad $GEOMAD_VERSION --version-prediction $PREDICTION_VERSION
 # Make mosaics for one year for prediction.
 # poetry run ldn make-mosaics --dataset "prediction" --years "2023-2025" --version-geomad $GEOMAD_VERSION --version-prediction $PREDICTION_VERSION
+# Build low resolution overviews, which the viewer uses at zoom levels <= OVERVIEW_MAX_ZOOM.
+# poetry run ldn make-overviews --dataset "all" --years "2023-2025" --version-geomad $GEOMAD_VERSION --version-prediction $PREDICTION_VERSION
 echo "==> Creating ECR repository..."
 terraform -chdir=visualisation/infra init
 terraform -chdir=visualisation/infra apply \
@@ -29,6 +31,10 @@ echo "==> Function name: ${FUNCTION_NAME}"
 
 poetry check --lock || { echo "poetry.lock is out of date. Run 'poetry lock' first."; exit 1; }
 
+echo "==> Writing mosaic manifest..."
+# Baked into the image so the viewer's cold start doesn't need to list S3.
+poetry run python visualisation/app.py visualisation/manifest/mosaics.json
+
 echo "==> Building Docker image..."
 docker build --platform=linux/arm64 --provenance=false -f visualisation/Dockerfile -t ${FUNCTION_NAME} .
 
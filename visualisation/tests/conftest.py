@@ -0,0 +1,11 @@
+import os
+import sys
+
+import pytest
+
+# The viewer needs the visualisation dependency group, and reads its versions at import.
+pytest.importorskip("titiler.mosaic")
+os.environ.setdefault("GEOMAD_VERSION", "0-2-0")
+os.environ.setdefault("PREDICTION_VERSION", "0-0-3")
+os.environ.setdefault("PRELOAD_MOSAIC_INDEXES", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -0,0 +1,156 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from cogeo_mosaic.mosaic import MosaicJSON
+from starlette.datastructures import QueryParams
+
+import app
+
+
+def _write_mosaic(path, tiles: dict[str, list[str]], mtime: int) -> str:
+    mosaic = MosaicJSON(
+        mosaicjson="0.0.3",
+        minzoom=5,
+        maxzoom=14,
+        bounds=(0, 0, 10, 10),
+        center=(5, 5, 5),
+        tiles=tiles,
+    )
+    path.write_text(mosaic.model_dump_json())
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_compact_index_round_trips_tiles():
+    tiles = {"0120": ["a", "b"], "0121": ["b"], "0300": []}
+    index = app.CompactMosaicIndex.from_tiles(tiles)
+
+    assert index.to_tiles() == tiles
+    assert index.lookup(["0120", "0121", "9999"]) == ["a", "b"]
+
+
+def test_backend_exposes_tiles_and_reloads_rewritten_mosaic(tmp_path):
+    path = _write_mosaic(tmp_path / "mosaic.json", {"01202": ["old"]}, mtime=1_000)
+    app._mosaic_versions.clear()
+
+    with app.CompactMosaicBackend(path) as mosaic:
+        assert mosaic.mosaic_def.tiles == {"01202": ["old"]}
+        assert mosaic.info(quadkeys=True).quadkeys == ["01202"]
+
+    _write_mosaic(tmp_path / "mosaic.json", {"01202": ["new"]}, mtime=2_000)
+    # Within the TTL the cached version is used, after it the mosaic is read again.
+    with app.CompactMosaicBackend(path) as mosaic:
+        assert mosaic.mosaic_def.tiles == {"01202": ["old"]}
+    app._mosaic_versions.clear()
+    with app.CompactMosaicBackend(path) as mosaic:
+        assert mosaic.mosaic_def.tiles == {"01202": ["new"]}
+
+
+def test_ttl_cache_reloads_expired_entries():
+    cache = app.TtlCache(maxsize=2, ttl=0)
+    loads = []
+
+    def load(key):
+        loads.append(key)
+        return key.upper()
+
+    assert cache.get("a", load) == "A"
+    assert cache.get("a", load) == "A"
+    assert loads == ["a", "a"]
+
+    cache = app.TtlCache(maxsize=2, ttl=60)
+    for key in ["a", "b", "a", "c", "b"]:
+        cache.get(key, load)
+    # "b" was evicted by "c" as least recently used, so it was loaded again.
+    assert loads[2:] == ["a", "b", "c", "b"]
+
+
+def _mosaic_paths(paths: dict[str, str]):
+    """Patch mosaic discovery to return the given {year: path} mosaics and no overviews."""
+    return patch.object(
+        app,
+        "get_mosaic_paths",
+        side_effect=lambda kind, dataset: paths if kind == "mosaics" else {},
+    )
+
+
+def test_tile_cache_key_keeps_the_order_of_repeated_parameters(tmp_path):
+    path = "/mosaic/tiles/WebMercatorQuad/8/240/140@1x.png"
+    mosaic = _write_mosaic(tmp_path / "mosaic.json", {}, mtime=1_000)
+
+    def key(query: str) -> str:
+        with _mosaic_paths({"2020": mosaic}):
+            return app.tile_cache_key(path, QueryParams(query))
+
+    rgb = key("dataset=geomad&year=2020&assets=red&assets=green&assets=blue")
+    bgr = key("dataset=geomad&year=2020&assets=blue&assets=green&assets=red")
+    reordered = key("assets=red&year=2020&assets=green&dataset=geomad&assets=blue")
+
+    assert rgb != bgr
+    assert rgb == reordered
+    assert rgb.startswith("geomad/0-2-0/2020/8/240/140/")
+
+
+def test_registry_refresh_rechecks_mosaic_versions(tmp_path):
+    path = _write_mosaic(tmp_path / "mosaic.json", {"01202": ["old"]}, mtime=1_000)
+    app._mosaic_versions.clear()
+    app.load_compact_mosaic(path)
+    _write_mosaic(tmp_path / "mosaic.json", {"01202": ["new"]}, mtime=2_000)
+    scanned = {"mosaics": {"geomad": {"2020": path}}, "overviews": {}}
+    registry = app.MosaicRegistry(ttl=300, manifest_path=str(tmp_path / "missing.json"))
+
+    with patch.object(app, "scan_s3_for_mosaics", return_value=scanned):
+        registry.refresh()
+
+    assert registry.get() == scanned
+    mosaic_def, _ = app.load_compact_mosaic(path)
+    assert mosaic_def.tiles == {"01202": ["new"]}
+
+
+def test_timeseries_values_are_read_again_when_the_mosaic_is_rewritten(tmp_path):
+    path = _write_mosaic(tmp_path / "mosaic.json", {"01202": ["old"]}, mtime=1_000)
+    app._mosaic_versions.clear()
+    backend = MagicMock()
+    mosaic = backend.return_value.__enter__.return_value
+
+    def read(value):
+        mosaic.point.return_value = [
+            ("item", SimpleNamespace(array=np.ma.array([value])))
+        ]
+        mosaic.feature.return_value = (
+            SimpleNamespace(array=[np.ma.array([value])]),
+            None,
+        )
+        point = app.point_values(path, 5.0, 5.0, ("classification",))
+        area = app.area_values(path, "{}", ("classification",))
+        return point["classification"], area["classification"]
+
+    with patch.object(app, "CompactMosaicBackend", backend):
+        assert read(3) == (3, {"3": 1})
+        # Cached while the mosaic is unchanged.
+        assert read(5) == (3, {"3": 1})
+
+        _write_mosaic(tmp_path / "mosaic.json", {"01202": ["new"]}, mtime=2_000)
+        app._mosaic_versions.clear()  # As if MOSAIC_INDEX_TTL had passed.
+        assert read(5) == (5, {"5": 1})
+
+
+def test_tile_cache_key_changes_when_the_mosaic_is_rewritten(tmp_path):
+    path = "/mosaic/tiles/WebMercatorQuad/8/240/140@1x.png"
+    query = QueryParams("dataset=prediction&year=2020&assets=classification")
+    mosaic = _write_mosaic(tmp_path / "mosaic.json", {}, mtime=1_000)
+    app._mosaic_versions.clear()
+
+    with _mosaic_paths({"2020": mosaic}):
+        before = app.tile_cache_key(path, query)
+        _write_mosaic(tmp_path / "mosaic.json", {"01202": ["new"]}, mtime=2_000)
+        app._mosaic_versions.clear()
+        after = app.tile_cache_key(path, query)
+        # Years without a mosaic aren't cached, so the tile endpoint returns the 404.
+        missing = app.tile_cache_key(path, QueryParams("dataset=prediction&year=2019"))
+
+    assert before != after
+    assert before.rsplit("/", 1)[0] == after.rsplit("/", 1)[0]
+    assert missing is None